@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Script to create the booking_conflicts table on an existing database.
+Rejected (409) booking requests are logged there and the admin demand grid reads it,
+so run this before deploying the demand grid.
+Usage: python -m backend.add_booking_conflicts_table
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import BookingConflict
+from sqlalchemy import inspect
+
+def add_booking_conflicts_table():
+	"""Create booking_conflicts (with its port_id and created_at indexes) if it is missing"""
+	app = create_app()
+
+	with app.app_context():
+		try:
+			if inspect(db.engine).has_table(BookingConflict.__tablename__):
+				print("[OK] Table 'booking_conflicts' already exists")
+			else:
+				print("Creating booking_conflicts table...")
+				BookingConflict.__table__.create(db.engine)
+				print("[OK] Successfully created booking_conflicts table")
+		except Exception as e:
+			db.session.rollback()
+			print(f"[ERROR] Failed to add booking_conflicts table: {str(e)}")
+			import traceback
+			traceback.print_exc()
+
+if __name__ == "__main__":
+	add_booking_conflicts_table()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Script to create and backfill the port_popularity table on an existing database.
+Favorite and booking writes update it, so run this before deploying the counters.
+Usage: python -m backend.add_port_popularity_table
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import PortPopularity
+from backend import popularity
+from sqlalchemy import inspect
+
+def add_port_popularity_table():
+	"""Create port_popularity if it is missing and fill it from favorites and bookings"""
+	app = create_app()
+
+	with app.app_context():
+		try:
+			if inspect(db.engine).has_table(PortPopularity.__tablename__):
+				print("[OK] Table 'port_popularity' already exists")
+			else:
+				print("Creating port_popularity table...")
+				PortPopularity.__table__.create(db.engine)
+				print("[OK] Successfully created port_popularity table")
+
+			# Backfill (or correct) the counters from the source tables
+			fixed = popularity.reconcile()
+			print(f"[OK] Reconciled port popularity counters ({fixed} rows fixed)")
+		except Exception as e:
+			db.session.rollback()
+			print(f"[ERROR] Failed to add port_popularity table: {str(e)}")
+			import traceback
+			traceback.print_exc()
+
+if __name__ == "__main__":
+	add_port_popularity_table()
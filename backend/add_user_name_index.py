@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Script to add the full_name index used by the admin users prefix search.
+Usage: python -m backend.add_user_name_index
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.extensions import db
+from sqlalchemy import text
+
+def add_user_name_index():
+	"""Add ix_users_full_name index to users table"""
+	app = create_app()
+	
+	with app.app_context():
+		try:
+			# Check if index already exists
+			result = db.session.execute(text("""
+				SELECT COUNT(*) as count
+				FROM information_schema.STATISTICS
+				WHERE TABLE_SCHEMA = DATABASE()
+				AND TABLE_NAME = 'users'
+				AND INDEX_NAME = 'ix_users_full_name'
+			"""))
+			exists = result.fetchone()[0] > 0
+			
+			if exists:
+				print("[OK] Index 'ix_users_full_name' already exists on users table")
+				return
+			
+			# Add the index
+			print("Adding ix_users_full_name index to users table...")
+			db.session.execute(text("""
+				CREATE INDEX ix_users_full_name ON users (full_name)
+			"""))
+			db.session.commit()
+			print("[OK] Successfully added ix_users_full_name index to users table")
+		except Exception as e:
+			db.session.rollback()
+			print(f"[ERROR] Failed to add ix_users_full_name index: {str(e)}")
+			import traceback
+			traceback.print_exc()
+
+if __name__ == "__main__":
+	add_user_name_index()
@@ -0,0 +1,340 @@
+"""Vectorized booking analytics for the admin dashboard.
+
+Bookings are pulled as plain (port_id, start_time, end_time) rows and turned
+into NumPy arrays of minutes since the start of the requested range; all of
+the binning after that happens in array operations, never per row in Python.
+Results are cached per argument tuple for ANALYTICS_CACHE_TTL seconds.
+
+Demand grids are built once per cell size, kept in memory and updated in
+place as bookings and rejected requests commit; they are rebuilt from the
+database every DEMAND_GRID_TTL seconds or once a transaction that adds, moves
+or deletes a port commits.
+"""
+import threading
+import time
+from datetime import date, datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from .extensions import db
+from .models import EVPort, EVPortSchedule, Booking, BookingConflict
+
+
+HOURS_PER_WEEK = 7 * 24
+KM_PER_DEGREE = 111.32
+
+_cache_lock = threading.Lock()
+_cache: dict[tuple, tuple[float, dict]] = {}
+
+
+def cached(key: tuple, compute):
+	"""Return compute() for key, reusing a result younger than ANALYTICS_CACHE_TTL"""
+	ttl = current_app.config.get("ANALYTICS_CACHE_TTL", 300)
+	now = time.monotonic()
+	with _cache_lock:
+		hit = _cache.get(key)
+		if hit and now - hit[0] < ttl:
+			return hit[1]
+	result = compute()
+	with _cache_lock:
+		# Drop expired entries so the cache stays bounded by the TTL window
+		for stale in [k for k, (at, _) in _cache.items() if now - at >= ttl]:
+			del _cache[stale]
+		_cache[key] = (now, result)
+	return result
+
+
+def _to_minutes(values, origin: datetime) -> np.ndarray:
+	return (np.array(values, dtype="datetime64[m]") - np.datetime64(origin, "m")).astype(np.int64)
+
+
+def _occupied_minutes(port_idx: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+		n_ports: int, n_days: int, first_weekday: int,
+		day_opens: np.ndarray, day_closes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+	"""Booked minutes per (port, weekday, hour) inside and outside opening hours.
+
+	day_opens/day_closes are (n_ports, 7) minutes of the day; a closed weekday
+	has open == close. Returns two (n_ports, 7, 24) arrays.
+	"""
+	occupied = np.zeros(n_ports * HOURS_PER_WEEK, dtype=np.float64)
+	in_hours = np.zeros(n_ports * HOURS_PER_WEEK, dtype=np.float64)
+	# Clip to the range so bookings straddling its edges only count their inside part
+	starts = np.clip(starts, 0, n_days * 1440)
+	ends = np.clip(ends, 0, n_days * 1440)
+	keep = ends > starts
+	if keep.any():
+		port_idx, starts, ends = port_idx[keep], starts[keep], ends[keep]
+		first_hour = starts // 60
+		n_hours = (ends + 59) // 60 - first_hour
+
+		# Expand every booking into one entry per hour bin it touches
+		owner = np.repeat(np.arange(len(starts)), n_hours)
+		offset = np.arange(len(owner)) - np.repeat(np.cumsum(n_hours) - n_hours, n_hours)
+		hour_abs = first_hour[owner] + offset
+		overlap = (
+			np.minimum(ends[owner], (hour_abs + 1) * 60)
+			- np.maximum(starts[owner], hour_abs * 60)
+		)
+
+		weekday = (first_weekday + hour_abs // 24) % 7
+		bins = port_idx[owner] * HOURS_PER_WEEK + weekday * 24 + hour_abs % 24
+		occupied += np.bincount(bins, weights=overlap, minlength=len(occupied))
+
+		# The same overlap, further cut to the port's opening hours on that day
+		day_start = hour_abs // 24 * 1440
+		open_overlap = np.clip(
+			np.minimum(np.minimum(ends[owner], (hour_abs + 1) * 60), day_start + day_closes[port_idx[owner], weekday])
+			- np.maximum(np.maximum(starts[owner], hour_abs * 60), day_start + day_opens[port_idx[owner], weekday]),
+			0, None,
+		)
+		in_hours += np.bincount(bins, weights=open_overlap, minlength=len(in_hours))
+	in_hours = in_hours.reshape(n_ports, 7, 24)
+	return in_hours, occupied.reshape(n_ports, 7, 24) - in_hours
+
+
+def _open_minutes(port_idx: np.ndarray, weekdays: np.ndarray, opens: np.ndarray, closes: np.ndarray,
+		n_ports: int, weekday_counts: np.ndarray) -> np.ndarray:
+	"""Scheduled open minutes per (port, weekday, hour) over the range"""
+	hour_start = np.arange(24) * 60
+	per_day = np.clip(
+		np.minimum(closes[:, None], hour_start + 60) - np.maximum(opens[:, None], hour_start),
+		0, 60,
+	)
+	capacity = np.zeros((n_ports, 7, 24), dtype=np.float64)
+	np.add.at(capacity, (port_idx, weekdays), per_day * weekday_counts[weekdays][:, None])
+	return capacity
+
+
+def _ratio(occupied: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+	with np.errstate(divide="ignore", invalid="ignore"):
+		return np.where(capacity > 0, occupied / capacity, np.nan)
+
+
+def _heatmap(values: np.ndarray) -> list[list[float | None]]:
+	return [[None if np.isnan(v) else round(float(v), 3) for v in row] for row in values]
+
+
+def utilization(date_from: date, date_to: date, group_by: str = "port",
+		port_id: int | None = None, city: str | None = None) -> dict:
+	"""Booked vs. open hours by weekday and hour for [date_from, date_to)"""
+	origin = datetime.combine(date_from, datetime.min.time())
+	end = datetime.combine(date_to, datetime.min.time())
+	n_days = (date_to - date_from).days
+
+	ports_query = select(EVPort.id, EVPort.name, EVPort.city).order_by(EVPort.id)
+	if port_id:
+		ports_query = ports_query.where(EVPort.id == port_id)
+	if city:
+		ports_query = ports_query.where(EVPort.city == city)
+	ports = db.session.execute(ports_query).all()
+	port_ids = [row[0] for row in ports]
+	# Ports are ordered by id, so searchsorted maps port ids to row indexes
+	sorted_ids = np.array(port_ids, dtype=np.int64)
+
+	bookings = db.session.execute(
+		select(Booking.port_id, Booking.start_time, Booking.end_time).where(
+			Booking.port_id.in_(port_ids),
+			Booking.start_time < end,
+			Booking.end_time > origin,
+			Booking.payment_status == "paid",
+		)
+	).all() if port_ids else []
+	schedules = db.session.execute(
+		select(EVPortSchedule.port_id, EVPortSchedule.weekday, EVPortSchedule.open_time, EVPortSchedule.close_time)
+		.where(EVPortSchedule.port_id.in_(port_ids))
+	).all() if port_ids else []
+
+	if bookings:
+		b_ports, b_starts, b_ends = zip(*bookings)
+		b_idx = np.searchsorted(sorted_ids, np.array(b_ports, dtype=np.int64))
+		b_starts = _to_minutes(b_starts, origin)
+		b_ends = _to_minutes(b_ends, origin)
+	else:
+		b_idx = b_starts = b_ends = np.zeros(0, dtype=np.int64)
+
+	weekday_counts = np.bincount((date_from.weekday() + np.arange(n_days)) % 7, minlength=7)
+	# One schedule per (port, weekday); days without one stay closed (open == close == 0)
+	day_opens = np.zeros((len(ports), 7), dtype=np.int64)
+	day_closes = np.zeros((len(ports), 7), dtype=np.int64)
+	if schedules:
+		s_ports, s_weekdays, s_opens, s_closes = zip(*schedules)
+		s_idx = np.searchsorted(sorted_ids, np.array(s_ports, dtype=np.int64))
+		s_weekdays = np.array(s_weekdays, dtype=np.int64)
+		s_opens = np.array([t.hour * 60 + t.minute for t in s_opens], dtype=np.int64)
+		s_closes = np.array([t.hour * 60 + t.minute for t in s_closes], dtype=np.int64)
+		day_opens[s_idx, s_weekdays] = s_opens
+		day_closes[s_idx, s_weekdays] = s_closes
+		capacity = _open_minutes(s_idx, s_weekdays, s_opens, s_closes, len(ports), weekday_counts)
+	else:
+		capacity = np.zeros((len(ports), 7, 24), dtype=np.float64)
+	occupied, out_of_hours = _occupied_minutes(
+		b_idx, b_starts, b_ends, len(ports), n_days, date_from.weekday(), day_opens, day_closes,
+	)
+	# Overlapping legacy bookings could still exceed a slot's open minutes
+	occupied = np.minimum(occupied, capacity)
+
+	if group_by == "city":
+		cities = sorted({row[2] for row in ports})
+		city_idx = np.array([cities.index(row[2]) for row in ports], dtype=np.int64)
+		occupied_by_city = np.zeros((len(cities), 7, 24))
+		capacity_by_city = np.zeros((len(cities), 7, 24))
+		out_of_hours_by_city = np.zeros((len(cities), 7, 24))
+		np.add.at(occupied_by_city, city_idx, occupied)
+		np.add.at(capacity_by_city, city_idx, capacity)
+		np.add.at(out_of_hours_by_city, city_idx, out_of_hours)
+		labels = [{"city": c} for c in cities]
+		occupied, capacity, out_of_hours = occupied_by_city, capacity_by_city, out_of_hours_by_city
+	else:
+		labels = [{"portId": row[0], "name": row[1], "city": row[2]} for row in ports]
+
+	booked_totals = occupied.sum(axis=(1, 2))
+	open_totals = capacity.sum(axis=(1, 2))
+	out_of_hours_totals = out_of_hours.sum(axis=(1, 2))
+	heatmaps = _ratio(occupied, capacity)
+	groups = []
+	for i, label in enumerate(labels):
+		groups.append({
+			**label,
+			"bookedHours": round(float(booked_totals[i]) / 60, 2),
+			"openHours": round(float(open_totals[i]) / 60, 2),
+			# Booked time outside the schedule (e.g. imported or legacy bookings), not in utilization
+			"outOfHoursHours": round(float(out_of_hours_totals[i]) / 60, 2),
+			"utilization": round(float(booked_totals[i] / open_totals[i]), 4) if open_totals[i] else None,
+			"heatmap": _heatmap(heatmaps[i]),
+		})
+	return {
+		"from": date_from.isoformat(),
+		"to": date_to.isoformat(),
+		"groupBy": group_by,
+		"groups": groups,
+	}
+
+
+# ========== DEMAND GRID ==========
+
+_grids_lock = threading.Lock()
+_grids: dict[float, dict] = {}  # cell_km -> {"builtAt", "cellOf", "cells"}
+# Bumped on every invalidation; a rebuild that started before one is not cached
+_grids_generation = 0
+
+
+def record_demand(port_id: int, bookings: int = 0, conflicts: int = 0) -> None:
+	"""Queue a demand change at a port for the current transaction"""
+	db.session.info.setdefault("demand_deltas", []).append((port_id, bookings, conflicts))
+
+
+def record_port_change() -> None:
+	"""Queue a rebuild of every grid for a port added, moved or deleted in the current transaction"""
+	db.session.info["demand_grids_stale"] = True
+
+
+def invalidate_demand_grids() -> None:
+	"""Drop every cached grid so the next request rebuilds it"""
+	global _grids_generation
+	with _grids_lock:
+		_grids.clear()
+		_grids_generation += 1
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_demand(session) -> None:
+	if session.info.pop("demand_grids_stale", False):
+		session.info.pop("demand_deltas", None)
+		invalidate_demand_grids()
+		return
+	deltas = session.info.pop("demand_deltas", None)
+	if not deltas:
+		return
+	with _grids_lock:
+		for grid in _grids.values():
+			for port_id, bookings, conflicts in deltas:
+				cell = grid["cellOf"].get(port_id)
+				if cell is not None:
+					counts = grid["cells"][cell]
+					counts[1] = max(counts[1] + bookings, 0)
+					counts[2] = max(counts[2] + conflicts, 0)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_demand(session) -> None:
+	session.info.pop("demand_deltas", None)
+	session.info.pop("demand_grids_stale", None)
+
+
+def _grid_cells(latitudes: np.ndarray, longitudes: np.ndarray, cell_km: float) -> tuple[np.ndarray, np.ndarray]:
+	"""Map coordinates to (row, col) cells of roughly cell_km x cell_km.
+
+	Rows are latitude bands; columns are scaled by the cosine of the band's
+	centre latitude so cells stay square and their ids never depend on which
+	ports happen to exist.
+	"""
+	rows = np.floor(latitudes * KM_PER_DEGREE / cell_km).astype(np.int64)
+	band_lat = (rows + 0.5) * cell_km / KM_PER_DEGREE
+	cols = np.floor(longitudes * KM_PER_DEGREE * np.cos(np.radians(band_lat)) / cell_km).astype(np.int64)
+	return rows, cols
+
+
+def _build_demand_grid(cell_km: float) -> dict:
+	ports = db.session.execute(select(EVPort.id, EVPort.latitude, EVPort.longitude).order_by(EVPort.id)).all()
+	bookings = dict(db.session.execute(
+		select(Booking.port_id, func.count(Booking.id)).group_by(Booking.port_id)
+	).all())
+	conflicts = dict(db.session.execute(
+		select(BookingConflict.port_id, func.count(BookingConflict.id)).group_by(BookingConflict.port_id)
+	).all())
+
+	cell_of, cells = {}, {}
+	if ports:
+		ids, lats, lons = (np.array(column) for column in zip(*ports))
+		rows, cols = _grid_cells(lats.astype(np.float64), lons.astype(np.float64), cell_km)
+		keys, inverse = np.unique(np.stack([rows, cols], axis=1), axis=0, return_inverse=True)
+		inverse = inverse.reshape(-1)
+		booking_weights = np.array([bookings.get(int(i), 0) for i in ids], dtype=np.float64)
+		conflict_weights = np.array([conflicts.get(int(i), 0) for i in ids], dtype=np.float64)
+		supply = np.bincount(inverse, minlength=len(keys))
+		demand = np.bincount(inverse, weights=booking_weights, minlength=len(keys))
+		rejected = np.bincount(inverse, weights=conflict_weights, minlength=len(keys))
+
+		cells = {
+			(int(row), int(col)): [int(supply[k]), int(demand[k]), int(rejected[k])]
+			for k, (row, col) in enumerate(keys)
+		}
+		cell_of = {int(port_id): (int(keys[k][0]), int(keys[k][1])) for port_id, k in zip(ids, inverse)}
+	return {"builtAt": time.monotonic(), "builtAtIso": datetime.utcnow().isoformat(), "cellOf": cell_of, "cells": cells}
+
+
+def _tile(row: int, col: int, counts: list[int], cell_km: float) -> dict:
+	south = row * cell_km / KM_PER_DEGREE
+	north = (row + 1) * cell_km / KM_PER_DEGREE
+	lon_step = cell_km / (KM_PER_DEGREE * np.cos(np.radians((south + north) / 2)))
+	west = col * lon_step
+	ports, bookings, conflicts = counts
+	return {
+		"row": row,
+		"col": col,
+		"bounds": [round(south, 6), round(float(west), 6), round(north, 6), round(float(west + lon_step), 6)],
+		"ports": ports,
+		"bookings": bookings,
+		"conflicts": conflicts,
+		"bookingsPerPort": round(bookings / ports, 2) if ports else None,
+		"conflictRate": round(conflicts / (bookings + conflicts), 4) if bookings + conflicts else None,
+	}
+
+
+def demand_grid(cell_km: float) -> dict:
+	"""Return the demand tiles for cell_km, building the grid if needed"""
+	ttl = current_app.config.get("DEMAND_GRID_TTL", 600)
+	with _grids_lock:
+		grid = _grids.get(cell_km)
+		generation = _grids_generation
+	if grid is None or time.monotonic() - grid["builtAt"] >= ttl:
+		grid = _build_demand_grid(cell_km)
+		with _grids_lock:
+			# A port change committed while building may be missing from this grid; serve it uncached
+			if _grids_generation == generation:
+				_grids[cell_km] = grid
+	with _grids_lock:
+		tiles = [_tile(row, col, counts, cell_km) for (row, col), counts in grid["cells"].items()]
+	tiles.sort(key=lambda tile: tile["bookings"] + tile["conflicts"], reverse=True)
+	return {"cellKm": cell_km, "builtAt": grid["builtAtIso"], "tiles": tiles}
@@ -2,19 +2,32 @@ from flask import Flask
 from flask_cors import CORS
 from .extensions import db, migrate, jwt
 from .config import Config
+from . import compression, db_pool, json_provider, memory_profile, metrics, profiler, slow_queries, tracing
 
 
 def create_app(config_object: type[Config] | None = None) -> Flask:
 	app = Flask(__name__)
 	app.config.from_object(config_object or Config)
+	# orjson-backed app.json when available
+	json_provider.init_app(app)
 
 	# CORS for local dev (React on 5173/3000)
 	CORS(app, resources={r"/api/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:3000", "http://127.0.0.1:3000"]}}, supports_credentials=True)
 
-	# Init extensions
+	# Init extensions; pool options follow the final URI, so a config pointing at SQLite gets SQLite options
+	app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", db_pool.engine_options(app.config))
 	db.init_app(app)
 	migrate.init_app(app, db)
 	jwt.init_app(app)
+	with app.app_context():
+		db_pool.instrument(db.engine)
+		slow_queries.init_app(app, db.engine)
+	# Per-route latency, status and DB time at /api/metrics
+	metrics.init_app(app)
+	# Tags request threads with their route for GET /api/admin/profile
+	profiler.init_app(app)
+	# Per-route retained memory while tracemalloc is on (/api/admin/memory)
+	memory_profile.init_app(app)
 
 	# Register blueprints
 	from .routes.auth import auth_bp
@@ -31,18 +44,24 @@ def create_app(config_object: type[Config] | None = None) -> Flask:
 	app.register_blueprint(subscriptions_bp, url_prefix="/api/subscriptions")
 	app.register_blueprint(admin_bp, url_prefix="/api/admin")
 
+	# Request spans to TRACE_FILE (no-op when unset); after the blueprints so every model is mapped
+	tracing.init_app(app, db)
+
 	# Serve uploaded images
 	@app.route("/api/uploads/<filename>")
 	def uploaded_file(filename):
-		from flask import send_from_directory
 		import os
+		from .images import send_upload
 		upload_folder = os.path.join(app.instance_path, 'uploads')
-		return send_from_directory(upload_folder, filename)
+		return send_upload(upload_folder, filename)
 
 	@app.get("/api/health")
 	def health() -> dict:
 		return {"status": "ok"}
 
+	# gzip/brotli for large text responses; registered last so it runs first after the view
+	compression.init_app(app)
+
 	return app
 
 
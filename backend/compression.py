@@ -0,0 +1,147 @@
+"""gzip/brotli response compression with content negotiation.
+
+Compresses JSON, CSV and text responses of at least COMPRESS_MIN_SIZE bytes
+for clients that accept it, picking the coding with the best Accept-Encoding
+quality (brotli over gzip on a tie, when the brotli module is installed).
+Levels are tuned per route in ROUTE_LEVELS. Payloads served from
+payload_cache are compressed once, at a moderately higher level, and kept
+next to the encoded body until the catalog changes. Streamed and file responses are
+left alone. Bytes in/out, CPU time and cache hits are exported on
+/api/metrics.
+"""
+import gzip
+import threading
+import time
+
+from flask import Flask, current_app, request
+
+try:
+	import brotli
+except ImportError:  # optional; gzip only without it
+	brotli = None
+
+
+COMPRESSIBLE_TYPES = {"application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html", "text/css", "application/javascript"}
+# route -> (gzip level, brotli quality); everything else uses COMPRESS_GZIP_LEVEL / COMPRESS_BROTLI_QUALITY
+ROUTE_LEVELS = {
+	# Small and requested on every map interaction: cheap levels already shrink 168 near-identical slots ~15x
+	"/api/ports/<int:port_id>/available-slots": (4, 3),
+	# Large admin pages are fetched rarely; spend more CPU for smaller transfers
+	"/api/admin/bookings": (6, 5),
+	"/api/admin/users": (6, 5),
+}
+# Levels for payloads compressed once and cached. The first request after each port
+# change pays for it on its own thread: on a 2000-port list (480 KB) brotli 11 takes
+# ~1.3 s against ~10 ms at 6 for 23% more bytes, and gzip 9 ~35 ms against ~9 ms at 6
+CACHED_LEVELS = (6, 6)
+
+_lock = threading.Lock()
+# coding -> [responses, bytes in, bytes out, cpu seconds, cache hits]
+_stats = {}
+
+
+def _codings() -> tuple:
+	return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate() -> str | None:
+	"""Best coding the client accepts, or None for identity"""
+	accepted = request.accept_encodings
+	best, best_quality = None, 0
+	for coding in _codings():
+		quality = accepted.quality(coding)
+		if quality > best_quality:
+			best, best_quality = coding, quality
+	return best
+
+
+def compress(data: bytes, coding: str, levels: tuple) -> bytes:
+	if coding == "br":
+		return brotli.compress(data, quality=levels[1])
+	# mtime=0 keeps the output byte-identical for identical input
+	return gzip.compress(data, compresslevel=levels[0], mtime=0)
+
+
+def _record(coding: str, size_in: int, size_out: int, cpu: float, cache_hit: bool) -> None:
+	with _lock:
+		stats = _stats.setdefault(coding, [0, 0, 0, 0.0, 0])
+		stats[0] += 1
+		stats[1] += size_in
+		stats[2] += size_out
+		stats[3] += cpu
+		stats[4] += cache_hit
+
+
+def _after_request(response):
+	config = current_app.config
+	if (
+		not config.get("COMPRESS_ENABLED", True)
+		or response.status_code != 200
+		or response.direct_passthrough
+		or response.is_streamed
+		or "Content-Encoding" in response.headers
+		or response.mimetype not in COMPRESSIBLE_TYPES
+	):
+		return response
+	response.vary.add("Accept-Encoding")
+	if response.content_length is not None and response.content_length < config.get("COMPRESS_MIN_SIZE", 1024):
+		return response
+	coding = negotiate()
+	if coding is None:
+		return response
+
+	data = response.get_data()
+	cache = getattr(response, "compression_cache", None)
+	cpu_started = time.thread_time()
+	body = cache.get(coding) if cache is not None else None
+	cache_hit = body is not None
+	if body is None:
+		if cache is not None:
+			levels = CACHED_LEVELS
+		else:
+			rule = request.url_rule
+			levels = ROUTE_LEVELS.get(rule.rule if rule is not None else "", (
+				config.get("COMPRESS_GZIP_LEVEL", 6),
+				config.get("COMPRESS_BROTLI_QUALITY", 4),
+			))
+		body = compress(data, coding, levels)
+		if cache is not None:
+			cache[coding] = body
+	_record(coding, len(data), min(len(body), len(data)), time.thread_time() - cpu_started, cache_hit)
+
+	if len(body) >= len(data):
+		return response
+	response.set_data(body)
+	response.headers["Content-Encoding"] = coding
+	# Same entity, different bytes: a weak validator still matches If-None-Match
+	etag, weak = response.get_etag()
+	if etag and not weak:
+		response.set_etag(etag, weak=True)
+	return response
+
+
+def render_metrics() -> list:
+	"""Prometheus lines for /api/metrics"""
+	with _lock:
+		stats = {coding: list(values) for coding, values in _stats.items()}
+	lines = []
+	for name, index, kind, help_text in (
+		("http_compression_responses_total", 0, "counter", "Responses compressed, by coding."),
+		("http_compression_bytes_in_total", 1, "counter", "Uncompressed bytes of compressed responses."),
+		("http_compression_bytes_out_total", 2, "counter", "Bytes sent after compression."),
+		("http_compression_cpu_seconds_total", 3, "counter", "Thread CPU time spent compressing."),
+		("http_compression_cache_hits_total", 4, "counter", "Responses served from the pre-compressed cache."),
+	):
+		lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+		for coding, values in sorted(stats.items()):
+			value = values[index]
+			lines.append(f'{name}{{coding="{coding}"}} {value:.6f}' if isinstance(value, float) else f'{name}{{coding="{coding}"}} {value}')
+	lines += ["# HELP http_compression_bytes_saved_total Bytes not sent thanks to compression.", "# TYPE http_compression_bytes_saved_total counter"]
+	for coding, values in sorted(stats.items()):
+		lines.append(f'http_compression_bytes_saved_total{{coding="{coding}"}} {values[1] - values[2]}')
+	return lines
+
+
+def init_app(app: Flask) -> None:
+	"""Register last so it runs before the other after_request hooks and the metrics timing covers it"""
+	app.after_request(_after_request)
@@ -10,8 +10,54 @@ class Config:
 	SQLALCHEMY_TRACK_MODIFICATIONS = False
 	JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-jwt-secret")
 	JWT_TOKEN_LOCATION = ["headers"]
-
-
-
-
-
+	# Seconds before the in-memory popular-ports heap is reloaded from port_popularity
+	POPULAR_PORTS_CACHE_TTL = int(os.getenv("POPULAR_PORTS_CACHE_TTL", "60"))
+	# Seconds before the admin dashboard counters are recomputed from the database
+	DASHBOARD_STATS_CACHE_TTL = int(os.getenv("DASHBOARD_STATS_CACHE_TTL", "30"))
+	# Seconds an analytics result is reused for the same date range and filters
+	ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+	# Seconds before an in-memory demand grid is rebuilt to pick up other workers' writes
+	DEMAND_GRID_TTL = int(os.getenv("DEMAND_GRID_TTL", "600"))
+	# Largest GeoJSON port import accepted (bytes); unlike CSV it is parsed in memory as a whole
+	PORT_IMPORT_GEOJSON_MAX_BYTES = int(os.getenv("PORT_IMPORT_GEOJSON_MAX_BYTES", str(20 * 1024 * 1024)))
+	# Background threads that render resized variants of uploaded images
+	IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+	# "" serves uploads from Python, "nginx" answers with X-Accel-Redirect, "sendfile" with X-Sendfile
+	UPLOADS_ACCEL_MODE = os.getenv("UPLOADS_ACCEL_MODE", "")
+	UPLOADS_ACCEL_PREFIX = os.getenv("UPLOADS_ACCEL_PREFIX", "/protected-uploads/")
+	USE_X_SENDFILE = UPLOADS_ACCEL_MODE == "sendfile"
+	# Connections kept open per worker process; keep it >= the worker's thread count
+	DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+	# Extra short-lived connections allowed when the pool is exhausted
+	DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+	# Seconds a request waits for a free connection before failing
+	DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+	# Seconds before a connection is replaced; below MySQL's wait_timeout and any proxy idle timeout
+	DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+	# Test each connection with a ping on checkout so stale ones are replaced transparently
+	DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "False")
+	# SQLALCHEMY_ENGINE_OPTIONS is derived from the settings above in create_app (db_pool.engine_options)
+	# Statements slower than this many milliseconds go to the slow-query log
+	SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", "200"))
+	# Slow SELECTs above this many milliseconds get their EXPLAIN plan captured once
+	SLOW_QUERY_EXPLAIN_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_MS", "1000"))
+	# Bearer token Prometheus must send to scrape /api/metrics; empty leaves it open
+	METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+	# OTLP/JSON span file, e.g. instance/traces-{pid}.jsonl ({pid} keeps workers apart); empty disables tracing
+	TRACE_FILE = os.getenv("TRACE_FILE", "")
+	# Fraction of requests traced
+	TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+	# Size at which the span file rotates, and how many rotated files are kept
+	TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+	TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", "5"))
+	# "auto" uses orjson for JSON responses when it is installed, "stdlib" forces Flask's encoder
+	JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+	# Seconds a pre-encoded /api/ports or plans payload may serve writes made by other workers
+	PAYLOAD_CACHE_TTL = int(os.getenv("PAYLOAD_CACHE_TTL", "60"))
+	# gzip/brotli JSON and text responses for clients that send Accept-Encoding
+	COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+	# Smaller bodies go out uncompressed; below ~1 KB the headers and CPU cost outweigh the savings
+	COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+	# Default levels for routes not listed in compression.ROUTE_LEVELS (gzip 1-9, brotli 0-11)
+	COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+	COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
@@ -0,0 +1,121 @@
+"""Admin dashboard statistics.
+
+The counters live in an in-process snapshot that is rebuilt with a single
+statement every DASHBOARD_STATS_CACHE_TTL seconds. In between, the user,
+port, booking and subscription write paths call record(), and the deltas
+are applied to the snapshot once their transaction commits. The time-window
+counters (todayBookings, recentBookings) use range predicates on the
+indexed start_time column, and their windows re-align on each refresh.
+activeSubscriptions only counts subscriptions whose end_date has not passed,
+so the snapshot is also reloaded as soon as the earliest counted one expires.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from .extensions import db
+from .models import User, EVPort, Booking, UserSubscription
+
+
+_lock = threading.Lock()
+_stats: dict[str, int] = {}
+_loaded_at: float | None = None
+# end_date of the first counted subscription to expire; the snapshot is stale from then on
+_next_expiry: datetime | None = None
+
+
+def _windows(now: datetime) -> tuple[datetime, datetime, datetime]:
+	today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+	return today_start, today_start + timedelta(days=1), now - timedelta(days=7)
+
+
+def record(**deltas: int) -> None:
+	"""Queue counter deltas (e.g. totalUsers=1) for the current transaction"""
+	db.session.info.setdefault("dashboard_stats_deltas", []).append(deltas)
+
+
+def record_booking(start_time: datetime, delta: int) -> None:
+	"""Queue the counters affected by creating (+1) or deleting (-1) a booking"""
+	today_start, tomorrow_start, week_ago = _windows(datetime.utcnow())
+	deltas = {"totalBookings": delta}
+	if today_start <= start_time < tomorrow_start:
+		deltas["todayBookings"] = delta
+	if start_time >= week_ago:
+		deltas["recentBookings"] = delta
+	record(**deltas)
+
+
+def record_subscription(end_date: datetime) -> None:
+	"""Queue a newly activated subscription that stops counting at end_date"""
+	record(activeSubscriptions=1)
+	db.session.info.setdefault("dashboard_stats_expiries", []).append(end_date)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_deltas(session) -> None:
+	global _next_expiry
+	pending = session.info.pop("dashboard_stats_deltas", None)
+	expiries = session.info.pop("dashboard_stats_expiries", [])
+	if not pending:
+		return
+	with _lock:
+		if _loaded_at is None:
+			return
+		for deltas in pending:
+			for key, delta in deltas.items():
+				_stats[key] = max(_stats.get(key, 0) + delta, 0)
+		if expiries:
+			_next_expiry = min(expiries + ([_next_expiry] if _next_expiry else []))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_deltas(session) -> None:
+	session.info.pop("dashboard_stats_deltas", None)
+	session.info.pop("dashboard_stats_expiries", None)
+
+
+def _load(now: datetime) -> tuple[dict[str, int], datetime | None]:
+	today_start, tomorrow_start, week_ago = _windows(now)
+	count_bookings = select(func.count(Booking.id))
+	active_subscriptions = select(UserSubscription.end_date).where(
+		UserSubscription.is_active.is_(True),
+		UserSubscription.end_date >= now,
+	).subquery()
+	row = db.session.execute(select(
+		select(func.count(User.id)).scalar_subquery().label("totalUsers"),
+		select(func.count(EVPort.id)).scalar_subquery().label("totalPorts"),
+		select(func.count(EVPort.id)).where(EVPort.is_active.is_(True)).scalar_subquery().label("activePorts"),
+		count_bookings.scalar_subquery().label("totalBookings"),
+		count_bookings.where(
+			Booking.start_time >= today_start,
+			Booking.start_time < tomorrow_start,
+		).scalar_subquery().label("todayBookings"),
+		select(func.count()).select_from(active_subscriptions).scalar_subquery().label("activeSubscriptions"),
+		count_bookings.where(Booking.start_time >= week_ago).scalar_subquery().label("recentBookings"),
+		select(func.min(active_subscriptions.c.end_date)).scalar_subquery().label("nextExpiry"),
+	)).one()
+	stats = dict(row._mapping)
+	return stats, stats.pop("nextExpiry")
+
+
+def get_stats() -> dict[str, int]:
+	"""Return the dashboard counters, reloading them once the TTL has passed"""
+	global _loaded_at, _next_expiry
+	ttl = current_app.config.get("DASHBOARD_STATS_CACHE_TTL", 30)
+	now = datetime.utcnow()
+	with _lock:
+		if (
+			_loaded_at is not None
+			and time.monotonic() - _loaded_at < ttl
+			and (_next_expiry is None or now <= _next_expiry)
+		):
+			return dict(_stats)
+	stats, next_expiry = _load(now)
+	with _lock:
+		_stats.clear()
+		_stats.update(stats)
+		_loaded_at = time.monotonic()
+		_next_expiry = next_expiry
+		return dict(_stats)
@@ -0,0 +1,126 @@
+"""Connection pool settings and per-process pool metrics.
+
+TimedQueuePool times how long each checkout waits for a free connection and
+the pool event listeners count connects, invalidations and the peak number of
+connections in use, so pool_size / max_overflow can be sized per worker from
+real numbers (GET /api/admin/pool).
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+# Checkout waits kept for the percentiles
+WAIT_SAMPLES = 1000
+
+_lock = threading.Lock()
+_waits = deque(maxlen=WAIT_SAMPLES)
+_counters = {"checkouts": 0, "timeouts": 0, "connects": 0, "invalidations": 0, "peakInUse": 0}
+_wait_total = 0.0
+_wait_max = 0.0
+
+
+def _record_wait(seconds: float) -> None:
+	global _wait_total, _wait_max
+	with _lock:
+		_waits.append(seconds)
+		_wait_total += seconds
+		_wait_max = max(_wait_max, seconds)
+
+
+def _bump(name: str) -> None:
+	with _lock:
+		_counters[name] += 1
+
+
+class TimedQueuePool(QueuePool):
+	"""QueuePool that records how long each checkout waited for a connection"""
+
+	def _do_get(self):
+		started = time.perf_counter()
+		try:
+			entry = super()._do_get()
+		except exc.TimeoutError:
+			_bump("timeouts")
+			raise
+		_record_wait(time.perf_counter() - started)
+		return entry
+
+
+def engine_options(config) -> dict:
+	"""SQLALCHEMY_ENGINE_OPTIONS for the app's final database URI and DB_POOL_* settings.
+
+	SQLite gets only pre-ping: Flask-SQLAlchemy gives in-memory databases a
+	StaticPool, which rejects the queue sizing arguments.
+	"""
+	options = {"pool_pre_ping": config["DB_POOL_PRE_PING"]}
+	if config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+		return options
+	options.update(
+		poolclass=TimedQueuePool,
+		pool_size=config["DB_POOL_SIZE"],
+		max_overflow=config["DB_MAX_OVERFLOW"],
+		pool_timeout=config["DB_POOL_TIMEOUT"],
+		pool_recycle=config["DB_POOL_RECYCLE"],
+	)
+	return options
+
+
+def instrument(engine) -> None:
+	"""Attach the metrics listeners; they survive engine.dispose() in forked workers"""
+
+	@event.listens_for(engine, "connect")
+	def on_connect(dbapi_connection, connection_record):
+		_bump("connects")
+
+	@event.listens_for(engine, "invalidate")
+	def on_invalidate(dbapi_connection, connection_record, exception):
+		_bump("invalidations")
+
+	@event.listens_for(engine, "checkout")
+	def on_checkout(dbapi_connection, connection_record, connection_proxy):
+		pool = engine.pool
+		in_use = pool.checkedout() if isinstance(pool, QueuePool) else 0
+		with _lock:
+			_counters["checkouts"] += 1
+			_counters["peakInUse"] = max(_counters["peakInUse"], in_use)
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+	return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def snapshot(engine) -> dict:
+	"""Current pool state and checkout statistics for this worker process"""
+	pool = engine.pool
+	with _lock:
+		counters = dict(_counters)
+		ordered = sorted(_waits)
+		wait_total, wait_max = _wait_total, _wait_max
+	timed = counters["checkouts"] if isinstance(pool, TimedQueuePool) else 0
+	result = {
+		"pid": os.getpid(),
+		"poolClass": type(pool).__name__,
+		**counters,
+		"checkoutWaitMs": {
+			"mean": round(wait_total / timed * 1000, 3) if timed else 0.0,
+			"p50": round(_percentile(ordered, 0.50) * 1000, 3),
+			"p95": round(_percentile(ordered, 0.95) * 1000, 3),
+			"p99": round(_percentile(ordered, 0.99) * 1000, 3),
+			"max": round(wait_max * 1000, 3),
+		},
+	}
+	if isinstance(pool, QueuePool):
+		result.update(
+			poolSize=pool.size(),
+			maxOverflow=pool._max_overflow,
+			inUse=pool.checkedout(),
+			idle=pool.checkedin(),
+			# overflow() counts up from -pool_size; only connections beyond pool_size are overflow
+			overflow=max(pool.overflow(), 0),
+		)
+	return result
@@ -0,0 +1,384 @@
+"""Synthetic dataset generator for load testing.
+
+Usage: python -m backend.generate_dataset --ports 50000 --users 1000000 --bookings 20000000
+
+Ports cluster around Lebanese cities weighted by population, with a mix of
+24/7, daytime and business-hours schedules. Users book with a long-tailed
+activity distribution. Bookings fall on free 1-hour slots inside opening hours
+with commuter peaks, quieter weekends, a growth trend over the period and
+fewer bookings the further ahead they are. Port demand is long-tailed too.
+
+Worker processes generate chunks of rows with NumPy while the parent writes
+them: executemany INSERTs of driver-ready tuples by default, or with --load-data (MySQL) through
+CSV files and LOAD DATA LOCAL INFILE. IDs continue after the current maximum,
+so the generator can be run again to grow an existing dataset. All generated
+users share the password given by --password.
+"""
+import argparse
+import csv
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, time as dtime
+
+import numpy as np
+
+
+PORTS_PER_CHUNK = 2000
+USERS_PER_CHUNK = 50000
+# Bookings are generated per range of ports; this bounds the rows per chunk
+BOOKINGS_PER_CHUNK = 200000
+
+# name, latitude, longitude, share of ports, spread (km)
+CITIES = [
+	("Beirut", 33.8938, 35.5018, 0.34, 4.0),
+	("Jounieh", 33.9808, 35.6178, 0.09, 3.0),
+	("Tripoli", 34.4367, 35.8497, 0.12, 4.0),
+	("Sidon", 33.5571, 35.3729, 0.08, 3.0),
+	("Tyre", 33.2705, 35.2038, 0.06, 3.0),
+	("Zahle", 33.8463, 35.9020, 0.07, 3.0),
+	("Byblos", 34.1230, 35.6519, 0.05, 2.5),
+	("Baalbek", 34.0047, 36.2110, 0.04, 3.0),
+	("Nabatieh", 33.3772, 35.4836, 0.04, 2.5),
+	("Aley", 33.8050, 35.6000, 0.05, 2.5),
+	("Batroun", 34.2553, 35.6581, 0.03, 2.0),
+	("Halba", 34.5428, 36.0797, 0.03, 2.5),
+]
+STREETS = ["Hamra Street", "Main Road", "Highway Exit", "Seaside Road", "Old Souk", "Municipality Square", "Church Street", "Mosque Street", "Mall Parking", "Gas Station"]
+BRANDS = ["FastCharge", "GreenVolt", "CedarCharge", "PowerHub", "e-Station"]
+# connector type, share, power options (kW)
+CONNECTORS = [("Type2", 0.55, (7.4, 11.0, 22.0)), ("CCS", 0.35, (50.0, 100.0, 150.0)), ("CHAdeMO", 0.10, (50.0,))]
+FIRST_NAMES = ["Ali", "Maya", "Karim", "Nour", "Hadi", "Lara", "Omar", "Rita", "Ziad", "Yara", "Elie", "Hiba", "Fadi", "Rana", "Samir", "Joelle", "Tarek", "Dana", "Georges", "Layal"]
+LAST_NAMES = ["Haddad", "Khoury", "Nasser", "Saad", "Aoun", "Hamdan", "Chamoun", "Fares", "Karam", "Salameh", "Mansour", "Jaber", "Azar", "Hajj", "Rizk", "Daher"]
+
+# schedule name, share of ports, {weekday: (open, close)}
+SCHEDULES = [
+	("24h", 0.45, {weekday: (dtime(0, 0), dtime(23, 59)) for weekday in range(7)}),
+	("day", 0.40, {weekday: (dtime(7, 0), dtime(22, 0)) for weekday in range(7)}),
+	("business", 0.15, {**{weekday: (dtime(8, 0), dtime(18, 0)) for weekday in range(5)}, 5: (dtime(9, 0), dtime(14, 0))}),
+]
+
+# Relative demand per hour of day: overnight trough, commuter and evening peaks
+HOUR_PROFILE = np.array([
+	0.15, 0.1, 0.08, 0.08, 0.1, 0.2, 0.5, 1.0, 1.4, 1.2, 0.9, 0.9,
+	1.0, 1.0, 0.9, 0.9, 1.1, 1.5, 1.6, 1.3, 1.0, 0.7, 0.4, 0.25,
+])
+WEEKDAY_PROFILE = np.array([1.0, 1.0, 1.0, 1.05, 1.1, 0.8, 0.6])
+
+PAST_STATUSES = (["paid", "refunded", "pending", "failed"], [0.8, 0.08, 0.07, 0.05])
+FUTURE_STATUSES = (["paid", "pending"], [0.7, 0.3])
+PAID_METHODS = ["credit_card", "debit_card"]
+
+COLUMNS = {
+	"ev_ports": ("id", "name", "city", "address", "latitude", "longitude", "connector_type", "power_kw", "image_url", "is_active"),
+	"ev_port_schedules": ("port_id", "weekday", "open_time", "close_time"),
+	"users": ("id", "full_name", "email", "password_hash", "is_admin"),
+	"bookings": ("id", "user_id", "port_id", "start_time", "end_time", "amount", "payment_status", "payment_method", "payment_id", "created_at"),
+}
+
+
+# ========== PRODUCERS (run in worker processes) ==========
+
+def port_schedule_indexes(spec: dict) -> np.ndarray:
+	"""Schedule template of every generated port; the port and booking producers derive the same one"""
+	rng = np.random.default_rng([spec["seed"], spec["ports_first_id"]])
+	return rng.choice(len(SCHEDULES), size=spec["ports_total"], p=[share for _, share, _ in SCHEDULES])
+
+
+def generate_ports(spec: dict) -> dict:
+	first_id, count, seed = spec["first_id"], spec["count"], spec["seed"]
+	rng = np.random.default_rng([seed, first_id, 1])
+	city_index = rng.choice(len(CITIES), size=count, p=[city[3] for city in CITIES])
+	connector_index = rng.choice(len(CONNECTORS), size=count, p=[connector[1] for connector in CONNECTORS])
+	schedule_index = port_schedule_indexes(spec)[first_id - spec["ports_first_id"]:]
+	offsets = rng.normal(size=(count, 2))
+	ports, schedules = [], []
+	for i in range(count):
+		port_id = first_id + i
+		name, lat, lon, _, spread_km = CITIES[city_index[i]]
+		connector, _, powers = CONNECTORS[connector_index[i]]
+		latitude = lat + offsets[i, 0] * spread_km / 111.32
+		longitude = lon + offsets[i, 1] * spread_km / (111.32 * math.cos(math.radians(lat)))
+		ports.append((
+			port_id,
+			f"{name} {BRANDS[port_id % len(BRANDS)]} #{port_id}",
+			name,
+			f"{STREETS[int(rng.integers(len(STREETS)))]}, {name}",
+			round(latitude, 6),
+			round(longitude, 6),
+			connector,
+			float(powers[int(rng.integers(len(powers)))]),
+			None,
+			int(rng.random() < 0.97),
+		))
+		for weekday, (open_time, close_time) in SCHEDULES[schedule_index[i]][2].items():
+			schedules.append((port_id, weekday, open_time.isoformat(), close_time.isoformat()))
+	return {"ev_ports": ports, "ev_port_schedules": schedules}
+
+
+def generate_users(spec: dict) -> dict:
+	first_id, count, password_hash = spec["first_id"], spec["count"], spec["password_hash"]
+	rng = np.random.default_rng([spec["seed"], first_id, 2])
+	firsts = rng.integers(len(FIRST_NAMES), size=count)
+	lasts = rng.integers(len(LAST_NAMES), size=count)
+	users = []
+	for i in range(count):
+		user_id = first_id + i
+		first, last = FIRST_NAMES[firsts[i]], LAST_NAMES[lasts[i]]
+		users.append((user_id, f"{first} {last}", f"{first}.{last}.{user_id}@example.com".lower(), password_hash, 0))
+	return {"users": users}
+
+
+def slot_weights(start: datetime, hours: int, now: datetime) -> list[np.ndarray]:
+	"""Log-weight of every hour in the period for each schedule template (-inf when closed)"""
+	stamps = np.arange(hours)
+	hour_of_day = (start.hour + stamps) % 24
+	weekday = (start.weekday() + (start.hour + stamps) // 24) % 7
+	# Demand grows over the period; bookings thin out the further ahead they are
+	weights = HOUR_PROFILE[hour_of_day] * WEEKDAY_PROFILE[weekday] * np.linspace(0.6, 1.0, hours)
+	ahead = (stamps - (now - start).total_seconds() / 3600) / 24
+	weights = np.where(ahead > 0, weights * np.exp(-np.clip(ahead, 0, None) / 4), weights)
+	result = []
+	for _, _, days in SCHEDULES:
+		open_mask = np.zeros(hours, dtype=bool)
+		for day, (open_time, close_time) in days.items():
+			last = close_time.hour + (1 if close_time.minute == 59 else 0)
+			open_mask |= (weekday == day) & (hour_of_day >= open_time.hour) & (hour_of_day < last)
+		with np.errstate(divide="ignore"):
+			result.append(np.where(open_mask, np.log(weights), -np.inf))
+	return result
+
+
+def generate_bookings(spec: dict) -> dict:
+	first_port, counts, first_id = spec["first_port"], spec["counts"], spec["first_id"]
+	start, hours, now = spec["start"], spec["hours"], spec["now"]
+	rng = np.random.default_rng([spec["seed"], first_port, 3])
+	weights = slot_weights(start, hours, now)
+	schedule_index = port_schedule_indexes(spec)
+	# Long-tailed user activity: user rank r books in proportion to r^-0.8
+	user_cdf = np.cumsum(np.arange(1, spec["users_count"] + 1) ** -0.8)
+	user_cdf /= user_cdf[-1]
+	now_hour = (now - start).total_seconds() / 3600
+	status_names = PAST_STATUSES[0] + FUTURE_STATUSES[0]
+	past_cdf = np.cumsum(PAST_STATUSES[1])[:-1]
+	future_cdf = np.cumsum(FUTURE_STATUSES[1])[:-1]
+
+	port_ids, slot_parts, user_parts, lead_parts, draw_parts = [], [], [], [], []
+	for offset, count in enumerate(counts):
+		port_id = first_port + offset
+		log_weights = weights[schedule_index[port_id - spec["ports_first_id"]]]
+		count = min(int(count), int(np.isfinite(log_weights).sum()))
+		if count == 0:
+			continue
+		# Weighted sampling without replacement (Efraimidis-Spirakis): top-k of log w + Gumbel noise
+		keys = log_weights + rng.gumbel(size=hours)
+		slot_parts.append(np.sort(np.argpartition(-keys, count - 1)[:count]))
+		port_ids.append(np.full(count, port_id))
+		user_parts.append(spec["users_first_id"] + np.searchsorted(user_cdf, rng.random(count)))
+		lead_parts.append(rng.exponential(48 * 60, size=count).astype(np.int64) + 15)
+		draw_parts.append(rng.random(count))
+	if not slot_parts:
+		return {"bookings": []}
+
+	slots = np.concatenate(slot_parts)
+	draws = np.concatenate(draw_parts)
+	ids = np.arange(first_id, first_id + len(slots))
+	statuses = np.where(
+		slots < now_hour,
+		np.searchsorted(past_cdf, draws, side="right"),
+		len(PAST_STATUSES[0]) + np.searchsorted(future_cdf, draws, side="right"),
+	)
+	paid = np.isin(statuses, [status_names.index("paid"), status_names.index("refunded"), len(PAST_STATUSES[0])])
+	starts = np.datetime64(start, "m") + slots.astype("timedelta64[h]")
+	created = np.minimum(starts - np.concatenate(lead_parts).astype("timedelta64[m]"), np.datetime64(now, "m"))
+	bookings = list(zip(
+		ids.tolist(),
+		np.concatenate(user_parts).tolist(),
+		np.concatenate(port_ids).tolist(),
+		_timestamps(starts),
+		_timestamps(starts + np.timedelta64(1, "h")),
+		[5.0] * len(ids),
+		np.array(status_names, dtype=object)[statuses].tolist(),
+		np.where(paid, np.array(PAID_METHODS, dtype=object)[ids % 2], None).tolist(),
+		[f"pay_{booking_id}" if is_paid else None for booking_id, is_paid in zip(ids.tolist(), paid.tolist())],
+		_timestamps(created),
+	))
+	return {"bookings": bookings}
+
+
+def _timestamps(values: np.ndarray) -> list[str]:
+	"""datetime64 values as 'YYYY-MM-DD HH:MM:SS', which MySQL and SQLAlchemy's SQLite DateTime both read"""
+	return np.char.replace(np.datetime_as_string(values, unit="s"), "T", " ").tolist()
+
+
+def produce(spec: dict) -> tuple[str, dict]:
+	"""Generate one chunk; with a csv_dir the rows are written to files instead of returned"""
+	generator = {"ports": generate_ports, "users": generate_users, "bookings": generate_bookings}[spec["kind"]]
+	tables = generator(spec)
+	if spec.get("csv_dir"):
+		files = {}
+		for table, rows in tables.items():
+			fd, path = tempfile.mkstemp(prefix=f"{table}-", suffix=".csv", dir=spec["csv_dir"])
+			with os.fdopen(fd, "w", newline="") as f:
+				writer = csv.writer(f, lineterminator="\n")
+				for row in rows:
+					writer.writerow(["\\N" if value is None else value for value in row])
+			files[table] = (path, len(rows))
+		return spec["kind"], files
+	return spec["kind"], tables
+
+
+# ========== CONSUMER (parent process) ==========
+
+def plan_bookings(total: int, ports_first_id: int, ports_count: int, seed: int) -> np.ndarray:
+	"""Bookings per port: long-tailed popularity, so a few ports carry a large share"""
+	rng = np.random.default_rng([seed, 4])
+	popularity = rng.permutation(np.arange(1, ports_count + 1) ** -0.6)
+	return rng.multinomial(total, popularity / popularity.sum())
+
+
+def booking_specs(counts: np.ndarray, base: dict, first_id: int) -> list[dict]:
+	specs = []
+	offset = 0
+	while offset < len(counts):
+		end = offset
+		rows = 0
+		while end < len(counts) and (rows == 0 or rows + counts[end] <= BOOKINGS_PER_CHUNK):
+			rows += int(counts[end])
+			end += 1
+		specs.append({**base, "kind": "bookings", "first_port": base["ports_first_id"] + offset, "counts": counts[offset:end], "first_id": first_id})
+		first_id += rows
+		offset = end
+	return specs
+
+
+def insert_statement(table: str, paramstyle: str) -> str:
+	placeholder = "?" if paramstyle == "qmark" else "%s"
+	columns = COLUMNS[table]
+	return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})"
+
+
+def write_rows(conn, table: str, rows: list) -> None:
+	"""One executemany per chunk; PyMySQL folds it into multi-row INSERTs"""
+	conn.exec_driver_sql(insert_statement(table, conn.dialect.paramstyle), rows)
+
+
+def load_file(conn, table: str, path: str) -> None:
+	columns = ", ".join(COLUMNS[table])
+	conn.exec_driver_sql(
+		f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {table} "
+		f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\n' ({columns})"
+	)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Generate a synthetic load-testing dataset")
+	parser.add_argument("--ports", type=int, default=50000)
+	parser.add_argument("--users", type=int, default=1000000)
+	parser.add_argument("--bookings", type=int, default=20000000)
+	parser.add_argument("--days-back", type=int, default=365, help="history length before today")
+	parser.add_argument("--days-ahead", type=int, default=14, help="how far ahead future bookings go")
+	parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--password", default="loadtest123", help="password of every generated user")
+	parser.add_argument("--load-data", action="store_true", help="MySQL: bulk load through CSV files and LOAD DATA LOCAL INFILE")
+	parser.add_argument("--skip-reconcile", action="store_true", help="do not rebuild port_popularity afterwards")
+	args = parser.parse_args()
+
+	from sqlalchemy import create_engine, func
+	from werkzeug.security import generate_password_hash
+	from .app import create_app
+	from .extensions import db
+	from .models import Booking, EVPort, User
+	from . import popularity
+
+	app = create_app()
+	# Every bulk INSERT would otherwise show up in the slow-query log
+	logging.getLogger("backend.slow_queries").setLevel(logging.ERROR)
+	with app.app_context():
+		db.create_all()
+		ports_first_id = (db.session.query(func.max(EVPort.id)).scalar() or 0) + 1
+		users_first_id = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+		bookings_first_id = (db.session.query(func.max(Booking.id)).scalar() or 0) + 1
+		db.session.remove()
+		engine = db.engine
+		dialect = engine.dialect.name
+		if args.load_data:
+			if dialect != "mysql":
+				parser.error("--load-data needs a MySQL database")
+			engine = create_engine(engine.url, connect_args={"local_infile": True})
+
+		now = datetime.now().replace(minute=0, second=0, microsecond=0)
+		start = now.replace(hour=0) - timedelta(days=args.days_back)
+		base = {
+			"seed": args.seed,
+			"ports_first_id": ports_first_id,
+			"ports_total": args.ports,
+			"users_first_id": users_first_id,
+			"users_count": args.users,
+			"start": start,
+			"hours": (args.days_back + args.days_ahead) * 24,
+			"now": now,
+		}
+		specs = [
+			{**base, "kind": "ports", "first_id": ports_first_id + offset, "count": min(PORTS_PER_CHUNK, args.ports - offset)}
+			for offset in range(0, args.ports, PORTS_PER_CHUNK)
+		]
+		password_hash = generate_password_hash(args.password)
+		specs += [
+			{**base, "kind": "users", "first_id": users_first_id + offset, "count": min(USERS_PER_CHUNK, args.users - offset), "password_hash": password_hash}
+			for offset in range(0, args.users, USERS_PER_CHUNK)
+		]
+		if args.bookings and args.ports and args.users:
+			counts = plan_bookings(args.bookings, ports_first_id, args.ports, args.seed)
+			specs += booking_specs(counts, base, bookings_first_id)
+
+		csv_dir = tempfile.mkdtemp(prefix="ev-dataset-") if args.load_data else None
+		for spec in specs:
+			spec["csv_dir"] = csv_dir
+		print(f"Generating {args.ports} ports, {args.users} users and up to {args.bookings} bookings "
+			f"in {len(specs)} chunks on {args.workers} worker(s)")
+
+		started = time.perf_counter()
+		written = {table: 0 for table in COLUMNS}
+		try:
+			with engine.connect() as conn, multiprocessing.Pool(args.workers) as pool:
+				if dialect == "mysql":
+					conn.exec_driver_sql("SET foreign_key_checks = 0")
+					conn.exec_driver_sql("SET unique_checks = 0")
+				elif dialect == "sqlite":
+					conn.exec_driver_sql("PRAGMA synchronous = OFF")
+				conn.commit()
+				for kind, chunk in pool.imap_unordered(produce, specs):
+					with conn.begin():
+						for table, rows in chunk.items():
+							if csv_dir:
+								path, count = rows
+								load_file(conn, table, path)
+								os.remove(path)
+							else:
+								count = len(rows)
+								write_rows(conn, table, rows)
+							written[table] += count
+					elapsed = time.perf_counter() - started
+					print(f"  {kind:<9} {', '.join(f'{table} {count}' for table, count in written.items())} ({elapsed:.1f}s)")
+				if dialect == "mysql":
+					conn.exec_driver_sql("SET unique_checks = 1")
+					conn.exec_driver_sql("SET foreign_key_checks = 1")
+		finally:
+			if csv_dir:
+				shutil.rmtree(csv_dir, ignore_errors=True)
+
+		elapsed = time.perf_counter() - started
+		total = sum(written.values())
+		print(f"[OK] Wrote {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+		if not args.skip_reconcile and written["bookings"]:
+			print(f"Reconciled port popularity counters ({popularity.reconcile()} rows fixed)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,28 @@
+"""Names and URLs of uploaded port images and their resized variants.
+
+Pure string logic shared by the models (imageVariants in EVPort.to_dict)
+and backend/images.py, which stores the files and renders the variants.
+Kept free of Pillow so serializing a port never loads it.
+"""
+import re
+
+
+VARIANTS = {"thumb": 160, "small": 480, "medium": 1024}
+VARIANT_FORMATS = {"webp": ("WEBP", {"quality": 80, "method": 4}), "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True})}
+RESIZABLE_EXTENSIONS = {"png", "jpg", "jpeg", "webp"}
+
+ORIGINAL_NAME = re.compile(r"^([0-9a-f]{64})\.([a-z]+)$")
+VARIANT_NAME = re.compile(r"^([0-9a-f]{64})\.(" + "|".join(VARIANTS) + r")\.(" + "|".join(VARIANT_FORMATS) + r")$")
+ORIGINAL_URL = re.compile(r"^/api/uploads/([0-9a-f]{64})\.(" + "|".join(RESIZABLE_EXTENSIONS) + r")$")
+
+
+def variant_urls(image_url: str | None) -> dict | None:
+	"""Variant URLs for a content-addressed raster upload, else None"""
+	match = ORIGINAL_URL.match(image_url or "")
+	if not match:
+		return None
+	digest = match.group(1)
+	return {
+		name: {fmt: f"/api/uploads/{digest}.{name}.{fmt}" for fmt in VARIANT_FORMATS}
+		for name in VARIANTS
+	}
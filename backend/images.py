@@ -0,0 +1,189 @@
+"""Content-addressed storage and resized variants for uploaded port images.
+
+Uploads are stored as <sha256>.<ext>, so identical files are kept once.
+Raster images also get downscaled WebP and JPEG variants
+(<sha256>.<variant>.<webp|jpg>) that a background thread pool renders
+after the upload request has returned. Until a variant exists, the
+uploads route serves the original in its place.
+
+Content-addressed files never change, so they are served with a one-year
+immutable Cache-Control; everything else revalidates through ETag and
+Last-Modified. With UPLOADS_ACCEL_MODE=nginx (X-Accel-Redirect) or
+sendfile (X-Sendfile) the front proxy pushes the bytes instead of the
+Python worker.
+
+Pillow is imported only where variants are rendered; the file names and
+URLs live in backend/image_urls.py.
+
+Run `python -m backend.images` once to move legacy uuid-named uploads to
+content addresses (repointing ev_ports.image_url) and render their variants.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import abort, current_app, make_response, send_from_directory
+from werkzeug.security import safe_join
+from .image_urls import ORIGINAL_NAME, RESIZABLE_EXTENSIONS, VARIANT_FORMATS, VARIANT_NAME, VARIANTS
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+LEGACY_MAX_AGE = 3600
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def store_upload(stream, upload_folder: str, ext: str) -> tuple[str, bool]:
+	"""Hash and store an upload; returns (filename, whether it was new)"""
+	digest = hashlib.sha256()
+	fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix=".part")
+	try:
+		with os.fdopen(fd, "wb") as out:
+			for chunk in iter(lambda: stream.read(64 * 1024), b""):
+				digest.update(chunk)
+				out.write(chunk)
+		filename = f"{digest.hexdigest()}.{ext}"
+		target = os.path.join(upload_folder, filename)
+		if os.path.exists(target):
+			return filename, False
+		os.replace(tmp_path, target)
+		return filename, True
+	finally:
+		if os.path.exists(tmp_path):
+			os.remove(tmp_path)
+
+
+def render_variants(upload_folder: str, filename: str) -> list[str]:
+	"""Write every missing variant of an original; returns the files created"""
+	from PIL import Image, ImageOps
+	match = ORIGINAL_NAME.match(filename)
+	if not match or match.group(2) not in RESIZABLE_EXTENSIONS:
+		return []
+	digest = match.group(1)
+	created = []
+	with Image.open(os.path.join(upload_folder, filename)) as source:
+		image = ImageOps.exif_transpose(source)
+		if image.mode in ("RGBA", "LA", "P"):
+			image = image.convert("RGBA")
+			flattened = Image.new("RGB", image.size, (255, 255, 255))
+			flattened.paste(image, mask=image.getchannel("A"))
+		else:
+			flattened = image.convert("RGB")
+		for name, size in VARIANTS.items():
+			resized = None
+			for fmt, (pil_format, options) in VARIANT_FORMATS.items():
+				target = os.path.join(upload_folder, f"{digest}.{name}.{fmt}")
+				if os.path.exists(target):
+					continue
+				if resized is None:
+					resized = flattened.copy()
+					resized.thumbnail((size, size), Image.Resampling.LANCZOS)  # never upscales
+				fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix=".part")
+				try:
+					with os.fdopen(fd, "wb") as out:
+						resized.save(out, pil_format, **options)
+					os.replace(tmp_path, target)
+				finally:
+					if os.path.exists(tmp_path):
+						os.remove(tmp_path)
+				created.append(os.path.basename(target))
+	return created
+
+
+def _log_failure(future) -> None:
+	if future.exception() is not None:
+		import traceback
+		traceback.print_exception(future.exception())
+
+
+def schedule_variants(upload_folder: str, filename: str, workers: int = 2) -> None:
+	"""Render variants on the background pool so the upload request returns immediately"""
+	global _executor
+	with _executor_lock:
+		if _executor is None:
+			_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-variants")
+	_executor.submit(render_variants, upload_folder, filename).add_done_callback(_log_failure)
+
+
+def resolve_upload(upload_folder: str, filename: str) -> str:
+	"""Name of the file to serve: a missing variant falls back to its original"""
+	match = VARIANT_NAME.match(filename)
+	if not match or os.path.exists(os.path.join(upload_folder, filename)):
+		return filename
+	for ext in RESIZABLE_EXTENSIONS:
+		original = f"{match.group(1)}.{ext}"
+		if os.path.exists(os.path.join(upload_folder, original)):
+			return original
+	return filename
+
+
+def send_upload(upload_folder: str, filename: str):
+	"""Response for /api/uploads/<filename> with caching headers for its kind of name"""
+	served = resolve_upload(upload_folder, filename)
+	path = safe_join(upload_folder, served)
+	if path is None or not os.path.isfile(path):
+		abort(404)
+
+	if served != filename:
+		# Stand-in for a variant that is still rendering: must not be cached for long
+		max_age, immutable = 0, False
+	elif ORIGINAL_NAME.match(filename) or VARIANT_NAME.match(filename):
+		max_age, immutable = IMMUTABLE_MAX_AGE, True
+	else:
+		max_age, immutable = LEGACY_MAX_AGE, False
+
+	if current_app.config.get("UPLOADS_ACCEL_MODE") == "nginx":
+		# nginx serves the file from an internal location, including ranges and 304s
+		response = make_response("")
+		response.headers["X-Accel-Redirect"] = current_app.config["UPLOADS_ACCEL_PREFIX"].rstrip("/") + "/" + served
+		response.mimetype = mimetypes.guess_type(served)[0] or "application/octet-stream"
+		response.cache_control.max_age = max_age
+	else:
+		# conditional=True answers If-None-Match / If-Modified-Since and Range requests;
+		# with USE_X_SENDFILE only the headers are built here
+		response = send_from_directory(upload_folder, served, conditional=True, etag=True, max_age=max_age)
+
+	response.cache_control.public = True
+	if immutable:
+		response.cache_control.immutable = True
+	elif max_age == 0:
+		response.cache_control.must_revalidate = True
+	return response
+
+
+def migrate_legacy_uploads(upload_folder: str) -> tuple[int, int]:
+	"""Rename uuid-named uploads to content addresses and repoint ports; returns (moved, deduplicated)"""
+	from .extensions import db
+	from .models import EVPort
+
+	moved, deduplicated = 0, 0
+	for filename in sorted(os.listdir(upload_folder)):
+		if ORIGINAL_NAME.match(filename) or VARIANT_NAME.match(filename) or "." not in filename:
+			continue
+		ext = filename.rsplit(".", 1)[1].lower()
+		with open(os.path.join(upload_folder, filename), "rb") as source:
+			new_name, created = store_upload(source, upload_folder, ext)
+		os.remove(os.path.join(upload_folder, filename))
+		EVPort.query.filter_by(image_url=f"/api/uploads/{filename}").update(
+			{EVPort.image_url: f"/api/uploads/{new_name}"}, synchronize_session=False
+		)
+		if created:
+			moved += 1
+		else:
+			deduplicated += 1
+	db.session.commit()
+	return moved, deduplicated
+
+
+if __name__ == "__main__":
+	from .app import create_app
+
+	app = create_app()
+	with app.app_context():
+		folder = os.path.join(app.instance_path, "uploads")
+		moved, deduplicated = migrate_legacy_uploads(folder)
+		print(f"Moved {moved} uploads to content addresses, removed {deduplicated} duplicates")
+		rendered = sum(len(render_variants(folder, name)) for name in sorted(os.listdir(folder)))
+		print(f"Rendered {rendered} image variants")
@@ -0,0 +1,180 @@
+"""tracemalloc snapshots, top allocation sites and diffs for the live worker.
+
+Tracing is off until an admin starts it (it slows allocation-heavy code by
+roughly 2x). While on, request hooks record how much traced memory each route
+leaves behind; with concurrent requests the attribution is approximate, but a
+route that keeps growing across snapshots is the leak to look at.
+"""
+import os
+import threading
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import Flask, g, request
+
+
+# Snapshots kept per process; the oldest is dropped first
+MAX_SNAPSHOTS = 10
+GROUP_BY = ("lineno", "filename", "traceback")
+
+_lock = threading.Lock()
+_snapshots = OrderedDict()  # id -> {"snapshot", "takenAt", "routes"}
+_next_id = 1
+# route -> {"requests": n, "retainedBytes": sum, "maxRetainedBytes": max}; traced memory
+# still held after each request, not bytes allocated while it ran
+_routes = {}
+
+_FILTERS = (
+	tracemalloc.Filter(False, tracemalloc.__file__),
+	tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+	tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+	tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def status() -> dict:
+	current, peak = tracemalloc.get_traced_memory()
+	with _lock:
+		snapshots = [{"id": sid, "takenAt": entry["takenAt"], "tracedBytes": entry["tracedBytes"]} for sid, entry in _snapshots.items()]
+	return {
+		"pid": os.getpid(),
+		"tracing": tracemalloc.is_tracing(),
+		"frames": tracemalloc.get_traceback_limit(),
+		"tracedBytes": current,
+		"peakBytes": peak,
+		"overheadBytes": tracemalloc.get_tracemalloc_memory(),
+		"snapshots": snapshots,
+		"routes": route_stats(),
+	}
+
+
+def start(frames: int = 1) -> None:
+	"""Start tracing; a no-op if it already runs with the same traceback depth"""
+	if tracemalloc.is_tracing():
+		if tracemalloc.get_traceback_limit() != frames:
+			raise RuntimeError(
+				f"tracemalloc is already running with frames={tracemalloc.get_traceback_limit()}; stop it first"
+			)
+		return
+	with _lock:
+		_routes.clear()
+	tracemalloc.start(frames)
+
+
+def stop() -> None:
+	"""Stop tracing and drop every snapshot (they pin the traces in memory)"""
+	tracemalloc.stop()
+	with _lock:
+		_snapshots.clear()
+
+
+def take_snapshot() -> dict:
+	global _next_id
+	if not tracemalloc.is_tracing():
+		raise RuntimeError("tracemalloc is not running; start it first")
+	snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+	entry = {
+		"snapshot": snapshot,
+		"takenAt": datetime.utcnow().isoformat() + "Z",
+		"tracedBytes": tracemalloc.get_traced_memory()[0],
+		"routes": route_stats(),
+	}
+	with _lock:
+		sid = _next_id
+		_next_id += 1
+		_snapshots[sid] = entry
+		while len(_snapshots) > MAX_SNAPSHOTS:
+			_snapshots.popitem(last=False)
+	return {"id": sid, "takenAt": entry["takenAt"], "tracedBytes": entry["tracedBytes"]}
+
+
+def _get(sid: int) -> dict:
+	with _lock:
+		entry = _snapshots.get(sid)
+	if entry is None:
+		raise KeyError(f"Snapshot {sid} not found")
+	return entry
+
+
+def _site(traceback, group_by: str):
+	if group_by == "traceback":
+		return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+	frame = traceback[0]
+	return frame.filename if group_by == "filename" else f"{frame.filename}:{frame.lineno}"
+
+
+def top(sid: int, group_by: str = "lineno", limit: int = 25) -> dict:
+	"""Largest allocation sites still alive in snapshot `sid`"""
+	entry = _get(sid)
+	stats = entry["snapshot"].statistics(group_by)
+	return {
+		"id": sid,
+		"takenAt": entry["takenAt"],
+		"groupBy": group_by,
+		"totalBytes": sum(stat.size for stat in stats),
+		"sites": [
+			{"site": _site(stat.traceback, group_by), "bytes": stat.size, "blocks": stat.count}
+			for stat in stats[:limit]
+		],
+		"routes": entry["routes"],
+	}
+
+
+def diff(from_id: int, to_id: int, group_by: str = "lineno", limit: int = 25) -> dict:
+	"""Allocation sites that grew most between two snapshots, plus per-route growth"""
+	before, after = _get(from_id), _get(to_id)
+	stats = after["snapshot"].compare_to(before["snapshot"], group_by)
+	routes = {}
+	for route, counts in after["routes"].items():
+		previous = before["routes"].get(route, {"requests": 0, "retainedBytes": 0})
+		routes[route] = {
+			"requests": counts["requests"] - previous["requests"],
+			"retainedBytes": counts["retainedBytes"] - previous["retainedBytes"],
+		}
+	return {
+		"from": from_id,
+		"to": to_id,
+		"groupBy": group_by,
+		"totalDiffBytes": sum(stat.size_diff for stat in stats),
+		"sites": [
+			{
+				"site": _site(stat.traceback, group_by),
+				"bytes": stat.size,
+				"diffBytes": stat.size_diff,
+				"blocks": stat.count,
+				"diffBlocks": stat.count_diff,
+			}
+			for stat in stats[:limit]
+		],
+		"routes": dict(sorted(routes.items(), key=lambda item: -item[1]["retainedBytes"])),
+	}
+
+
+def route_stats() -> dict:
+	with _lock:
+		return {route: dict(counts) for route, counts in sorted(_routes.items(), key=lambda item: -item[1]["retainedBytes"])}
+
+
+def _before_request():
+	if tracemalloc.is_tracing():
+		g.memory_before = tracemalloc.get_traced_memory()[0]
+
+
+def _teardown_request(exc):
+	before = g.pop("memory_before", None)
+	if before is None or not tracemalloc.is_tracing():
+		return
+	retained = tracemalloc.get_traced_memory()[0] - before
+	rule = request.url_rule
+	route = f"{request.method} {rule.rule if rule is not None else 'unmatched'}"
+	with _lock:
+		counts = _routes.setdefault(route, {"requests": 0, "retainedBytes": 0, "maxRetainedBytes": 0})
+		counts["requests"] += 1
+		counts["retainedBytes"] += retained
+		counts["maxRetainedBytes"] = max(counts["maxRetainedBytes"], retained)
+
+
+def init_app(app: Flask) -> None:
+	app.before_request(_before_request)
+	app.teardown_request(_teardown_request)
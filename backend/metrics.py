@@ -0,0 +1,204 @@
+"""Per-route request metrics in Prometheus text format (GET /api/metrics).
+
+Every request thread aggregates into its own shard, so the hot path takes no
+lock; a scrape sums the shards. Shards of finished threads (the dev server
+starts one per request) are folded into a retired total when new threads
+register. Counters are per worker process: scrape each worker, or sum them.
+"""
+import threading
+import time
+
+from flask import Flask, Response, current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import compression
+
+
+# Latency histogram upper bounds in seconds (+Inf is implied)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Registered shards before dead threads are folded into the retired total
+FOLD_THRESHOLD = 64
+
+
+class Shard:
+	"""Counters written only by the thread that owns them"""
+
+	def __init__(self):
+		self.requests = {}    # (method, route, status) -> count
+		self.latency = {}     # (method, route) -> [bucket counts..., sum]
+		self.db_seconds = {}  # (method, route) -> seconds spent in SQL
+		self.started = {}     # (method, route) -> requests started
+		self.finished = {}    # (method, route) -> requests finished
+
+	def merge_into(self, total: "Shard") -> None:
+		for name in ("requests", "db_seconds", "started", "finished"):
+			target = getattr(total, name)
+			for key, value in list(getattr(self, name).items()):
+				target[key] = target.get(key, 0) + value
+		for key, values in list(self.latency.items()):
+			target = total.latency.setdefault(key, [0] * (len(BUCKETS) + 1) + [0.0])
+			for i, value in enumerate(list(values)):
+				target[i] += value
+
+
+_local = threading.local()
+_registry_lock = threading.Lock()
+_shards = []  # (thread, shard)
+_retired = Shard()
+
+
+def _shard() -> Shard:
+	shard = getattr(_local, "shard", None)
+	if shard is None:
+		shard = _local.shard = Shard()
+		with _registry_lock:
+			if len(_shards) >= FOLD_THRESHOLD:
+				_fold_dead()
+			_shards.append((threading.current_thread(), shard))
+	return shard
+
+
+def _fold_dead() -> None:
+	"""Merge shards of finished threads into the retired total (registry lock held)"""
+	alive = []
+	for thread, shard in _shards:
+		if thread.is_alive():
+			alive.append((thread, shard))
+		else:
+			shard.merge_into(_retired)
+	_shards[:] = alive
+
+
+def _totals() -> Shard:
+	total = Shard()
+	with _registry_lock:
+		_fold_dead()
+		_retired.merge_into(total)
+		shards = [shard for _, shard in _shards]
+	for shard in shards:
+		shard.merge_into(total)
+	return total
+
+
+def _route_key() -> tuple:
+	rule = request.url_rule
+	return request.method, rule.rule if rule is not None else "unmatched"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	if getattr(_local, "db_seconds", None) is not None:
+		_local.statement_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	started = getattr(_local, "statement_started", None)
+	if started is not None and getattr(_local, "db_seconds", None) is not None:
+		_local.db_seconds += time.perf_counter() - started
+		_local.statement_started = None
+
+
+def _before_request():
+	key = _route_key()
+	shard = _shard()
+	shard.started[key] = shard.started.get(key, 0) + 1
+	g.metrics_key = key
+	g.metrics_started = time.perf_counter()
+	_local.db_seconds = 0.0
+
+
+def _after_request(response):
+	key = g.pop("metrics_key", None)
+	if key is None:
+		return response
+	elapsed = time.perf_counter() - g.pop("metrics_started")
+	shard = _shard()
+	status_key = (*key, str(response.status_code))
+	shard.requests[status_key] = shard.requests.get(status_key, 0) + 1
+	histogram = shard.latency.get(key)
+	if histogram is None:
+		histogram = shard.latency[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+	for i, bound in enumerate(BUCKETS):
+		if elapsed <= bound:
+			histogram[i] += 1
+			break
+	else:
+		histogram[len(BUCKETS)] += 1
+	histogram[-1] += elapsed
+	shard.db_seconds[key] = shard.db_seconds.get(key, 0.0) + (_local.db_seconds or 0.0)
+	shard.finished[key] = shard.finished.get(key, 0) + 1
+	_local.db_seconds = None
+	return response
+
+
+def _teardown_request(exc):
+	# A request that never reached after_request still leaves the in-flight gauge
+	key = g.pop("metrics_key", None)
+	if key is not None:
+		shard = _shard()
+		shard.finished[key] = shard.finished.get(key, 0) + 1
+	_local.db_seconds = None
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(method: str, route: str, **extra) -> str:
+	pairs = {"method": method, "route": route, **extra}
+	return ",".join(f'{name}="{_escape(value)}"' for name, value in pairs.items())
+
+
+def render() -> str:
+	"""All metrics of this worker process in Prometheus text exposition format"""
+	total = _totals()
+	lines = [
+		"# HELP http_requests_total Requests by route and status code.",
+		"# TYPE http_requests_total counter",
+	]
+	for (method, route, status), count in sorted(total.requests.items()):
+		lines.append(f"http_requests_total{{{_labels(method, route, status=status)}}} {count}")
+
+	lines += [
+		"# HELP http_request_duration_seconds Time until the response headers were ready.",
+		"# TYPE http_request_duration_seconds histogram",
+	]
+	for (method, route), histogram in sorted(total.latency.items()):
+		cumulative = 0
+		for bound, count in zip((*(str(b) for b in BUCKETS), "+Inf"), histogram[:-1]):
+			cumulative += count
+			lines.append(f"http_request_duration_seconds_bucket{{{_labels(method, route, le=bound)}}} {cumulative}")
+		lines.append(f"http_request_duration_seconds_sum{{{_labels(method, route)}}} {histogram[-1]:.6f}")
+		lines.append(f"http_request_duration_seconds_count{{{_labels(method, route)}}} {cumulative}")
+
+	lines += [
+		"# HELP http_request_db_seconds_total Time spent executing SQL by route.",
+		"# TYPE http_request_db_seconds_total counter",
+	]
+	for (method, route), seconds in sorted(total.db_seconds.items()):
+		lines.append(f"http_request_db_seconds_total{{{_labels(method, route)}}} {seconds:.6f}")
+
+	lines += [
+		"# HELP http_requests_in_flight Requests currently being handled.",
+		"# TYPE http_requests_in_flight gauge",
+	]
+	for (method, route), started in sorted(total.started.items()):
+		lines.append(f"http_requests_in_flight{{{_labels(method, route)}}} {started - total.finished.get((method, route), 0)}")
+	lines += compression.render_metrics()
+	return "\n".join(lines) + "\n"
+
+
+def metrics_endpoint():
+	token = current_app.config.get("METRICS_TOKEN")
+	if token and request.headers.get("Authorization") != f"Bearer {token}":
+		return {"message": "Unauthorized"}, 401
+	return Response(render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app: Flask) -> None:
+	app.before_request(_before_request)
+	app.after_request(_after_request)
+	app.teardown_request(_teardown_request)
+	app.add_url_rule("/api/metrics", "metrics", metrics_endpoint, methods=["GET"])
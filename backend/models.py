@@ -1,12 +1,13 @@
 from datetime import time, datetime
 from sqlalchemy import UniqueConstraint
 from .extensions import db
+from .image_urls import variant_urls
 
 
 class User(db.Model):
 	__tablename__ = "users"
 	id = db.Column(db.Integer, primary_key=True)
-	full_name = db.Column(db.String(120))
+	full_name = db.Column(db.String(120), index=True)
 	email = db.Column(db.String(255), unique=True, nullable=False, index=True)
 	password_hash = db.Column(db.String(255), nullable=False)
 	is_admin = db.Column(db.Boolean, default=False, nullable=False)
@@ -33,6 +34,8 @@ class EVPort(db.Model):
 	schedules = db.relationship("EVPortSchedule", backref="port", lazy=True, cascade="all, delete-orphan")
 	bookings = db.relationship("Booking", backref="port", lazy=True, cascade="all, delete-orphan")
 	favorites = db.relationship("Favorite", backref="port", lazy=True, cascade="all, delete-orphan")
+	booking_conflicts = db.relationship("BookingConflict", backref="port", lazy=True, cascade="all, delete-orphan")
+	popularity = db.relationship("PortPopularity", backref="port", lazy=True, uselist=False, cascade="all, delete-orphan")
 
 	def to_dict(self, include_schedule: bool = False) -> dict:
 		data = {
@@ -45,6 +48,7 @@ class EVPort(db.Model):
 			"connectorType": self.connector_type,
 			"powerKw": self.power_kw,
 			"imageUrl": self.image_url,
+			"imageVariants": variant_urls(self.image_url),
 			"isActive": self.is_active,
 		}
 		if include_schedule:
@@ -108,6 +112,17 @@ class Booking(db.Model):
 		return result
 
 
+class BookingConflict(db.Model):
+	"""A booking request rejected with 409 because the slot was already taken"""
+	__tablename__ = "booking_conflicts"
+	id = db.Column(db.Integer, primary_key=True)
+	user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+	port_id = db.Column(db.Integer, db.ForeignKey("ev_ports.id"), nullable=False, index=True)
+	start_time = db.Column(db.DateTime, nullable=False)
+	end_time = db.Column(db.DateTime, nullable=False)
+	created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
 class Favorite(db.Model):
 	__tablename__ = "favorites"
 	id = db.Column(db.Integer, primary_key=True)
@@ -125,6 +140,22 @@ class Favorite(db.Model):
 		}
 
 
+class PortPopularity(db.Model):
+	"""Denormalized per-port counters, kept in step with favorites and bookings writes"""
+	__tablename__ = "port_popularity"
+	port_id = db.Column(db.Integer, db.ForeignKey("ev_ports.id"), primary_key=True)
+	favorites_count = db.Column(db.Integer, nullable=False, default=0)
+	bookings_count = db.Column(db.Integer, nullable=False, default=0)
+	updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+	def to_dict(self) -> dict:
+		return {
+			"portId": self.port_id,
+			"favoritesCount": self.favorites_count,
+			"bookingsCount": self.bookings_count,
+		}
+
+
 class SubscriptionPlan(db.Model):
 	__tablename__ = "subscription_plans"
 	id = db.Column(db.Integer, primary_key=True)
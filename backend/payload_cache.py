@@ -0,0 +1,102 @@
+"""Pre-encoded JSON bodies for hot, rarely-changing responses.
+
+The port catalog and the subscription plans are encoded once and served as
+bytes with an ETag until they change. Any ORM flush that touches the
+underlying models drops the entries after commit; bulk Core writes call
+record_change() so their groups are dropped after commit too. Other workers
+pick up changes within PAYLOAD_CACHE_TTL.
+"""
+import hashlib
+import threading
+import time
+
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import EVPort, EVPortSchedule, SubscriptionPlan
+
+
+# Cache group -> models whose changes make it stale
+GROUPS = {
+	"ports": (EVPort, EVPortSchedule),
+	"plans": (SubscriptionPlan,),
+}
+# Entries kept per group (e.g. one per city filter)
+MAX_ENTRIES = 256
+
+_lock = threading.Lock()
+_entries = {}  # (group, *variant) -> {"body", "etag", "expires"}
+# group -> invalidation count; a body built before an invalidation is served but not cached
+_generations = {}
+
+
+def get_or_build(key: tuple, build) -> dict:
+	"""Cached {"body": bytes, "etag": str} for key; build() returns the object to encode"""
+	now = time.monotonic()
+	with _lock:
+		entry = _entries.get(key)
+	if entry is not None and entry["expires"] > now:
+		return entry
+	with _lock:
+		generation = _generations.get(key[0], 0)
+	body = f"{current_app.json.dumps(build())}\n".encode()
+	entry = {
+		"body": body,
+		"etag": hashlib.sha1(body).hexdigest(),
+		"expires": now + current_app.config.get("PAYLOAD_CACHE_TTL", 60),
+	}
+	with _lock:
+		if _generations.get(key[0], 0) != generation:
+			return entry
+		group = [k for k in _entries if k[0] == key[0]]
+		if len(group) >= MAX_ENTRIES:
+			del _entries[min(group, key=lambda k: _entries[k]["expires"])]
+		_entries[key] = entry
+	return entry
+
+
+def respond(key: tuple, build):
+	"""JSON response from the cache, answering If-None-Match with 304"""
+	entry = get_or_build(key, build)
+	response = current_app.response_class(entry["body"], mimetype=current_app.json.mimetype)
+	response.set_etag(entry["etag"])
+	response.headers["Cache-Control"] = "no-cache"
+	# compression stores its gzip/br bodies here, so they live and expire with the entry
+	response.compression_cache = entry.setdefault("encoded", {})
+	return response.make_conditional(request)
+
+
+def invalidate(*groups: str) -> None:
+	with _lock:
+		for key in [k for k in _entries if k[0] in groups]:
+			del _entries[key]
+		for group in groups:
+			_generations[group] = _generations.get(group, 0) + 1
+
+
+def record_change(*groups: str) -> None:
+	"""Drop groups once the current transaction commits, for Core writes the flush hook cannot see"""
+	db.session.info.setdefault("payload_cache_stale", set()).update(groups)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context) -> None:
+	stale = session.info.setdefault("payload_cache_stale", set())
+	for instance in (*session.new, *session.dirty, *session.deleted):
+		for group, models in GROUPS.items():
+			if isinstance(instance, models):
+				stale.add(group)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session) -> None:
+	stale = session.info.pop("payload_cache_stale", None)
+	if stale:
+		invalidate(*stale)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session) -> None:
+	session.info.pop("payload_cache_stale", None)
@@ -0,0 +1,184 @@
+"""Per-port popularity counters (favorites and bookings).
+
+Write paths call record_favorites / record_bookings (or
+record_favorites_many for a batch of ports) inside their own transaction, so the counters commit or roll back together with the row
+that changed them. Reads go through an in-process snapshot of the table
+that is refreshed every POPULAR_PORTS_CACHE_TTL seconds, and top-N is
+taken from it with a heap. reconcile() rebuilds the table from COUNT
+queries and is run nightly via: python -m backend.popularity
+(backend/add_port_popularity_table.py creates the table on an existing database).
+"""
+import heapq
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, func, or_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from .extensions import db
+from .models import PortPopularity, Favorite, Booking, EVPort
+
+
+_lock = threading.Lock()
+_counters: dict[int, list[int]] = {}  # port_id -> [favorites, bookings]
+_loaded_at: float | None = None
+
+
+def _bump(port_ids, favorites: int = 0, bookings: int = 0) -> None:
+	# One multi-row upsert: two transactions creating the same port's row both succeed.
+	# Sorted ids make concurrent batches lock rows in the same order
+	port_ids = sorted(set(port_ids))
+	if not port_ids:
+		return
+	insert = mysql_insert if db.session.get_bind().dialect.name == "mysql" else sqlite_insert
+	now = datetime.utcnow()
+	statement = insert(PortPopularity).values([
+		{
+			"port_id": port_id,
+			"favorites_count": max(favorites, 0),
+			"bookings_count": max(bookings, 0),
+			"updated_at": now,
+		}
+		for port_id in port_ids
+	])
+	increments = {
+		"favorites_count": PortPopularity.favorites_count + favorites,
+		"bookings_count": PortPopularity.bookings_count + bookings,
+		"updated_at": now,
+	}
+	if insert is mysql_insert:
+		statement = statement.on_duplicate_key_update(increments)
+	else:
+		statement = statement.on_conflict_do_update(index_elements=[PortPopularity.port_id], set_=increments)
+	db.session.execute(statement)
+
+	# Applied to this worker's snapshot once the transaction commits
+	db.session.info.setdefault("popularity_deltas", []).extend(
+		(port_id, favorites, bookings) for port_id in port_ids
+	)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_deltas(session) -> None:
+	deltas = session.info.pop("popularity_deltas", None)
+	if not deltas:
+		return
+	# Other workers pick these up on their next TTL refresh
+	with _lock:
+		if _loaded_at is None:
+			return
+		for port_id, favorites, bookings in deltas:
+			counts = _counters.setdefault(port_id, [0, 0])
+			counts[0] = max(counts[0] + favorites, 0)
+			counts[1] = max(counts[1] + bookings, 0)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_deltas(session) -> None:
+	session.info.pop("popularity_deltas", None)
+
+
+def record_favorites(port_id: int, delta: int) -> None:
+	"""Adjust a port's favorite counter in the current transaction"""
+	_bump([port_id], favorites=delta)
+
+
+def record_favorites_many(port_ids, delta: int) -> None:
+	"""Adjust the favorite counters of several ports by the same delta in one statement"""
+	_bump(port_ids, favorites=delta)
+
+
+def record_bookings(port_id: int, delta: int) -> None:
+	"""Adjust a port's booking counter in the current transaction"""
+	_bump([port_id], bookings=delta)
+
+
+def invalidate() -> None:
+	"""Drop the in-memory snapshot so the next read reloads it"""
+	global _loaded_at
+	with _lock:
+		_counters.clear()
+		_loaded_at = None
+
+
+def _snapshot() -> dict[int, list[int]]:
+	global _loaded_at
+	ttl = current_app.config.get("POPULAR_PORTS_CACHE_TTL", 60)
+	with _lock:
+		if _loaded_at is not None and time.monotonic() - _loaded_at < ttl:
+			return _counters
+	rows = db.session.query(
+		PortPopularity.port_id,
+		PortPopularity.favorites_count,
+		PortPopularity.bookings_count,
+	).all()
+	with _lock:
+		_counters.clear()
+		_counters.update({port_id: [favs, books] for port_id, favs, books in rows})
+		_loaded_at = time.monotonic()
+		return _counters
+
+
+def top_ports(limit: int = 10, by: str = "total") -> list[tuple[int, int, int]]:
+	"""Return up to `limit` (port_id, favorites, bookings) tuples, most popular first"""
+	if by == "favorites":
+		key = lambda item: (item[1][0], item[1][1])
+	elif by == "bookings":
+		key = lambda item: (item[1][1], item[1][0])
+	else:
+		key = lambda item: (item[1][0] + item[1][1], item[1][1])
+	counters = _snapshot()
+	with _lock:
+		best = heapq.nlargest(
+			limit,
+			((port_id, counts) for port_id, counts in counters.items() if counts[0] or counts[1]),
+			key=key,
+		)
+	return [(port_id, counts[0], counts[1]) for port_id, counts in best]
+
+
+def reconcile() -> int:
+	"""Recompute every port's counters from favorites and bookings; returns rows fixed"""
+	favorites = dict(
+		db.session.query(Favorite.port_id, func.count(Favorite.id))
+		.group_by(Favorite.port_id)
+		.all()
+	)
+	bookings = dict(
+		db.session.query(Booking.port_id, func.count(Booking.id))
+		.filter(or_(Booking.payment_status.is_(None), Booking.payment_status != "refunded"))
+		.group_by(Booking.port_id)
+		.all()
+	)
+	stored = {row.port_id: row for row in PortPopularity.query.all()}
+
+	fixed = 0
+	for (port_id,) in db.session.query(EVPort.id):
+		favs = favorites.get(port_id, 0)
+		books = bookings.get(port_id, 0)
+		row = stored.pop(port_id, None)
+		if row is None:
+			db.session.add(PortPopularity(port_id=port_id, favorites_count=favs, bookings_count=books))
+			fixed += 1
+		elif row.favorites_count != favs or row.bookings_count != books:
+			row.favorites_count = favs
+			row.bookings_count = books
+			fixed += 1
+	# Rows left over belong to ports that no longer exist
+	for row in stored.values():
+		db.session.delete(row)
+		fixed += 1
+	db.session.commit()
+	invalidate()
+	return fixed
+
+
+if __name__ == "__main__":
+	from .app import create_app
+
+	app = create_app()
+	with app.app_context():
+		db.create_all()
+		print(f"Reconciled port popularity counters ({reconcile()} rows fixed)")
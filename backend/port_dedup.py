@@ -0,0 +1,186 @@
+"""Near-duplicate port detection with a spatial hash.
+
+Ports are bucketed into latitude/longitude cells one match radius tall, so
+each port is only compared with the ports in the neighbouring cells instead
+of with the whole catalog (more cells east and west away from the equator,
+where a degree of longitude is shorter). Candidates within the radius are
+then compared by normalized name similarity.
+
+Standalone usage (report, or merge each cluster into its lowest id):
+	python -m backend.port_dedup [--radius 100] [--similarity 0.8] [--merge]
+"""
+import math
+import re
+from difflib import SequenceMatcher
+from sqlalchemy import select
+from .extensions import db
+from .models import EVPort, Booking, BookingConflict, Favorite
+
+
+METERS_PER_DEGREE = 111_320.0
+DEFAULT_RADIUS_M = 100.0
+DEFAULT_SIMILARITY = 0.8
+# Cells are not widened past this latitude (a degree of longitude shrinks to nothing at the poles)
+MAX_LATITUDE = 89.0
+
+
+def normalize_name(name: str) -> str:
+	return " ".join(re.sub(r"[^\w\s]", " ", (name or "").lower()).split())
+
+
+def name_similarity(a: str, b: str) -> float:
+	if a == b:
+		return 1.0
+	return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+	"""Equirectangular distance at the pair's mean latitude; matches haversine to millimetres at match radii"""
+	x = (lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2)) * METERS_PER_DEGREE
+	y = (lat2 - lat1) * METERS_PER_DEGREE
+	return math.hypot(x, y)
+
+
+class SpatialHash:
+	"""Ports bucketed into radius-sized cells for neighbour-only comparisons"""
+
+	def __init__(self, radius_m: float = DEFAULT_RADIUS_M, min_similarity: float = DEFAULT_SIMILARITY):
+		self.radius_m = radius_m
+		self.min_similarity = min_similarity
+		# Degrees of latitude per cell; the same number of degrees of longitude is narrower
+		self.cell_deg = radius_m / METERS_PER_DEGREE
+		self.cells: dict[tuple[int, int], list[tuple]] = {}
+
+	def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+		return math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg)
+
+	def add(self, key, name: str, latitude: float, longitude: float) -> None:
+		self.cells.setdefault(self._cell(latitude, longitude), []).append((key, normalize_name(name), latitude, longitude))
+
+	def matches(self, name: str, latitude: float, longitude: float):
+		"""Yield (key, distance in m, similarity) for indexed ports that look like this one"""
+		row, col = self._cell(latitude, longitude)
+		# The radius spans 1/cos(latitude) cells of longitude; size the reach for the poleward neighbour row
+		poleward = min(abs(latitude) + 2 * self.cell_deg, MAX_LATITUDE)
+		reach = math.ceil(1 / math.cos(math.radians(poleward)))
+		normalized = normalize_name(name)
+		for d_row in (-1, 0, 1):
+			for d_col in range(-reach, reach + 1):
+				for key, other_name, other_lat, other_lon in self.cells.get((row + d_row, col + d_col), ()):
+					distance = distance_m(latitude, longitude, other_lat, other_lon)
+					if distance > self.radius_m:
+						continue
+					similarity = name_similarity(normalized, other_name)
+					if similarity >= self.min_similarity:
+						yield key, round(distance, 1), round(similarity, 3)
+
+	def best_match(self, name: str, latitude: float, longitude: float):
+		return max(self.matches(name, latitude, longitude), key=lambda m: (m[2], -m[1]), default=None)
+
+
+def load_port_index(radius_m: float = DEFAULT_RADIUS_M, min_similarity: float = DEFAULT_SIMILARITY) -> SpatialHash:
+	"""Index every existing port, keyed by its id"""
+	index = SpatialHash(radius_m, min_similarity)
+	rows = db.session.execute(
+		select(EVPort.id, EVPort.name, EVPort.latitude, EVPort.longitude).execution_options(yield_per=5000)
+	)
+	for port_id, name, latitude, longitude in rows:
+		index.add(port_id, name, latitude, longitude)
+	return index
+
+
+def find_duplicate_clusters(radius_m: float = DEFAULT_RADIUS_M, min_similarity: float = DEFAULT_SIMILARITY) -> list[list[int]]:
+	"""Group the catalog's near-duplicate ports; each cluster is sorted by id"""
+	index = SpatialHash(radius_m, min_similarity)
+	parent: dict[int, int] = {}
+
+	def find(port_id: int) -> int:
+		while parent[port_id] != port_id:
+			parent[port_id] = parent[parent[port_id]]
+			port_id = parent[port_id]
+		return port_id
+
+	rows = db.session.execute(
+		select(EVPort.id, EVPort.name, EVPort.latitude, EVPort.longitude)
+		.order_by(EVPort.id)
+		.execution_options(yield_per=5000)
+	)
+	# Each port is matched only against ports indexed before it, so every pair is seen once
+	for port_id, name, latitude, longitude in rows:
+		parent[port_id] = port_id
+		for other_id, _, _ in index.matches(name, latitude, longitude):
+			root, other_root = find(port_id), find(other_id)
+			if root != other_root:
+				parent[max(root, other_root)] = min(root, other_root)
+		index.add(port_id, name, latitude, longitude)
+
+	clusters: dict[int, list[int]] = {}
+	for port_id in parent:
+		clusters.setdefault(find(port_id), []).append(port_id)
+	return sorted((sorted(ids) for ids in clusters.values() if len(ids) > 1), key=lambda ids: ids[0])
+
+
+def merge_cluster(port_ids: list[int]) -> None:
+	"""Move bookings, conflicts and favorites onto the lowest id and delete the rest"""
+	keeper, duplicates = port_ids[0], port_ids[1:]
+	Booking.query.filter(Booking.port_id.in_(duplicates)).update(
+		{Booking.port_id: keeper}, synchronize_session=False
+	)
+	BookingConflict.query.filter(BookingConflict.port_id.in_(duplicates)).update(
+		{BookingConflict.port_id: keeper}, synchronize_session=False
+	)
+	# Keep one favorite per user so uq_user_port_favorite still holds after the move
+	favorites = db.session.query(Favorite.id, Favorite.user_id, Favorite.port_id).filter(
+		Favorite.port_id.in_(port_ids)
+	).all()
+	fans = {user_id for _, user_id, port_id in favorites if port_id == keeper}
+	move, drop = [], []
+	for favorite_id, user_id, port_id in favorites:
+		if port_id == keeper:
+			continue
+		if user_id in fans:
+			drop.append(favorite_id)
+		else:
+			fans.add(user_id)
+			move.append(favorite_id)
+	if drop:
+		Favorite.query.filter(Favorite.id.in_(drop)).delete(synchronize_session=False)
+	if move:
+		Favorite.query.filter(Favorite.id.in_(move)).update(
+			{Favorite.port_id: keeper}, synchronize_session=False
+		)
+	db.session.expire_all()
+	for port in EVPort.query.filter(EVPort.id.in_(duplicates)).all():
+		db.session.delete(port)
+
+
+if __name__ == "__main__":
+	import argparse
+	import time
+	from .app import create_app
+	from . import popularity
+
+	parser = argparse.ArgumentParser(description="Find (and optionally merge) near-duplicate EV ports")
+	parser.add_argument("--radius", type=float, default=DEFAULT_RADIUS_M, help="match radius in metres")
+	parser.add_argument("--similarity", type=float, default=DEFAULT_SIMILARITY, help="minimum name similarity (0-1)")
+	parser.add_argument("--merge", action="store_true", help="merge each cluster into its lowest port id")
+	args = parser.parse_args()
+
+	app = create_app()
+	with app.app_context():
+		started = time.perf_counter()
+		clusters = find_duplicate_clusters(args.radius, args.similarity)
+		elapsed = time.perf_counter() - started
+		names = dict(db.session.query(EVPort.id, EVPort.name).filter(
+			EVPort.id.in_([port_id for ids in clusters for port_id in ids])
+		)) if clusters else {}
+		for ids in clusters:
+			print(" | ".join(f"#{port_id} {names.get(port_id)}" for port_id in ids))
+		print(f"Found {len(clusters)} duplicate clusters ({sum(len(ids) - 1 for ids in clusters)} extra ports) in {elapsed:.2f}s")
+
+		if args.merge and clusters:
+			for ids in clusters:
+				merge_cluster(ids)
+			db.session.commit()
+			popularity.reconcile()
+			print(f"Merged {len(clusters)} clusters")
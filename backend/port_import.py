@@ -0,0 +1,221 @@
+"""Bulk port import from CSV or GeoJSON.
+
+Rows are validated one at a time and written in chunks: one INSERT for the
+chunk's ports and one executemany INSERT for their schedules, all inside the
+caller's transaction. CSV is also parsed row by row from the stream; GeoJSON
+is loaded with json.load (no streaming JSON parser is in requirements), so
+the admin route caps its size at PORT_IMPORT_GEOJSON_MAX_BYTES.
+
+CSV columns: name, city, latitude, longitude, address, connectorType,
+powerKw, imageUrl, open, close, weekdays (e.g. "0-6" or "0,1,2,3,4").
+GeoJSON: Point features with the same keys as properties; a "schedules"
+property in the create_port format ([{weekday, open, close}]) is also
+accepted. Ports without schedule fields open 08:00-22:00 every day.
+"""
+import csv
+import io
+import json
+from datetime import time
+from sqlalchemy import insert, text
+from .extensions import db
+from .models import EVPort, EVPortSchedule
+
+
+CHUNK_SIZE = 500
+
+
+class RowError(ValueError):
+	pass
+
+
+def parse_hhmm(value: str) -> time:
+	hour, minute = map(int, value.split(":"))
+	return time(hour, minute)
+
+
+def _parse_weekdays(value: str) -> list[int]:
+	days = set()
+	for part in value.split(","):
+		part = part.strip()
+		if not part:
+			continue
+		if "-" in part:
+			first, last = map(int, part.split("-"))
+			days.update(range(first, last + 1))
+		else:
+			days.add(int(part))
+	if not days or min(days) < 0 or max(days) > 6:
+		raise RowError("weekdays must be between 0 (Mon) and 6 (Sun)")
+	return sorted(days)
+
+
+def _optional_float(value):
+	if value is None or value == "":
+		return None
+	return float(value)
+
+
+def validate_port(data: dict) -> tuple[dict, list[dict]]:
+	"""Turn one input record into (port values, schedule values) or raise RowError"""
+	name = str(data.get("name") or "").strip()
+	city = str(data.get("city") or "").strip()
+	if not name or not city:
+		raise RowError("name and city are required")
+	try:
+		latitude = float(data.get("latitude"))
+		longitude = float(data.get("longitude"))
+	except (TypeError, ValueError):
+		raise RowError("latitude and longitude must be numbers")
+	if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+		raise RowError("latitude/longitude out of range")
+	try:
+		power_kw = _optional_float(data.get("powerKw"))
+	except ValueError:
+		raise RowError("powerKw must be a number")
+
+	port = {
+		"name": name[:200],
+		"city": city[:120],
+		"address": str(data.get("address") or "").strip()[:255],
+		"latitude": latitude,
+		"longitude": longitude,
+		"connector_type": str(data.get("connectorType") or "").strip()[:80],
+		"power_kw": power_kw,
+		"image_url": str(data.get("imageUrl") or "").strip()[:500],
+		"is_active": True,
+	}
+
+	try:
+		if isinstance(data.get("schedules"), list):
+			schedules = [
+				{
+					"weekday": int(s["weekday"]),
+					"open_time": parse_hhmm(s.get("open", "08:00")),
+					"close_time": parse_hhmm(s.get("close", "22:00")),
+				}
+				for s in data["schedules"]
+			]
+		else:
+			weekdays = _parse_weekdays(str(data.get("weekdays") or "0-6"))
+			open_time = parse_hhmm(str(data.get("open") or "08:00"))
+			close_time = parse_hhmm(str(data.get("close") or "22:00"))
+			schedules = [{"weekday": d, "open_time": open_time, "close_time": close_time} for d in weekdays]
+	except RowError:
+		raise
+	except (KeyError, TypeError, ValueError) as e:
+		raise RowError(f"invalid schedule: {e}")
+	if any(not 0 <= s["weekday"] <= 6 or s["close_time"] <= s["open_time"] for s in schedules):
+		raise RowError("each schedule needs a weekday 0-6 and close after open")
+	if len({s["weekday"] for s in schedules}) != len(schedules):
+		raise RowError("duplicate weekday in schedules")
+	return port, schedules
+
+
+def iter_csv(stream):
+	"""Yield (row number, record) from a binary CSV stream without reading it all"""
+	reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+	for row_number, row in enumerate(reader, start=2):  # row 1 is the header
+		yield row_number, row
+
+
+def iter_geojson(stream):
+	"""Yield (feature index, record) from a GeoJSON FeatureCollection of Points.
+
+	The whole document is parsed into memory first; callers bound its size.
+	"""
+	collection = json.load(stream)
+	if not isinstance(collection, dict):
+		raise ValueError("top level must be a FeatureCollection object")
+	features = collection.get("features") or []
+	if not isinstance(features, list):
+		raise ValueError("features must be an array")
+	for index, feature in enumerate(features, start=1):
+		if not isinstance(feature, dict):
+			raise ValueError(f"feature {index} must be an object")
+		properties = feature.get("properties") or {}
+		geometry = feature.get("geometry") or {}
+		if not isinstance(properties, dict) or not isinstance(geometry, dict):
+			raise ValueError(f"feature {index} properties and geometry must be objects")
+		record = dict(properties)
+		coordinates = geometry.get("coordinates")
+		if geometry.get("type") == "Point" and isinstance(coordinates, list) and len(coordinates) >= 2:
+			record["longitude"], record["latitude"] = coordinates[:2]
+		yield index, record
+
+
+def _insert_ports(ports: list[dict]) -> list[int]:
+	if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+		result = db.session.execute(
+			insert(EVPort).returning(EVPort.id, sort_by_parameter_order=True),
+			ports,
+		)
+		return list(result.scalars())
+	# MySQL has no RETURNING: send one multi-row INSERT. LAST_INSERT_ID() is the
+	# first row's id, and InnoDB hands a simple insert consecutive ids
+	result = db.session.execute(insert(EVPort).values(ports))
+	step = db.session.execute(text("SELECT @@auto_increment_increment")).scalar()
+	return [result.lastrowid + i * step for i in range(len(ports))]
+
+
+def write_chunk(chunk: list[tuple[dict, list[dict]]]) -> list[int]:
+	"""Insert one chunk of validated ports and their schedules; returns the new port ids"""
+	port_ids = _insert_ports([port for port, _ in chunk])
+	schedules = [
+		{**schedule, "port_id": port_id}
+		for port_id, (_, port_schedules) in zip(port_ids, chunk)
+		for schedule in port_schedules
+	]
+	if schedules:
+		db.session.execute(insert(EVPortSchedule), schedules)
+	return port_ids
+
+
+def import_ports(records, max_errors: int = 1000, dedupe_index=None, skip_duplicates: bool = False) -> dict:
+	"""Validate and insert (row number, record) pairs; the caller commits.
+
+	With a port_dedup.SpatialHash as dedupe_index, each row is checked against
+	existing ports and earlier rows of the same file; matches are reported and,
+	with skip_duplicates, left out of the import.
+	"""
+	imported, invalid, skipped = 0, 0, 0
+	errors, duplicates = [], []
+	chunk = []
+	for row_number, record in records:
+		try:
+			port, schedules = validate_port(record)
+		except RowError as e:
+			invalid += 1
+			if len(errors) < max_errors:
+				errors.append({"row": row_number, "message": str(e)})
+			continue
+		if dedupe_index is not None:
+			match = dedupe_index.best_match(port["name"], port["latitude"], port["longitude"])
+			if match:
+				key, distance_m, similarity = match
+				if len(duplicates) < max_errors:
+					duplicates.append({
+						"row": row_number,
+						"name": port["name"],
+						# Integer keys are existing port ids, tuples are earlier rows of this file
+						"matchesPortId": key if isinstance(key, int) else None,
+						"matchesRow": key[1] if isinstance(key, tuple) else None,
+						"distanceM": distance_m,
+						"similarity": similarity,
+					})
+				if skip_duplicates:
+					skipped += 1
+					continue
+			dedupe_index.add(("row", row_number), port["name"], port["latitude"], port["longitude"])
+		chunk.append((port, schedules))
+		if len(chunk) >= CHUNK_SIZE:
+			imported += len(write_chunk(chunk))
+			chunk = []
+	if chunk:
+		imported += len(write_chunk(chunk))
+	return {
+		"imported": imported,
+		"invalid": invalid,
+		"skippedDuplicates": skipped,
+		"errors": errors,
+		"duplicates": duplicates,
+	}
@@ -0,0 +1,155 @@
+"""On-demand sampling profiler for the live worker (GET /api/admin/profile).
+
+A background thread reads sys._current_frames() at a fixed rate for a number
+of seconds. Each request thread is tagged with its route, so every sample is
+rooted at the route it was serving and the output answers "where does
+list_users spend its time" under real traffic. Results come back as collapsed
+stacks (flamegraph.pl, speedscope, inferno) or speedscope JSON.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Flask, request
+
+
+MAX_SECONDS = 60
+MAX_HZ = 1000
+MAX_DEPTH = 128
+
+# thread ident -> "METHOD /route" while that thread is handling a request
+_thread_routes = {}
+_busy = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+	pass
+
+
+def _frame_label(code, cache: dict) -> str:
+	label = cache.get(code)
+	if label is None:
+		name = getattr(code, "co_qualname", code.co_name)
+		label = cache[code] = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+	return label
+
+
+def sample(seconds: float, hz: int, include_idle: bool = False) -> tuple[Counter, int]:
+	"""Collect stacks for `seconds`; returns ({(root, frame, ...): count}, samples taken).
+
+	Runs the sampling loop on its own thread and waits for it; the waiting
+	thread itself is left out. Only one profile runs per process at a time
+	(ProfilerBusy otherwise).
+	"""
+	if not _busy.acquire(blocking=False):
+		raise ProfilerBusy("A profile is already running in this worker")
+	stacks = Counter()
+	ticks = [0]
+	caller = threading.get_ident()
+
+	def run():
+		me = threading.get_ident()
+		labels = {}
+		names = {}
+		interval = 1.0 / hz
+		deadline = time.perf_counter() + seconds
+		next_tick = time.perf_counter()
+		while next_tick < deadline:
+			frames = sys._current_frames()
+			routes = dict(_thread_routes)
+			for ident, frame in frames.items():
+				if ident == me or ident == caller:
+					continue
+				root = routes.get(ident)
+				if root is None:
+					if not include_idle:
+						continue
+					if ident not in names:
+						names = {thread.ident: thread.name for thread in threading.enumerate()}
+					root = f"[thread {names.get(ident, ident)}]"
+				stack = []
+				while frame is not None and len(stack) < MAX_DEPTH:
+					stack.append(_frame_label(frame.f_code, labels))
+					frame = frame.f_back
+				stacks[(root, *reversed(stack))] += 1
+			del frames
+			ticks[0] += 1
+			next_tick += interval
+			pause = next_tick - time.perf_counter()
+			if pause > 0:
+				time.sleep(pause)
+
+	try:
+		sampler = threading.Thread(target=run, name="sampling-profiler", daemon=True)
+		sampler.start()
+		sampler.join()
+	finally:
+		_busy.release()
+	return stacks, ticks[0]
+
+
+def collapsed(stacks: Counter) -> str:
+	"""Brendan Gregg's folded format: root;frame;frame count"""
+	return "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common())
+
+
+def speedscope(stacks: Counter, hz: int, name: str) -> dict:
+	"""speedscope file with one sampled profile per route"""
+	frames = []
+	index = {}
+	profiles = {}
+	for stack, count in stacks.items():
+		indexes = []
+		for label in stack:
+			if label not in index:
+				index[label] = len(frames)
+				frames.append({"name": label})
+			indexes.append(index[label])
+		profile = profiles.setdefault(stack[0], {"samples": [], "weights": []})
+		profile["samples"].append(indexes)
+		profile["weights"].append(count / hz)
+	return {
+		"$schema": "https://www.speedscope.app/file-format-schema.json",
+		"name": name,
+		"exporter": "ev-backend-profiler",
+		"shared": {"frames": frames},
+		"profiles": [
+			{
+				"type": "sampled",
+				"name": root,
+				"unit": "seconds",
+				"startValue": 0,
+				"endValue": sum(profile["weights"]),
+				"samples": profile["samples"],
+				"weights": profile["weights"],
+			}
+			for root, profile in sorted(profiles.items(), key=lambda item: -sum(item[1]["weights"]))
+		],
+	}
+
+
+def by_route(stacks: Counter, hz: int) -> list[dict]:
+	"""Samples and sampled seconds per route (the root of each stack), busiest first"""
+	totals = Counter()
+	for stack, count in stacks.items():
+		totals[stack[0]] += count
+	return [
+		{"route": route, "samples": count, "seconds": round(count / hz, 3)}
+		for route, count in totals.most_common()
+	]
+
+
+def _before_request():
+	rule = request.url_rule
+	_thread_routes[threading.get_ident()] = f"{request.method} {rule.rule if rule is not None else 'unmatched'}"
+
+
+def _teardown_request(exc):
+	_thread_routes.pop(threading.get_ident(), None)
+
+
+def init_app(app: Flask) -> None:
+	app.before_request(_before_request)
+	app.teardown_request(_teardown_request)
@@ -1,12 +1,16 @@
 from datetime import datetime, timedelta, time
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import text, func
+from sqlalchemy import text, func, select, or_, and_
 from werkzeug.utils import secure_filename
+import base64
+import csv
+import io
+import json
 import os
-import uuid
 from ..extensions import db
-from ..models import User, EVPort, EVPortSchedule, Booking, UserSubscription
+from ..models import User, EVPort, EVPortSchedule, Booking, Favorite, UserSubscription
+from .. import analytics, dashboard_stats, db_pool, image_urls, images, memory_profile, payload_cache, port_dedup, port_import, profiler, slow_queries
 from werkzeug.security import generate_password_hash
 
 
@@ -22,6 +26,11 @@ def check_admin():
 	return user
 
 
+def escape_like(value: str) -> str:
+	"""Escape LIKE wildcards so user input only ever matches as a literal prefix"""
+	return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 # ========== IMAGE UPLOAD ==========
 
 @admin_bp.post("/upload-image")
@@ -64,19 +73,19 @@ def upload_image():
 		except Exception as e:
 			return jsonify({"message": f"Failed to create upload directory: {str(e)}"}), 500
 		
-		# Generate unique filename
-		unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
-		filepath = os.path.join(upload_folder, unique_filename)
-		
-		# Save file
+		# Content-addressed name: identical files are stored once
 		try:
-			file.save(filepath)
+			stored_filename, _ = images.store_upload(file.stream, upload_folder, file_ext)
 		except Exception as e:
 			return jsonify({"message": f"Failed to save file: {str(e)}"}), 500
 		
+		# Resized variants are rendered off the request thread
+		if file_ext in image_urls.RESIZABLE_EXTENSIONS:
+			images.schedule_variants(upload_folder, stored_filename, current_app.config.get("IMAGE_WORKERS", 2))
+		
 		# Return URL (relative to /api)
-		image_url = f"/api/uploads/{unique_filename}"
-		return jsonify({"imageUrl": image_url}), 200
+		image_url = f"/api/uploads/{stored_filename}"
+		return jsonify({"imageUrl": image_url, "imageVariants": image_urls.variant_urls(image_url)}), 200
 	except Exception as e:
 		import traceback
 		traceback.print_exc()
@@ -140,6 +149,8 @@ def create_port():
 		)
 		db.session.add(port)
 		db.session.flush()  # Get port.id
+		dashboard_stats.record(totalPorts=1, activePorts=1)
+		analytics.record_port_change()
 		
 		# Add schedules
 		for schedule_data in schedules:
@@ -168,6 +179,73 @@ def create_port():
 		return jsonify({"message": f"Failed to create port: {str(e)}"}), 500
 
 
+@admin_bp.post("/ports/import")
+@jwt_required()
+def import_ports():
+	"""Bulk-create ports from a CSV or GeoJSON upload (multipart "file" or raw body).
+
+	The format comes from ?format=csv|geojson, else the file extension or
+	content type. GeoJSON is parsed in memory, so uploads larger than
+	PORT_IMPORT_GEOJSON_MAX_BYTES get 413. Valid rows are imported in one
+	transaction; invalid rows are reported with their row number.
+	Near-duplicates of existing ports (or of earlier rows) are reported with
+	dedupe=report (default), left out with dedupe=skip, or not checked with
+	dedupe=off.
+	"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	try:
+		upload = request.files.get("file")
+		stream = upload.stream if upload else request.stream
+		filename = (upload.filename if upload else "") or ""
+		content_type = (upload.content_type if upload else request.content_type) or ""
+		
+		import_format = request.args.get("format")
+		if not import_format:
+			if filename.lower().endswith((".geojson", ".json")) or "json" in content_type:
+				import_format = "geojson"
+			else:
+				import_format = "csv"
+		if import_format not in ("csv", "geojson"):
+			return jsonify({"message": "format must be csv or geojson"}), 400
+		dedupe = request.args.get("dedupe", "report")
+		if dedupe not in ("report", "skip", "off"):
+			return jsonify({"message": "dedupe must be report, skip or off"}), 400
+		
+		if import_format == "geojson":
+			max_bytes = current_app.config.get("PORT_IMPORT_GEOJSON_MAX_BYTES", 20 * 1024 * 1024)
+			document = stream.read(max_bytes + 1)
+			if len(document) > max_bytes:
+				return jsonify({"message": f"GeoJSON imports are limited to {max_bytes} bytes; split the file or use CSV"}), 413
+			stream = io.BytesIO(document)
+		
+		started = datetime.now()
+		dedupe_index = port_dedup.load_port_index() if dedupe != "off" else None
+		records = port_import.iter_csv(stream) if import_format == "csv" else port_import.iter_geojson(stream)
+		try:
+			result = port_import.import_ports(records, dedupe_index=dedupe_index, skip_duplicates=dedupe == "skip")
+		except (ValueError, UnicodeDecodeError, csv.Error) as e:
+			db.session.rollback()
+			return jsonify({"message": f"Could not parse {import_format}: {str(e)}"}), 400
+		dashboard_stats.record(totalPorts=result["imported"], activePorts=result["imported"])
+		analytics.record_port_change()
+		payload_cache.record_change("ports")
+		db.session.commit()
+		
+		elapsed = max((datetime.now() - started).total_seconds(), 1e-6)
+		result["seconds"] = round(elapsed, 3)
+		result["rowsPerSecond"] = round((result["imported"] + result["invalid"]) / elapsed, 1)
+		return jsonify(result), 201 if result["imported"] else 200
+	except Exception as e:
+		db.session.rollback()
+		import traceback
+		traceback.print_exc()
+		return jsonify({"message": f"Failed to import ports: {str(e)}"}), 500
+
+
 @admin_bp.put("/ports/<int:port_id>")
 @jwt_required()
 def update_port(port_id):
@@ -197,6 +275,8 @@ def update_port(port_id):
 			port.latitude = float(data["latitude"])
 		if "longitude" in data:
 			port.longitude = float(data["longitude"])
+		if "latitude" in data or "longitude" in data:
+			analytics.record_port_change()
 		if "connectorType" in data:
 			port.connector_type = data["connectorType"] if data["connectorType"] else ""
 		if "powerKw" in data:
@@ -205,7 +285,10 @@ def update_port(port_id):
 			# Allow empty string to clear image, or set new image URL
 			port.image_url = data["imageUrl"] if data["imageUrl"] else ""
 		if "isActive" in data:
-			port.is_active = bool(data["isActive"])
+			is_active = bool(data["isActive"])
+			if is_active != bool(port.is_active):
+				dashboard_stats.record(activePorts=1 if is_active else -1)
+			port.is_active = is_active
 		
 		# Update schedules if provided
 		if "schedules" in data:
@@ -249,7 +332,12 @@ def delete_port(port_id):
 	
 	try:
 		port = EVPort.query.get_or_404(port_id)
+		# Bookings go with the port through the cascade
+		for booking in port.bookings:
+			dashboard_stats.record_booking(booking.start_time, -1)
+		analytics.record_port_change()
 		db.session.delete(port)
+		dashboard_stats.record(totalPorts=-1, activePorts=-1 if port.is_active else 0)
 		db.session.commit()
 		return jsonify({"message": "Port deleted successfully"})
 	except Exception as e:
@@ -264,24 +352,85 @@ def delete_port(port_id):
 @admin_bp.get("/users")
 @jwt_required()
 def list_users():
-	"""Get all users"""
+	"""Get a page of users with their statistics.
+
+	Query params: limit (default 50, max 200), cursor (id of the last user on
+	the previous page) and q (prefix of the email or full name).
+	"""
 	try:
 		check_admin()
 	except PermissionError as e:
 		return jsonify({"message": str(e)}), 403
 	
 	try:
-		users = User.query.order_by(User.id.desc()).all()
-		users_data = []
-		for user in users:
-			user_dict = user.to_dict()
-			# Add statistics
-			user_dict["bookingsCount"] = Booking.query.filter_by(user_id=user.id).count()
-			user_dict["favoritesCount"] = len(user.favorites)
-			user_dict["subscriptionsCount"] = UserSubscription.query.filter_by(user_id=user.id, is_active=True).count()
-			users_data.append(user_dict)
-		
-		return jsonify({"users": users_data})
+		limit = min(max(request.args.get("limit", 50, type=int), 1), 200)
+		cursor = request.args.get("cursor", type=int)
+		search = (request.args.get("q") or "").strip()
+		
+		# Keyset page over the primary key, prefix search served by the email/full_name indexes
+		page = select(User.id, User.full_name, User.email, User.is_admin)
+		if cursor:
+			page = page.where(User.id < cursor)
+		if search:
+			prefix = escape_like(search)
+			page = page.where(or_(
+				User.email.like(prefix.lower() + "%", escape="\\"),
+				User.full_name.like(prefix + "%", escape="\\"),
+			))
+		page = page.order_by(User.id.desc()).limit(limit + 1).subquery()
+		page_ids = select(page.c.id)
+		
+		# Statistics are grouped only over the users on this page
+		bookings_sq = (
+			select(Booking.user_id, func.count(Booking.id).label("n"))
+			.where(Booking.user_id.in_(page_ids))
+			.group_by(Booking.user_id)
+			.subquery()
+		)
+		favorites_sq = (
+			select(Favorite.user_id, func.count(Favorite.id).label("n"))
+			.where(Favorite.user_id.in_(page_ids))
+			.group_by(Favorite.user_id)
+			.subquery()
+		)
+		subscriptions_sq = (
+			select(UserSubscription.user_id, func.count(UserSubscription.id).label("n"))
+			.where(UserSubscription.user_id.in_(page_ids), UserSubscription.is_active.is_(True))
+			.group_by(UserSubscription.user_id)
+			.subquery()
+		)
+		rows = db.session.execute(
+			select(
+				page.c.id,
+				page.c.full_name,
+				page.c.email,
+				page.c.is_admin,
+				func.coalesce(bookings_sq.c.n, 0),
+				func.coalesce(favorites_sq.c.n, 0),
+				func.coalesce(subscriptions_sq.c.n, 0),
+			)
+			.outerjoin(bookings_sq, bookings_sq.c.user_id == page.c.id)
+			.outerjoin(favorites_sq, favorites_sq.c.user_id == page.c.id)
+			.outerjoin(subscriptions_sq, subscriptions_sq.c.user_id == page.c.id)
+			.order_by(page.c.id.desc())
+		).all()
+		
+		has_more = len(rows) > limit
+		rows = rows[:limit]
+		users_data = [
+			{
+				"id": row[0],
+				"fullName": row[1],
+				"email": row[2],
+				"isAdmin": row[3],
+				"bookingsCount": row[4],
+				"favoritesCount": row[5],
+				"subscriptionsCount": row[6],
+			}
+			for row in rows
+		]
+		
+		return jsonify({"users": users_data, "nextCursor": rows[-1][0] if has_more else None})
 	except Exception as e:
 		import traceback
 		traceback.print_exc()
@@ -325,31 +474,249 @@ def update_user(user_id):
 
 # ========== BOOKINGS MANAGEMENT ==========
 
+BOOKING_SORT_COLUMNS = {
+	"startTime": Booking.start_time,
+	"createdAt": Booking.created_at,
+	"amount": Booking.amount,
+}
+
+
+def encode_cursor(value, row_id: int) -> str:
+	if isinstance(value, datetime):
+		value = value.isoformat()
+	raw = json.dumps([value, row_id]).encode()
+	return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, as_datetime: bool) -> tuple:
+	raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+	value, row_id = json.loads(raw)
+	if as_datetime and value is not None:
+		value = datetime.fromisoformat(value)
+	return value, int(row_id)
+
+
+def parse_date_param(name: str, end_of_range: bool = False) -> datetime | None:
+	"""Parse an ISO date/datetime query param; a bare date as the range end covers that whole day"""
+	value = request.args.get(name)
+	if not value:
+		return None
+	parsed = datetime.fromisoformat(value)
+	if end_of_range and len(value) == 10:
+		parsed += timedelta(days=1)
+	return parsed
+
+
+def filter_bookings(query):
+	"""Apply the admin bookings filters from the query string to a Booking query"""
+	port_id = request.args.get("portId", type=int)
+	user_id = request.args.get("userId", type=int)
+	city = (request.args.get("city") or "").strip()
+	payment_status = (request.args.get("paymentStatus") or "").strip()
+	date_from = parse_date_param("from")
+	date_to = parse_date_param("to", end_of_range=True)
+	
+	if port_id:
+		query = query.filter(Booking.port_id == port_id)
+	if user_id:
+		query = query.filter(Booking.user_id == user_id)
+	if city:
+		query = query.filter(Booking.port_id.in_(
+			select(EVPort.id).where(EVPort.city.like(escape_like(city) + "%", escape="\\"))
+		))
+	if payment_status:
+		# NULL (rows from before the payment columns) is pending, as in the summary
+		query = query.filter(func.coalesce(Booking.payment_status, "pending").in_(payment_status.split(",")))
+	# Range predicates on the indexed start_time column
+	if date_from:
+		query = query.filter(Booking.start_time >= date_from)
+	if date_to:
+		query = query.filter(Booking.start_time < date_to)
+	return query
+
+
 @admin_bp.get("/bookings")
 @jwt_required()
 def list_bookings_admin():
-	"""Get all bookings"""
+	"""Get a filtered page of bookings plus totals for the whole filter.
+
+	Filters: portId, userId, city (prefix), paymentStatus (comma separated),
+	from/to (ISO date or datetime on startTime). Sorting: sort=startTime,
+	createdAt or amount, prefixed with "-" for descending (default -startTime).
+	Paging: limit (default 50, max 200) and the opaque cursor from nextCursor.
+	"""
 	try:
 		check_admin()
 	except PermissionError as e:
 		return jsonify({"message": str(e)}), 403
 	
 	try:
-		bookings = Booking.query.order_by(Booking.start_time.desc()).all()
-		bookings_data = []
-		for booking in bookings:
-			booking_dict = booking.to_dict()
-			booking_dict["port"] = booking.port.to_dict() if booking.port else None
-			booking_dict["user"] = booking.user.to_dict() if booking.user else None
-			bookings_data.append(booking_dict)
+		limit = min(max(request.args.get("limit", 50, type=int), 1), 200)
+		sort = request.args.get("sort", "-startTime")
+		descending = sort.startswith("-")
+		sort_column = BOOKING_SORT_COLUMNS.get(sort.lstrip("-"))
+		if sort_column is None:
+			return jsonify({"message": f"Invalid sort. Allowed: {', '.join(BOOKING_SORT_COLUMNS)}"}), 400
 		
-		return jsonify({"bookings": bookings_data})
+		try:
+			base = filter_bookings(db.session.query(Booking))
+			cursor = request.args.get("cursor")
+			if cursor:
+				cursor_value, cursor_id = decode_cursor(cursor, sort_column is not Booking.amount)
+		except (ValueError, TypeError) as e:
+			return jsonify({"message": f"Invalid filter: {str(e)}"}), 400
+		
+		# Joined projection: only the columns the admin table shows, no per-row lazy loads
+		page = base.join(EVPort, EVPort.id == Booking.port_id).join(User, User.id == Booking.user_id).with_entities(
+			Booking.id,
+			Booking.user_id,
+			Booking.port_id,
+			Booking.start_time,
+			Booking.end_time,
+			Booking.amount,
+			Booking.payment_status,
+			Booking.payment_method,
+			Booking.created_at,
+			sort_column,
+			EVPort.name,
+			EVPort.city,
+			User.full_name,
+			User.email,
+		)
+		if cursor:
+			if descending:
+				page = page.filter(or_(sort_column < cursor_value, and_(sort_column == cursor_value, Booking.id < cursor_id)))
+			else:
+				page = page.filter(or_(sort_column > cursor_value, and_(sort_column == cursor_value, Booking.id > cursor_id)))
+		if descending:
+			page = page.order_by(sort_column.desc(), Booking.id.desc())
+		else:
+			page = page.order_by(sort_column.asc(), Booking.id.asc())
+		rows = page.limit(limit + 1).all()
+		
+		has_more = len(rows) > limit
+		rows = rows[:limit]
+		bookings_data = [
+			{
+				"id": row[0],
+				"userId": row[1],
+				"portId": row[2],
+				"startTime": row[3].isoformat(),
+				"endTime": row[4].isoformat(),
+				"amount": row[5],
+				"paymentStatus": row[6],
+				"paymentMethod": row[7],
+				"createdAt": row[8].isoformat() if row[8] else None,
+				"port": {"id": row[2], "name": row[10], "city": row[11]},
+				"user": {"id": row[1], "fullName": row[12], "email": row[13]},
+			}
+			for row in rows
+		]
+		next_cursor = encode_cursor(rows[-1][9], rows[-1][0]) if has_more else None
+		
+		# Totals for the whole filter, aggregated in SQL; rows from before the payment columns count as pending
+		status_key = func.coalesce(Booking.payment_status, "pending")
+		by_status = {}
+		total = 0
+		revenue = 0.0
+		for status, count, amount in base.with_entities(
+			status_key,
+			func.count(Booking.id),
+			func.coalesce(func.sum(Booking.amount), 0),
+		).group_by(status_key):
+			by_status[status] = {"count": count, "amount": round(float(amount), 2)}
+			total += count
+			if status == "paid":
+				revenue += float(amount)
+		
+		return jsonify({
+			"bookings": bookings_data,
+			"nextCursor": next_cursor,
+			"summary": {"total": total, "revenue": round(revenue, 2), "byStatus": by_status},
+		})
 	except Exception as e:
 		import traceback
 		traceback.print_exc()
 		return jsonify({"message": f"Failed to load bookings: {str(e)}", "bookings": []}), 500
 
 
+# ========== EXPORT ==========
+
+EXPORT_COLUMNS = {
+	"bookings": [
+		("id", Booking.id), ("userId", Booking.user_id), ("portId", Booking.port_id),
+		("startTime", Booking.start_time), ("endTime", Booking.end_time), ("amount", Booking.amount),
+		("paymentStatus", Booking.payment_status), ("paymentMethod", Booking.payment_method),
+		("createdAt", Booking.created_at),
+	],
+	"users": [
+		("id", User.id), ("fullName", User.full_name), ("email", User.email), ("isAdmin", User.is_admin),
+	],
+	"ports": [
+		("id", EVPort.id), ("name", EVPort.name), ("city", EVPort.city), ("address", EVPort.address),
+		("latitude", EVPort.latitude), ("longitude", EVPort.longitude),
+		("connectorType", EVPort.connector_type), ("powerKw", EVPort.power_kw),
+		("imageUrl", EVPort.image_url), ("isActive", EVPort.is_active),
+	],
+}
+EXPORT_BATCH_SIZE = 1000
+
+
+def export_rows(entity: str):
+	"""Yield lists of plain row values, streamed from a server-side cursor in fixed-size batches"""
+	columns = [column for _, column in EXPORT_COLUMNS[entity]]
+	result = db.session.execute(
+		select(*columns).order_by(columns[0]).execution_options(yield_per=EXPORT_BATCH_SIZE)
+	)
+	for batch in result.partitions():
+		yield [
+			[value.isoformat() if isinstance(value, datetime) else value for value in row]
+			for row in batch
+		]
+
+
+@admin_bp.get("/export/<entity>")
+@jwt_required()
+def export_entity(entity):
+	"""Stream bookings, users or ports as CSV or NDJSON (format=csv|ndjson)"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	if entity not in EXPORT_COLUMNS:
+		return jsonify({"message": f"Invalid entity. Allowed: {', '.join(EXPORT_COLUMNS)}"}), 400
+	export_format = request.args.get("format", "csv")
+	if export_format not in ("csv", "ndjson"):
+		return jsonify({"message": "format must be csv or ndjson"}), 400
+	names = [name for name, _ in EXPORT_COLUMNS[entity]]
+	
+	def generate_csv():
+		buffer = io.StringIO()
+		writer = csv.writer(buffer)
+		writer.writerow(names)
+		for batch in export_rows(entity):
+			writer.writerows(batch)
+			yield buffer.getvalue()
+			buffer.seek(0)
+			buffer.truncate()
+		yield buffer.getvalue()
+	
+	def generate_ndjson():
+		for batch in export_rows(entity):
+			yield "".join(json.dumps(dict(zip(names, row))) + "\n" for row in batch)
+	
+	if export_format == "csv":
+		body, mimetype = generate_csv(), "text/csv"
+	else:
+		body, mimetype = generate_ndjson(), "application/x-ndjson"
+	return Response(
+		stream_with_context(body),
+		mimetype=mimetype,
+		headers={"Content-Disposition": f"attachment; filename={entity}.{export_format}"},
+	)
+
+
 # ========== STATISTICS ==========
 
 @admin_bp.get("/stats")
@@ -362,24 +729,252 @@ def get_stats():
 		return jsonify({"message": str(e)}), 403
 	
 	try:
-		stats = {
-			"totalUsers": User.query.count(),
-			"totalPorts": EVPort.query.count(),
-			"activePorts": EVPort.query.filter_by(is_active=True).count(),
-			"totalBookings": Booking.query.count(),
-			"todayBookings": Booking.query.filter(
-				func.date(Booking.start_time) == func.curdate()
-			).count(),
-			"activeSubscriptions": UserSubscription.query.filter_by(is_active=True).count(),
-		}
-		
-		# Get recent bookings count (last 7 days)
-		week_ago = datetime.utcnow() - timedelta(days=7)
-		stats["recentBookings"] = Booking.query.filter(Booking.start_time >= week_ago).count()
-		
+		stats = dashboard_stats.get_stats()
 		return jsonify({"stats": stats})
 	except Exception as e:
 		import traceback
 		traceback.print_exc()
 		return jsonify({"message": f"Failed to load stats: {str(e)}", "stats": {}}), 500
 
+
+@admin_bp.get("/pool")
+@jwt_required()
+def get_pool_stats():
+	"""Connection pool usage and checkout wait times of the worker that answers"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	return jsonify({"pool": db_pool.snapshot(db.engine)})
+
+
+@admin_bp.get("/slow-queries")
+@jwt_required()
+def get_slow_queries():
+	"""Slow statements of the worker that answers; ?reset=1 clears the log afterwards"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+	result = slow_queries.report(limit)
+	if request.args.get("reset") == "1":
+		slow_queries.reset()
+	return jsonify(result)
+
+
+@admin_bp.get("/profile")
+@jwt_required()
+def get_profile():
+	"""Sample all request threads of this worker for ?seconds= (default 10) at ?hz= (default 100).
+
+	?format=collapsed (default, folded stacks rooted at the route), speedscope,
+	or routes (JSON totals per route); ?idle=1 also samples threads that are
+	not serving a request.
+	"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	seconds = request.args.get("seconds", 10, type=float)
+	hz = request.args.get("hz", 100, type=int)
+	output = request.args.get("format", "collapsed")
+	if not 0 < seconds <= profiler.MAX_SECONDS:
+		return jsonify({"message": f"seconds must be between 0 and {profiler.MAX_SECONDS}"}), 400
+	if not 1 <= hz <= profiler.MAX_HZ:
+		return jsonify({"message": f"hz must be between 1 and {profiler.MAX_HZ}"}), 400
+	if output not in ("collapsed", "speedscope", "routes"):
+		return jsonify({"message": "format must be collapsed, speedscope or routes"}), 400
+	
+	try:
+		stacks, ticks = profiler.sample(seconds, hz, include_idle=request.args.get("idle") == "1")
+	except profiler.ProfilerBusy as e:
+		return jsonify({"message": str(e)}), 409
+	
+	headers = {"X-Profile-Ticks": str(ticks), "X-Profile-Pid": str(os.getpid())}
+	if output == "speedscope":
+		name = f"pid {os.getpid()}, {seconds:g}s at {hz} Hz"
+		return jsonify(profiler.speedscope(stacks, hz, name)), 200, headers
+	if output == "routes":
+		return jsonify({"pid": os.getpid(), "ticks": ticks, "hz": hz, "routes": profiler.by_route(stacks, hz)}), 200, headers
+	return Response(profiler.collapsed(stacks), mimetype="text/plain", headers=headers)
+
+
+
+# ========== ANALYTICS ==========
+
+@admin_bp.get("/analytics/utilization")
+@jwt_required()
+def get_utilization():
+	"""Booked vs. open hours per weekday and hour, by port or by city.
+
+	Query params: from/to (ISO dates, default the last 30 days, at most 366
+	days apart), groupBy=port|city, and optional portId / city filters.
+	"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	try:
+		try:
+			date_to = parse_date_param("to")
+			date_from = parse_date_param("from")
+		except ValueError as e:
+			return jsonify({"message": f"Invalid date: {str(e)}"}), 400
+		date_to = date_to.date() if date_to else datetime.now().date() + timedelta(days=1)
+		date_from = date_from.date() if date_from else date_to - timedelta(days=30)
+		if date_from >= date_to:
+			return jsonify({"message": "from must be before to"}), 400
+		if (date_to - date_from).days > 366:
+			return jsonify({"message": "Date range is limited to 366 days"}), 400
+		
+		group_by = request.args.get("groupBy", "port")
+		if group_by not in ("port", "city"):
+			return jsonify({"message": "groupBy must be port or city"}), 400
+		port_id = request.args.get("portId", type=int)
+		city = (request.args.get("city") or "").strip() or None
+		
+		result = analytics.cached(
+			("utilization", date_from, date_to, group_by, port_id, city),
+			lambda: analytics.utilization(date_from, date_to, group_by, port_id, city),
+		)
+		return jsonify(result)
+	except Exception as e:
+		import traceback
+		traceback.print_exc()
+		return jsonify({"message": f"Failed to load utilization: {str(e)}"}), 500
+
+
+@admin_bp.get("/analytics/demand-grid")
+@jwt_required()
+def get_demand_grid():
+	"""Bookings, rejected (409) requests and ports binned into square cells of cellKm (default 5)"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	try:
+		cell_km = request.args.get("cellKm", 5.0, type=float)
+		if not 0.5 <= cell_km <= 50:
+			return jsonify({"message": "cellKm must be between 0.5 and 50"}), 400
+		# Rounded so near-identical sizes share one precomputed grid
+		return jsonify(analytics.demand_grid(round(cell_km, 1)))
+	except Exception as e:
+		import traceback
+		traceback.print_exc()
+		return jsonify({"message": f"Failed to load demand grid: {str(e)}"}), 500
+
+
+# ========== MEMORY ==========
+
+@admin_bp.get("/memory")
+@jwt_required()
+def get_memory_status():
+	"""tracemalloc state, snapshots and per-route retained memory of this worker"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	return jsonify(memory_profile.status())
+
+
+@admin_bp.post("/memory/start")
+@jwt_required()
+def start_memory_tracing():
+	"""Start tracemalloc; body {"frames": n} keeps n frames per allocation (default 1, max 50).
+
+	Returns 409 if tracing already runs with a different frame count.
+	"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	data = request.get_json(silent=True) or {}
+	try:
+		frames = int(data.get("frames", 1))
+	except (TypeError, ValueError):
+		return jsonify({"message": "frames must be an integer"}), 400
+	if not 1 <= frames <= 50:
+		return jsonify({"message": "frames must be between 1 and 50"}), 400
+	try:
+		memory_profile.start(frames)
+	except RuntimeError as e:
+		return jsonify({"message": str(e)}), 409
+	return jsonify(memory_profile.status())
+
+
+@admin_bp.post("/memory/stop")
+@jwt_required()
+def stop_memory_tracing():
+	"""Stop tracemalloc and discard its snapshots"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	memory_profile.stop()
+	return jsonify(memory_profile.status())
+
+
+@admin_bp.post("/memory/snapshots")
+@jwt_required()
+def take_memory_snapshot():
+	"""Take a snapshot to inspect or diff later"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	try:
+		return jsonify(memory_profile.take_snapshot()), 201
+	except RuntimeError as e:
+		return jsonify({"message": str(e)}), 409
+
+
+@admin_bp.get("/memory/snapshots/<int:snapshot_id>")
+@jwt_required()
+def get_memory_snapshot(snapshot_id):
+	"""Top allocation sites of a snapshot; ?groupBy=lineno|filename|traceback&limit="""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	group_by = request.args.get("groupBy", "lineno")
+	if group_by not in memory_profile.GROUP_BY:
+		return jsonify({"message": "groupBy must be lineno, filename or traceback"}), 400
+	limit = min(max(request.args.get("limit", 25, type=int), 1), 200)
+	try:
+		return jsonify(memory_profile.top(snapshot_id, group_by, limit))
+	except KeyError as e:
+		return jsonify({"message": e.args[0]}), 404
+
+
+@admin_bp.get("/memory/diff")
+@jwt_required()
+def get_memory_diff():
+	"""Growth between two snapshots: ?from=<id>&to=<id>[&groupBy=&limit=]"""
+	try:
+		check_admin()
+	except PermissionError as e:
+		return jsonify({"message": str(e)}), 403
+	
+	from_id = request.args.get("from", type=int)
+	to_id = request.args.get("to", type=int)
+	if from_id is None or to_id is None:
+		return jsonify({"message": "from and to snapshot ids are required"}), 400
+	group_by = request.args.get("groupBy", "lineno")
+	if group_by not in memory_profile.GROUP_BY:
+		return jsonify({"message": "groupBy must be lineno, filename or traceback"}), 400
+	limit = min(max(request.args.get("limit", 25, type=int), 1), 200)
+	try:
+		return jsonify(memory_profile.diff(from_id, to_id, group_by, limit))
+	except KeyError as e:
+		return jsonify({"message": e.args[0]}), 404
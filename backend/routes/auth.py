@@ -3,6 +3,7 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 from werkzeug.security import generate_password_hash, check_password_hash
 from ..extensions import db
 from ..models import User
+from .. import dashboard_stats
 
 
 auth_bp = Blueprint("auth", __name__)
@@ -28,6 +29,7 @@ def signup():
 			user = User(email=email, full_name=full_name, password_hash=generate_password_hash(password))
 		
 		db.session.add(user)
+		dashboard_stats.record(totalUsers=1)
 		try:
 			db.session.commit()
 		except Exception as e:
@@ -46,6 +48,7 @@ def signup():
 						"password_hash": generate_password_hash(password)
 					}
 				)
+				dashboard_stats.record(totalUsers=1)
 				db.session.commit()
 				# Get the created user
 				user = User.query.filter_by(email=email).first()
@@ -3,12 +3,25 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import text
 from ..extensions import db
-from ..models import Booking, EVPort, UserSubscription
+from ..models import Booking, BookingConflict, EVPort, UserSubscription
+from .. import analytics, dashboard_stats, popularity
 
 
 bookings_bp = Blueprint("bookings", __name__)
 
 
+def record_booking_change(port_id: int, start_time: datetime, delta: int, counts_for_popularity: bool = True) -> None:
+	"""Queue the counter updates for a booking row being added (+1) or removed (-1).
+
+	Refunded bookings are not in the popularity count, so removing one passes
+	counts_for_popularity=False.
+	"""
+	if counts_for_popularity:
+		popularity.record_bookings(port_id, delta)
+	dashboard_stats.record_booking(start_time, delta)
+	analytics.record_demand(port_id, bookings=delta)
+
+
 @bookings_bp.get("")
 @jwt_required()
 def list_my_bookings():
@@ -42,14 +55,14 @@ def list_my_bookings():
 				booking_dict["port"] = b.port.to_dict() if b.port else None
 				items.append(booking_dict)
 		else:
-			# If payment columns don't exist, use raw SQL
+			# If payment columns don't exist, use raw SQL (typed columns: SQLite returns datetimes as strings)
 			bookings_result = db.session.execute(
 				text("""
 					SELECT id, user_id, port_id, start_time, end_time
 					FROM bookings
 					WHERE user_id = :user_id
 					ORDER BY start_time ASC
-				"""),
+				""").columns(start_time=db.DateTime, end_time=db.DateTime),
 				{"user_id": user_id}
 			)
 			items = []
@@ -154,6 +167,13 @@ def create_booking():
 				)
 		
 		if overlaps:
+			# Rejected requests feed the demand grid; failing to log one must not change the response
+			try:
+				db.session.add(BookingConflict(user_id=user_id, port_id=port.id, start_time=start_dt, end_time=end_dt))
+				analytics.record_demand(port.id, conflicts=1)
+				db.session.commit()
+			except Exception:
+				db.session.rollback()
 			return jsonify({"message": "time slot not available"}), 409
 		
 		# Check subscription limit and coverage
@@ -219,6 +239,7 @@ def create_booking():
 					"end_time": end_dt
 				}
 			)
+			record_booking_change(port.id, start_dt, 1)
 			db.session.commit()
 			# Get the created booking using raw SQL to avoid payment column issues
 			booking_id = result.lastrowid
@@ -227,7 +248,7 @@ def create_booking():
 					SELECT id, user_id, port_id, start_time, end_time
 					FROM bookings
 					WHERE id = :booking_id
-				"""),
+				""").columns(start_time=db.DateTime, end_time=db.DateTime),
 				{"booking_id": booking_id}
 			)
 			row = booking_result.fetchone()
@@ -246,6 +267,7 @@ def create_booking():
 			return jsonify({"booking": booking_dict}), 201
 		
 		db.session.add(booking)
+		record_booking_change(port.id, start_dt, 1)
 		try:
 			db.session.commit()
 		except Exception as e:
@@ -266,6 +288,7 @@ def create_booking():
 							"end_time": end_dt
 						}
 					)
+					record_booking_change(port.id, start_dt, 1)
 					db.session.commit()
 					# Get the created booking using raw SQL to avoid payment column issues
 					booking_id = result.lastrowid
@@ -274,7 +297,7 @@ def create_booking():
 							SELECT id, user_id, port_id, start_time, end_time
 							FROM bookings
 							WHERE id = :booking_id
-						"""),
+						""").columns(start_time=db.DateTime, end_time=db.DateTime),
 						{"booking_id": booking_id}
 					)
 					row = booking_result.fetchone()
@@ -337,7 +360,7 @@ def process_payment(booking_id: int):
 				SELECT id, user_id, port_id, start_time, end_time
 				FROM bookings
 				WHERE id = :booking_id
-			"""),
+			""").columns(start_time=db.DateTime, end_time=db.DateTime),
 			{"booking_id": booking_id}
 		)
 		row = booking_result.fetchone()
@@ -505,12 +528,16 @@ def cancel_booking(booking_id: int):
 	try:
 		if booking.payment_status == "paid":
 			booking.payment_status = "refunded"
+			popularity.record_bookings(booking.port_id, -1)
 			db.session.commit()
 			return jsonify({"message": "booking cancelled and refunded"}), 200
 	except AttributeError:
 		# payment_status column doesn't exist, just delete
 		pass
 	
+	# A refunded booking already left the popularity count when it was refunded
+	refunded = getattr(booking, "payment_status", None) == "refunded"
 	db.session.delete(booking)
+	record_booking_change(booking.port_id, booking.start_time, -1, counts_for_popularity=not refunded)
 	db.session.commit()
 	return jsonify({"message": "deleted"}), 200
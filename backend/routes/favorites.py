@@ -1,7 +1,10 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
 from ..extensions import db
 from ..models import Favorite, EVPort
+from .. import popularity
 
 
 favorites_bp = Blueprint("favorites", __name__)
@@ -11,13 +14,111 @@ favorites_bp = Blueprint("favorites", __name__)
 @jwt_required()
 def list_my_favorites():
 	user_id = int(get_jwt_identity())
-	favorites = Favorite.query.filter_by(user_id=user_id).order_by(Favorite.created_at.desc()).all()
-	ports = []
-	for fav in favorites:
-		port_dict = fav.port.to_dict(include_schedule=True) if fav.port else None
-		if port_dict:
-			ports.append(port_dict)
-	return {"ports": ports}
+	# Single join for the ports, schedules loaded in one batched IN query
+	ports = (
+		EVPort.query
+		.join(Favorite, Favorite.port_id == EVPort.id)
+		.filter(Favorite.user_id == user_id)
+		.options(selectinload(EVPort.schedules))
+		.order_by(Favorite.created_at.desc())
+		.all()
+	)
+	return {"ports": [p.to_dict(include_schedule=True) for p in ports]}
+
+
+@favorites_bp.get("/ids")
+@jwt_required()
+def list_my_favorite_ids():
+	"""Get only the favorited port ids (answered from the (user_id, port_id) index)"""
+	user_id = int(get_jwt_identity())
+	rows = db.session.query(Favorite.port_id).filter(Favorite.user_id == user_id).all()
+	return {"portIds": [row[0] for row in rows]}
+
+
+@favorites_bp.put("")
+@jwt_required()
+def sync_favorites():
+	"""Replace the user's favorites in one transaction.
+
+	Accepts either the desired set ({"portIds": [...]}) or a replay of offline
+	toggles ({"operations": [{"op": "add"|"remove", "portId": ...}, ...]}).
+	"""
+	try:
+		user_id = int(get_jwt_identity())
+		data = request.get_json(silent=True) or {}
+		if not isinstance(data, dict):
+			return jsonify({"message": "request body must be a JSON object"}), 400
+
+		current = {
+			row[0] for row in db.session.query(Favorite.port_id).filter(Favorite.user_id == user_id)
+		}
+
+		if "portIds" in data:
+			port_ids = data.get("portIds") or []
+			# A string is iterable too; without this "12" would mean ports 1 and 2
+			if not isinstance(port_ids, list):
+				return jsonify({"message": "portIds must be a list of integers"}), 400
+			try:
+				desired = {int(pid) for pid in port_ids}
+			except (TypeError, ValueError):
+				return jsonify({"message": "portIds must be a list of integers"}), 400
+		elif "operations" in data:
+			operations = data.get("operations") or []
+			if not isinstance(operations, list):
+				return jsonify({"message": "operations must be a list"}), 400
+			desired = set(current)
+			for operation in operations:
+				if not isinstance(operation, dict):
+					return jsonify({"message": "each operation must be an object"}), 400
+				op = operation.get("op")
+				try:
+					pid = int(operation.get("portId"))
+				except (TypeError, ValueError):
+					return jsonify({"message": "each operation needs an integer portId"}), 400
+				if op == "add":
+					desired.add(pid)
+				elif op == "remove":
+					desired.discard(pid)
+				else:
+					return jsonify({"message": f"Invalid operation: {op}"}), 400
+		else:
+			return jsonify({"message": "portIds or operations is required"}), 400
+
+		to_add = desired - current
+		to_remove = current - desired
+
+		# Ports deleted since the client went offline are dropped from the diff
+		ignored = set()
+		if to_add:
+			existing_ports = {
+				row[0] for row in db.session.query(EVPort.id).filter(EVPort.id.in_(to_add))
+			}
+			ignored = to_add - existing_ports
+			to_add = to_add & existing_ports
+
+		if to_add:
+			db.session.execute(
+				insert(Favorite),
+				[{"user_id": user_id, "port_id": pid} for pid in to_add],
+			)
+		if to_remove:
+			Favorite.query.filter(
+				Favorite.user_id == user_id,
+				Favorite.port_id.in_(to_remove),
+			).delete(synchronize_session=False)
+		popularity.record_favorites_many(to_add, 1)
+		popularity.record_favorites_many(to_remove, -1)
+		db.session.commit()
+
+		return jsonify({
+			"portIds": sorted((current - to_remove) | to_add),
+			"added": sorted(to_add),
+			"removed": sorted(to_remove),
+			"ignored": sorted(ignored),
+		}), 200
+	except Exception as e:
+		db.session.rollback()
+		return jsonify({"message": str(e)}), 500
 
 
 @favorites_bp.post("/<int:port_id>")
@@ -34,6 +135,7 @@ def add_favorite(port_id: int):
 		
 		favorite = Favorite(user_id=user_id, port_id=port_id)
 		db.session.add(favorite)
+		popularity.record_favorites(port_id, 1)
 		db.session.commit()
 		return jsonify({"favorite": favorite.to_dict()}), 201
 	except Exception as e:
@@ -48,6 +150,7 @@ def remove_favorite(port_id: int):
 		user_id = int(get_jwt_identity())
 		favorite = Favorite.query.filter_by(user_id=user_id, port_id=port_id).first_or_404()
 		db.session.delete(favorite)
+		popularity.record_favorites(port_id, -1)
 		db.session.commit()
 		return jsonify({"message": "removed"}), 200
 	except Exception as e:
@@ -4,6 +4,7 @@ from flask_jwt_extended import jwt_required
 from sqlalchemy import text
 from ..models import EVPort, Booking
 from ..extensions import db
+from .. import payload_cache, popularity
 
 
 ports_bp = Blueprint("ports", __name__)
@@ -11,11 +12,40 @@ ports_bp = Blueprint("ports", __name__)
 
 @ports_bp.get("")
 def list_ports():
-	query = EVPort.query
-	city = request.args.get("city")
-	if city:
-		query = query.filter(EVPort.city.ilike(f"%{city}%"))
-	ports = [p.to_dict() for p in query.all()]
+	city = (request.args.get("city") or "").strip().lower()
+
+	def build():
+		query = EVPort.query
+		if city:
+			query = query.filter(EVPort.city.ilike(f"%{city}%"))
+		return {"ports": [p.to_dict() for p in query.all()]}
+
+	# Served as pre-encoded bytes until a port changes
+	return payload_cache.respond(("ports", city), build)
+
+
+@ports_bp.get("/popular")
+def list_popular_ports():
+	"""Get the most favorited/booked ports from the in-memory popularity heap"""
+	limit = min(max(request.args.get("limit", 10, type=int), 1), 100)
+	by = request.args.get("by", "total")
+	if by not in ("total", "favorites", "bookings"):
+		return {"message": "by must be one of total, favorites, bookings"}, 400
+
+	ranked = popularity.top_ports(limit, by)
+	ports_by_id = {
+		p.id: p for p in EVPort.query.filter(EVPort.id.in_([port_id for port_id, _, _ in ranked])).all()
+	} if ranked else {}
+
+	ports = []
+	for port_id, favorites_count, bookings_count in ranked:
+		port = ports_by_id.get(port_id)
+		if not port:
+			continue
+		port_dict = port.to_dict()
+		port_dict["favoritesCount"] = favorites_count
+		port_dict["bookingsCount"] = bookings_count
+		ports.append(port_dict)
 	return {"ports": ports}
 
 
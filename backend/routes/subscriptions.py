@@ -4,6 +4,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import text
 from ..extensions import db
 from ..models import SubscriptionPlan, UserSubscription, Booking
+from .. import dashboard_stats, payload_cache
 
 subscriptions_bp = Blueprint("subscriptions", __name__)
 
@@ -12,8 +13,11 @@ subscriptions_bp = Blueprint("subscriptions", __name__)
 def list_plans():
 	"""Get all available subscription plans"""
 	try:
-		plans = SubscriptionPlan.query.filter_by(is_active=True).order_by(SubscriptionPlan.price.asc()).all()
-		return jsonify({"plans": [p.to_dict() for p in plans]})
+		def build():
+			plans = SubscriptionPlan.query.filter_by(is_active=True).order_by(SubscriptionPlan.price.asc()).all()
+			return {"plans": [p.to_dict() for p in plans]}
+
+		return payload_cache.respond(("plans",), build)
 	except Exception as e:
 		import traceback
 		traceback.print_exc()
@@ -92,6 +96,9 @@ def subscribe():
 			is_active=True
 		)
 		db.session.add(subscription)
+		# Expired subscriptions already dropped out of the dashboard count
+		dashboard_stats.record(activeSubscriptions=-sum(1 for sub in existing if sub.end_date >= start_date))
+		dashboard_stats.record_subscription(end_date)
 		db.session.commit()
 		
 		return jsonify({
@@ -0,0 +1,116 @@
+"""Production server for the backend.
+
+Runs create_app under gunicorn (gthread workers, preloaded app) on POSIX and
+under waitress on Windows, where gunicorn is not available.
+Usage: python -m backend.serve [--bind 0.0.0.0:5000] [--workers N] [--threads N]
+
+Every setting can also come from the environment:
+	BIND                       address to listen on (default 0.0.0.0:5000)
+	WEB_CONCURRENCY            worker processes (default 2 x CPUs + 1)
+	GUNICORN_THREADS           threads per worker (default 4)
+	GUNICORN_KEEPALIVE         seconds to keep idle client connections open (default 5)
+	GUNICORN_TIMEOUT           seconds before a silent worker is restarted (default 30)
+	GUNICORN_GRACEFUL_TIMEOUT  seconds in-flight requests get on reload/shutdown (default 30)
+	GUNICORN_MAX_REQUESTS      requests before a worker is recycled, 0 = never (default 2000)
+	WAITRESS_THREADS           waitress threads (default DB_POOL_SIZE + DB_MAX_OVERFLOW)
+	WAITRESS_CHANNEL_TIMEOUT   seconds waitress keeps an inactive connection open (default 60)
+
+Send SIGHUP to the gunicorn master for a graceful reload: new workers start
+before the old ones finish their in-flight requests and exit.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+
+
+# Threads per gunicorn worker, and for waitress when the pool size is unknown (SQLite)
+DEFAULT_THREADS = 4
+
+
+def gunicorn_options(bind: str, workers: int, threads: int) -> dict:
+	max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+	return {
+		"bind": bind,
+		"workers": workers,
+		"threads": threads,
+		"worker_class": "gthread",
+		"keepalive": int(os.getenv("GUNICORN_KEEPALIVE", "5")),
+		"timeout": int(os.getenv("GUNICORN_TIMEOUT", "30")),
+		"graceful_timeout": int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30")),
+		"max_requests": max_requests,
+		"max_requests_jitter": max_requests // 10,
+		# Import the app once in the master; workers fork with it already loaded
+		"preload_app": True,
+		"post_fork": post_fork,
+		"accesslog": os.getenv("GUNICORN_ACCESSLOG") or None,
+	}
+
+
+def post_fork(server, worker) -> None:
+	"""Give each worker its own connection pool instead of sockets inherited from the master"""
+	from .extensions import db
+	from .wsgi import app
+	with app.app_context():
+		for engine in db.engines.values():
+			engine.dispose(close=False)
+
+
+def run_gunicorn(options: dict) -> None:
+	from gunicorn.app.base import BaseApplication
+
+	class Application(BaseApplication):
+		def load_config(self):
+			for key, value in options.items():
+				if value is not None:
+					self.cfg.set(key, value)
+
+		def load(self):
+			from .wsgi import app
+			return app
+
+	Application().run()
+
+
+def waitress_options(bind: str, threads: int | None, engine_options: dict) -> dict:
+	"""waitress runs one process, so every thread shares a single connection pool.
+
+	Without an explicit thread count, run as many threads as the pool can hand
+	out connections; more would only queue on the pool and hit DB_POOL_TIMEOUT.
+	"""
+	if threads is None:
+		if "pool_size" in engine_options:
+			threads = engine_options["pool_size"] + engine_options["max_overflow"]
+		else:
+			threads = DEFAULT_THREADS
+	return {
+		"listen": bind,
+		"threads": threads,
+		"channel_timeout": int(os.getenv("WAITRESS_CHANNEL_TIMEOUT", "60")),
+	}
+
+
+def run_waitress(bind: str, threads: int | None) -> None:
+	from waitress import serve
+	from .wsgi import app
+	serve(app, **waitress_options(bind, threads, app.config["SQLALCHEMY_ENGINE_OPTIONS"]))
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Run the backend under a production WSGI server")
+	parser.add_argument("--bind", default=os.getenv("BIND", "0.0.0.0:5000"))
+	parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)))
+	parser.add_argument("--threads", type=int)
+	args = parser.parse_args()
+
+	if sys.platform == "win32":
+		# waitress is single-process: one pool shared by all threads, sized by it unless set
+		threads = args.threads or (int(os.environ["WAITRESS_THREADS"]) if os.getenv("WAITRESS_THREADS") else None)
+		run_waitress(args.bind, threads)
+	else:
+		threads = args.threads or int(os.getenv("GUNICORN_THREADS", str(DEFAULT_THREADS)))
+		run_gunicorn(gunicorn_options(args.bind, args.workers, threads))
+
+
+if __name__ == "__main__":
+	main()
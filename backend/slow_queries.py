@@ -0,0 +1,185 @@
+"""Slow-query log with EXPLAIN capture for the worst statements.
+
+Cursor events time every statement; those above SLOW_QUERY_MS are kept in a
+ring buffer with the route that issued them and the shape (not the values) of
+their parameters, and aggregated per statement. The first time a SELECT runs
+longer than SLOW_QUERY_EXPLAIN_MS its plan is captured on a background thread
+with the original parameters. Served at GET /api/admin/slow-queries.
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import Flask, has_request_context, request
+from sqlalchemy import event
+
+
+logger = logging.getLogger(__name__)
+
+# Distinct statements kept in the aggregate before the least slow is dropped
+MAX_STATEMENTS = 500
+# Statements whose plan is captured per process
+MAX_EXPLAINS = 50
+
+# Collapses expanded IN lists, so IN (?, ?) and IN (?, ?, ?) aggregate together
+IN_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+EXPLAIN_PREFIX = {"mysql": "EXPLAIN ", "mariadb": "EXPLAIN ", "postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+
+_lock = threading.Lock()
+_local = threading.local()
+_recent = deque(maxlen=200)
+_statements = {}
+_explained = 0
+_settings = {"threshold": 0.2, "explain_threshold": 1.0}
+_executor = None
+
+
+def fingerprint(statement: str) -> str:
+	return IN_LIST.sub("(?...)", WHITESPACE.sub(" ", statement).strip())
+
+
+def parameter_shape(parameters, executemany: bool):
+	"""Parameter types without their values, e.g. {"email_1": "str"} or ["int", "datetime"]"""
+	if executemany:
+		rows = list(parameters or ())
+		return {"executemany": len(rows), "row": parameter_shape(rows[0], False) if rows else None}
+	if isinstance(parameters, dict):
+		return {key: type(value).__name__ for key, value in parameters.items()}
+	if isinstance(parameters, (list, tuple)):
+		return [type(value).__name__ for value in parameters]
+	return None
+
+
+def _route() -> str:
+	if not has_request_context():
+		return "-"
+	rule = request.url_rule
+	return f"{request.method} {rule.rule if rule is not None else request.path}"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	# On the execution context, not the connection: a failed statement never reaches
+	# after_cursor_execute, and its context is discarded along with the start time
+	if context is not None:
+		context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	started = getattr(context, "_slow_query_started", None)
+	if started is None:
+		return
+	elapsed = time.perf_counter() - started
+	if elapsed < _settings["threshold"] or getattr(_local, "explaining", False):
+		return
+	record(conn.engine, statement, parameters, executemany, elapsed, _route())
+
+
+def record(engine, statement: str, parameters, executemany: bool, elapsed: float, route: str) -> None:
+	global _explained
+	key = fingerprint(statement)
+	shape = parameter_shape(parameters, executemany)
+	duration_ms = round(elapsed * 1000, 2)
+	logger.warning("Slow query %.0f ms on %s: %s", duration_ms, route, key[:200])
+	explain = False
+	with _lock:
+		_recent.append({
+			"at": datetime.utcnow().isoformat() + "Z",
+			"durationMs": duration_ms,
+			"route": route,
+			"statement": key,
+			"paramShape": shape,
+		})
+		entry = _statements.get(key)
+		if entry is None:
+			if len(_statements) >= MAX_STATEMENTS:
+				del _statements[min(_statements, key=lambda k: _statements[k]["maxMs"])]
+			entry = _statements[key] = {
+				"statement": key,
+				"count": 0,
+				"totalMs": 0.0,
+				"maxMs": 0.0,
+				"routes": {},
+				"paramShape": shape,
+				"explain": None,
+			}
+		entry["count"] += 1
+		entry["totalMs"] = round(entry["totalMs"] + duration_ms, 2)
+		entry["maxMs"] = max(entry["maxMs"], duration_ms)
+		entry["routes"][route] = entry["routes"].get(route, 0) + 1
+		if (
+			entry["explain"] is None
+			and not executemany
+			and elapsed >= _settings["explain_threshold"]
+			and key.lower().startswith(("select", "with"))
+			and _explained < MAX_EXPLAINS
+		):
+			entry["explain"] = "pending"
+			_explained += 1
+			explain = True
+	if explain:
+		_schedule_explain(engine, key, statement, parameters)
+
+
+def _schedule_explain(engine, key: str, statement: str, parameters) -> None:
+	global _executor
+	with _lock:
+		if _executor is None:
+			_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+	_executor.submit(_explain, engine, key, statement, parameters)
+
+
+def _explain(engine, key: str, statement: str, parameters) -> None:
+	prefix = EXPLAIN_PREFIX.get(engine.dialect.name)
+	if prefix is None:
+		plan = f"EXPLAIN not supported on {engine.dialect.name}"
+	else:
+		_local.explaining = True
+		try:
+			with engine.connect() as conn:
+				result = conn.exec_driver_sql(prefix + statement, parameters or ())
+				columns = list(result.keys())
+				plan = [dict(zip(columns, (str(value) if value is not None else None for value in row))) for row in result]
+		except Exception as e:
+			plan = f"EXPLAIN failed: {e}"
+		finally:
+			_local.explaining = False
+	with _lock:
+		entry = _statements.get(key)
+		if entry is not None:
+			entry["explain"] = plan
+
+
+def report(limit: int = 20) -> dict:
+	"""Recent slow executions (newest first) and the statements with the highest max duration"""
+	with _lock:
+		recent = list(_recent)[::-1]
+		worst = sorted(_statements.values(), key=lambda entry: entry["maxMs"], reverse=True)[:limit]
+		worst = [{**entry, "routes": dict(entry["routes"])} for entry in worst]
+	return {
+		"thresholdMs": _settings["threshold"] * 1000,
+		"explainThresholdMs": _settings["explain_threshold"] * 1000,
+		"recent": recent[:limit * 5],
+		"worst": worst,
+	}
+
+
+def reset() -> None:
+	global _explained
+	with _lock:
+		_recent.clear()
+		_statements.clear()
+		_explained = 0
+
+
+def init_app(app: Flask, engine) -> None:
+	_settings["threshold"] = app.config.get("SLOW_QUERY_MS", 200) / 1000
+	_settings["explain_threshold"] = app.config.get("SLOW_QUERY_EXPLAIN_MS", 1000) / 1000
+	if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+		event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+		event.listen(engine, "after_cursor_execute", _after_cursor_execute)
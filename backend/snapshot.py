@@ -0,0 +1,285 @@
+"""Snapshot and restore the database for benchmark and test runs.
+
+Usage:
+	python -m backend.snapshot dump snapshots/baseline [--format binary|csv|sqlite] [--workers 4]
+	python -m backend.snapshot restore snapshots/baseline [--workers 4] [--load-data]
+
+dump writes every model table to its own file, one thread per table: "binary"
+is zlib-compressed pickle frames of raw driver rows (compact, fastest to
+reload), "csv" is plain CSV with \\N for NULL (portable, usable with LOAD DATA).
+On SQLite "sqlite" copies the whole database file with the backup API instead.
+
+restore recreates the schema from the models and drops the secondary
+indexes (except those backing foreign keys). It bulk-loads the tables in parallel (one at a time on SQLite) with
+foreign-key and unique checks off, then builds the indexes once at the end.
+Running servers keep their in-memory caches until their TTLs expire.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .extensions import db
+
+
+FORMATS = ("binary", "csv", "sqlite")
+MANIFEST = "manifest.json"
+SQLITE_FILE = "database.sqlite"
+# Rows per pickle frame and per executemany on restore
+FRAME_ROWS = 50000
+FRAME_HEADER = struct.Struct("<I")
+
+
+def _select(engine, table) -> str:
+	quote = engine.dialect.identifier_preparer.quote
+	columns = ", ".join(quote(column.name) for column in table.columns)
+	order = ", ".join(quote(column.name) for column in table.primary_key.columns)
+	return f"SELECT {columns} FROM {quote(table.name)}" + (f" ORDER BY {order}" if order else "")
+
+
+def _insert(engine, table, columns: list) -> str:
+	quote = engine.dialect.identifier_preparer.quote
+	placeholder = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+	return (
+		f"INSERT INTO {quote(table.name)} ({', '.join(quote(name) for name in columns)}) "
+		f"VALUES ({', '.join([placeholder] * len(columns))})"
+	)
+
+
+def _session_settings(conn) -> None:
+	"""Per-connection switches that make bulk loads cheaper"""
+	if conn.dialect.name == "mysql":
+		conn.exec_driver_sql("SET foreign_key_checks = 0")
+		conn.exec_driver_sql("SET unique_checks = 0")
+	elif conn.dialect.name == "sqlite":
+		conn.exec_driver_sql("PRAGMA synchronous = OFF")
+	conn.commit()
+
+
+# ========== DUMP ==========
+
+def dump_table(engine, table, directory: str, output: str) -> int:
+	"""Stream one table to <table>.bin or <table>.csv; returns the row count"""
+	rows = 0
+	with engine.connect() as conn:
+		result = conn.execution_options(stream_results=True).exec_driver_sql(_select(engine, table))
+		if output == "binary":
+			with open(os.path.join(directory, f"{table.name}.bin"), "wb") as f:
+				while True:
+					frame = result.fetchmany(FRAME_ROWS)
+					if not frame:
+						break
+					blob = zlib.compress(pickle.dumps([tuple(row) for row in frame], protocol=5), 1)
+					f.write(FRAME_HEADER.pack(len(blob)))
+					f.write(blob)
+					rows += len(frame)
+		else:
+			with open(os.path.join(directory, f"{table.name}.csv"), "w", newline="", encoding="utf-8") as f:
+				writer = csv.writer(f, lineterminator="\n")
+				while True:
+					frame = result.fetchmany(FRAME_ROWS)
+					if not frame:
+						break
+					writer.writerows(["\\N" if value is None else value for value in row] for row in frame)
+					rows += len(frame)
+	return rows
+
+
+def dump(directory: str, output: str, workers: int) -> dict:
+	engine = db.engine
+	os.makedirs(directory, exist_ok=True)
+	tables = db.metadata.sorted_tables
+	manifest = {
+		"createdAt": datetime.utcnow().isoformat() + "Z",
+		"dialect": engine.dialect.name,
+		"format": output,
+		"tables": {table.name: {"columns": [column.name for column in table.columns]} for table in tables},
+	}
+	started = time.perf_counter()
+	if output == "sqlite":
+		if engine.dialect.name != "sqlite":
+			raise ValueError("The sqlite format needs a SQLite database")
+		target = os.path.join(directory, SQLITE_FILE)
+		if os.path.exists(target):
+			os.remove(target)
+		source = engine.raw_connection()
+		try:
+			with sqlite3.connect(target) as destination:
+				source.driver_connection.backup(destination)
+		finally:
+			source.close()
+		for table in tables:
+			with engine.connect() as conn:
+				manifest["tables"][table.name]["rows"] = conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table.name}").scalar()
+	else:
+		with ThreadPoolExecutor(max_workers=workers) as pool:
+			counts = pool.map(lambda table: dump_table(engine, table, directory, output), tables)
+			for table, rows in zip(tables, counts):
+				manifest["tables"][table.name]["rows"] = rows
+				print(f"  {table.name:<22}{rows:>12} rows  ({time.perf_counter() - started:.1f}s)")
+	with open(os.path.join(directory, MANIFEST), "w") as f:
+		json.dump(manifest, f, indent=2)
+	return manifest
+
+
+# ========== RESTORE ==========
+
+def _frames(path: str):
+	with open(path, "rb") as f:
+		while True:
+			header = f.read(FRAME_HEADER.size)
+			if not header:
+				return
+			(size,) = FRAME_HEADER.unpack(header)
+			yield pickle.loads(zlib.decompress(f.read(size)))
+
+
+def _csv_frames(path: str):
+	with open(path, newline="", encoding="utf-8") as f:
+		frame = []
+		for row in csv.reader(f):
+			frame.append(tuple(None if value == "\\N" else value for value in row))
+			if len(frame) == FRAME_ROWS:
+				yield frame
+				frame = []
+		if frame:
+			yield frame
+
+
+def restore_table(engine, table, directory: str, manifest: dict, load_data: bool) -> int:
+	columns = manifest["tables"][table.name]["columns"]
+	if manifest["format"] == "binary":
+		frames = _frames(os.path.join(directory, f"{table.name}.bin"))
+	else:
+		frames = _csv_frames(os.path.join(directory, f"{table.name}.csv"))
+	rows = 0
+	with engine.connect() as conn:
+		_session_settings(conn)
+		with conn.begin():
+			if load_data:
+				path = os.path.abspath(os.path.join(directory, f"{table.name}.csv"))
+				result = conn.exec_driver_sql(
+					f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {table.name} "
+					f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+				)
+				return result.rowcount
+			statement = _insert(engine, table, columns)
+			for frame in frames:
+				conn.exec_driver_sql(statement, frame)
+				rows += len(frame)
+	return rows
+
+
+def deferrable_indexes(tables) -> list:
+	"""Secondary indexes that can be dropped for the load.
+
+	InnoDB refuses to drop the index backing a foreign key (error 1553), so
+	indexes that lead with a foreign-key column (e.g. ix_favorites_port_id)
+	stay in place.
+	"""
+	deferred = []
+	for table in tables:
+		for index in table.indexes:
+			leading = next(iter(index.columns), None)
+			if leading is not None and not leading.foreign_keys:
+				deferred.append(index)
+	return deferred
+
+
+def restore(directory: str, workers: int, load_data: bool) -> None:
+	with open(os.path.join(directory, MANIFEST)) as f:
+		manifest = json.load(f)
+	engine = db.engine
+	started = time.perf_counter()
+
+	if manifest["format"] == "sqlite":
+		if engine.dialect.name != "sqlite":
+			raise ValueError("A sqlite-format snapshot can only be restored into SQLite")
+		target = engine.raw_connection()
+		try:
+			with sqlite3.connect(os.path.join(directory, SQLITE_FILE)) as source:
+				source.backup(target.driver_connection)
+		finally:
+			target.close()
+		engine.dispose()
+		print(f"[OK] Restored {directory} in {time.perf_counter() - started:.1f}s")
+		return
+
+	if manifest["format"] == "binary" and manifest["dialect"] != engine.dialect.name:
+		raise ValueError(f"Binary snapshots hold raw {manifest['dialect']} values; dump with --format csv to move between databases")
+	if load_data and (manifest["format"] != "csv" or engine.dialect.name != "mysql"):
+		raise ValueError("--load-data needs a csv snapshot and a MySQL database")
+	tables = [table for table in db.metadata.sorted_tables if table.name in manifest["tables"]]
+	for table in tables:
+		current = [column.name for column in table.columns]
+		if current != manifest["tables"][table.name]["columns"]:
+			raise ValueError(f"Columns of {table.name} changed since the snapshot; run the migrations it was taken with")
+
+	if engine.dialect.name == "mysql":
+		with engine.begin() as conn:
+			conn.exec_driver_sql("SET foreign_key_checks = 0")
+			db.metadata.drop_all(conn)
+			db.metadata.create_all(conn)
+	else:
+		db.drop_all()
+		db.create_all()
+	# Build secondary indexes once after the load instead of maintaining them per row
+	deferred = deferrable_indexes(tables)
+	with engine.begin() as conn:
+		for index in deferred:
+			index.drop(conn)
+	print(f"  schema recreated, {len(deferred)} indexes deferred ({time.perf_counter() - started:.1f}s)")
+
+	if load_data:
+		from sqlalchemy import create_engine
+		engine = create_engine(engine.url, connect_args={"local_infile": True})
+	# SQLite allows one writer at a time
+	parallel = 1 if engine.dialect.name == "sqlite" else workers
+	with ThreadPoolExecutor(max_workers=parallel) as pool:
+		counts = pool.map(lambda table: restore_table(engine, table, directory, manifest, load_data), tables)
+		for table, rows in zip(tables, counts):
+			print(f"  {table.name:<22}{rows:>12} rows  ({time.perf_counter() - started:.1f}s)")
+
+	with ThreadPoolExecutor(max_workers=parallel) as pool:
+		def create(index):
+			with engine.begin() as conn:
+				index.create(conn)
+		list(pool.map(create, deferred))
+	print(f"  indexes rebuilt ({time.perf_counter() - started:.1f}s)")
+	print(f"[OK] Restored {directory} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+	from .app import create_app
+
+	parser = argparse.ArgumentParser(description="Snapshot and restore the database")
+	parser.add_argument("action", choices=("dump", "restore"))
+	parser.add_argument("directory")
+	parser.add_argument("--format", choices=FORMATS, default="binary", dest="output")
+	parser.add_argument("--workers", type=int, default=4)
+	parser.add_argument("--load-data", action="store_true", help="restore a csv snapshot into MySQL with LOAD DATA LOCAL INFILE")
+	args = parser.parse_args()
+
+	app = create_app()
+	# Bulk statements would otherwise show up in the slow-query log
+	logging.getLogger("backend.slow_queries").setLevel(logging.ERROR)
+	with app.app_context():
+		try:
+			if args.action == "dump":
+				started = time.perf_counter()
+				manifest = dump(args.directory, args.output, args.workers)
+				total = sum(table["rows"] for table in manifest["tables"].values())
+				print(f"[OK] Dumped {total} rows to {args.directory} in {time.perf_counter() - started:.1f}s")
+			else:
+				restore(args.directory, args.workers, args.load_data)
+		except (OSError, ValueError) as e:
+			print(f"[ERROR] {e}")
+			raise SystemExit(1)
@@ -0,0 +1,364 @@
+"""Request trace spans exported as OTLP/JSON lines to a rotating local file.
+
+Enabled by setting TRACE_FILE. Each sampled request becomes one trace: a
+server span for the route with child spans for JWT verification, every SQL
+statement, model serialization (one span per model class, covering all its
+to_dict calls) and JSON encoding. Each line of the file is an OTLP
+ExportTraceServiceRequest, readable by the OpenTelemetry Collector's
+otlpjsonfile receiver or any OTLP/JSON tool, with no collector required.
+Spans are written by a background listener, so requests never wait on disk.
+The listener and its file are started lazily by the first traced request in
+each process, so preforked workers each get their own thread and, with
+"{pid}" in TRACE_FILE, their own file.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+
+from flask import Flask, request
+from sqlalchemy import event
+
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+# Longest db.statement attribute kept per SQL span
+MAX_STATEMENT = 2000
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_local = threading.local()
+_logger = logging.getLogger("backend.tracing.export")
+_logger.setLevel(logging.INFO)
+_logger.propagate = False
+_resource = {}
+_resource_settings = {"sample_rate": 1.0}
+# TRACE_FILE template and rotation settings, filled in by init_app
+_export_settings = {}
+_exporter_lock = threading.Lock()
+_exporter = {"pid": None, "listener": None, "handler": None}
+
+
+def _attributes(values: dict) -> list:
+	result = []
+	for key, value in values.items():
+		if value is None:
+			continue
+		if isinstance(value, bool):
+			encoded = {"boolValue": value}
+		elif isinstance(value, int):
+			encoded = {"intValue": str(value)}
+		elif isinstance(value, float):
+			encoded = {"doubleValue": value}
+		else:
+			encoded = {"stringValue": str(value)}
+		result.append({"key": key, "value": encoded})
+	return result
+
+
+class Trace:
+	"""Spans of one request, owned by the thread handling it"""
+
+	def __init__(self, trace_id: str, parent_span_id: str | None):
+		self.trace_id = trace_id
+		self.spans = []
+		self.stack = []
+		self.serialization = {}  # model -> [first start ns, total ns, calls]
+		self.root = self.start("", SPAN_KIND_SERVER, parent_span_id)
+
+	def start(self, name: str, kind: int = SPAN_KIND_INTERNAL, parent_span_id: str | None = None, **attributes) -> dict:
+		span = {
+			"traceId": self.trace_id,
+			"spanId": secrets.token_hex(8),
+			"parentSpanId": parent_span_id if parent_span_id is not None else (self.stack[-1]["spanId"] if self.stack else ""),
+			"name": name,
+			"kind": kind,
+			"startTimeUnixNano": time.time_ns(),
+			"attributes": attributes,
+		}
+		self.spans.append(span)
+		self.stack.append(span)
+		return span
+
+	def end(self, span: dict, error: BaseException | None = None) -> None:
+		span["endTimeUnixNano"] = time.time_ns()
+		if error is not None:
+			span["status"] = {"code": STATUS_ERROR, "message": f"{type(error).__name__}: {error}"}
+		if self.stack and self.stack[-1] is span:
+			self.stack.pop()
+		elif span in self.stack:
+			self.stack.remove(span)
+
+	def export(self) -> dict:
+		now = time.time_ns()
+		parent = self.root["spanId"]
+		for model, (started, total, calls) in self.serialization.items():
+			self.spans.append({
+				"traceId": self.trace_id,
+				"spanId": secrets.token_hex(8),
+				"parentSpanId": parent,
+				"name": f"serialize {model}",
+				"kind": SPAN_KIND_INTERNAL,
+				"startTimeUnixNano": started,
+				"endTimeUnixNano": started + total,
+				"attributes": {"serialize.model": model, "serialize.calls": calls},
+			})
+		spans = []
+		for span in self.spans:
+			span = dict(span)
+			span.setdefault("endTimeUnixNano", now)
+			span["startTimeUnixNano"] = str(span["startTimeUnixNano"])
+			span["endTimeUnixNano"] = str(span["endTimeUnixNano"])
+			span["attributes"] = _attributes(span["attributes"])
+			spans.append(span)
+		return {
+			"resourceSpans": [{
+				"resource": {"attributes": _attributes(_resource)},
+				"scopeSpans": [{"scope": {"name": "backend.tracing"}, "spans": spans}],
+			}]
+		}
+
+
+def current() -> Trace | None:
+	return getattr(_local, "trace", None)
+
+
+class span:
+	"""Context manager for a child span of the current request; a no-op outside traced requests"""
+
+	def __init__(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+		self.name = name
+		self.kind = kind
+		self.attributes = attributes
+		self.trace = None
+		self.span = None
+
+	def __enter__(self):
+		self.trace = current()
+		if self.trace is not None:
+			self.span = self.trace.start(self.name, self.kind, **self.attributes)
+		return self.span
+
+	def __exit__(self, exc_type, exc, tb):
+		if self.span is not None:
+			self.trace.end(self.span, exc)
+		return False
+
+
+# ----- export -----
+
+def _ensure_exporter() -> None:
+	"""Start this process's listener and span file if it has none yet (e.g. right after a fork)"""
+	pid = os.getpid()
+	if _exporter["pid"] == pid:
+		return
+	with _exporter_lock:
+		if _exporter["pid"] == pid:
+			return
+		# A listener inherited across fork has no thread here; only its queue handler is replaced
+		if _exporter["handler"] is not None:
+			_logger.removeHandler(_exporter["handler"])
+		path = _export_settings["path"].replace("{pid}", str(pid))
+		os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+		handler = logging.handlers.RotatingFileHandler(
+			path,
+			maxBytes=_export_settings["max_bytes"],
+			backupCount=_export_settings["backup_count"],
+			encoding="utf-8",
+		)
+		handler.setFormatter(logging.Formatter("%(message)s"))
+		records = queue.SimpleQueue()
+		queue_handler = logging.handlers.QueueHandler(records)
+		listener = logging.handlers.QueueListener(records, handler)
+		listener.start()
+		_logger.addHandler(queue_handler)
+		_resource["process.pid"] = pid
+		_exporter.update(pid=pid, listener=listener, handler=queue_handler)
+
+
+def shutdown() -> None:
+	"""Write out queued spans and close this process's span file; the next trace starts a new one"""
+	with _exporter_lock:
+		if _exporter["pid"] != os.getpid():
+			return
+		_logger.removeHandler(_exporter["handler"])
+		_exporter["listener"].stop()
+		for handler in _exporter["listener"].handlers:
+			handler.close()
+		_exporter.update(pid=None, listener=None, handler=None)
+
+
+atexit.register(shutdown)
+
+
+# ----- request lifecycle -----
+
+def _before_request():
+	sample_rate = _resource_settings["sample_rate"]
+	if sample_rate < 1 and random.random() >= sample_rate:
+		return
+	match = TRACEPARENT.match(request.headers.get("traceparent", ""))
+	trace = Trace(match.group(1), match.group(2)) if match else Trace(secrets.token_hex(16), "")
+	rule = request.url_rule
+	route = rule.rule if rule is not None else "unmatched"
+	trace.root["name"] = f"{request.method} {route}"
+	trace.root["attributes"].update({
+		"http.request.method": request.method,
+		"http.route": route,
+		"url.path": request.path,
+		"url.query": request.query_string.decode("latin-1") or None,
+		"client.address": request.remote_addr,
+		"user_agent.original": request.user_agent.string or None,
+	})
+	_local.trace = trace
+
+
+def _after_request(response):
+	trace = current()
+	if trace is not None:
+		trace.root["attributes"]["http.response.status_code"] = response.status_code
+		if response.status_code >= 500:
+			trace.root["status"] = {"code": STATUS_ERROR}
+		response.headers["X-Trace-Id"] = trace.trace_id
+	return response
+
+
+def _teardown_request(exc):
+	trace = current()
+	if trace is None:
+		return
+	_local.trace = None
+	trace.end(trace.root, exc)
+	_ensure_exporter()
+	_logger.info(json.dumps(trace.export(), separators=(",", ":")))
+
+
+# ----- SQL -----
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	trace = current()
+	if trace is None or context is None:
+		return
+	operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+	# Kept on the execution context, which is discarded with the statement whether it succeeds or fails
+	context._trace_span = (trace, trace.start(
+		f"{operation} {conn.engine.url.database or conn.engine.dialect.name}",
+		SPAN_KIND_CLIENT,
+		**{
+			"db.system": conn.engine.dialect.name,
+			"db.operation.name": operation,
+			"db.query.text": statement[:MAX_STATEMENT],
+			"db.executemany": executemany or None,
+		},
+	))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	started = getattr(context, "_trace_span", None)
+	if started is not None:
+		context._trace_span = None
+		trace, sql_span = started
+		if cursor.rowcount is not None and cursor.rowcount >= 0:
+			sql_span["attributes"]["db.response.rows"] = cursor.rowcount
+		trace.end(sql_span)
+
+
+def _handle_error(context):
+	started = getattr(context.execution_context, "_trace_span", None)
+	if started is not None:
+		context.execution_context._trace_span = None
+		trace, sql_span = started
+		trace.end(sql_span, context.original_exception)
+
+
+# ----- JWT, serialization, JSON -----
+
+def _traced_jwt(verify):
+	def verify_jwt_in_request(*args, **kwargs):
+		with span("jwt.verify"):
+			return verify(*args, **kwargs)
+	verify_jwt_in_request.__wrapped__ = verify
+	return verify_jwt_in_request
+
+
+def _traced_to_dict(model: str, to_dict):
+	def traced(self, *args, **kwargs):
+		trace = current()
+		if trace is None:
+			return to_dict(self, *args, **kwargs)
+		started = time.time_ns()
+		try:
+			return to_dict(self, *args, **kwargs)
+		finally:
+			entry = trace.serialization.get(model)
+			if entry is None:
+				entry = trace.serialization[model] = [started, 0, 0]
+			entry[1] += time.time_ns() - started
+			entry[2] += 1
+	traced.__wrapped__ = to_dict
+	return traced
+
+
+def _traced_dumps(dumps):
+	def traced(obj, **kwargs):
+		with span("json.encode") as encode_span:
+			body = dumps(obj, **kwargs)
+			if encode_span is not None:
+				encode_span["attributes"]["json.bytes"] = len(body)
+			return body
+	traced.__wrapped__ = dumps
+	return traced
+
+
+
+def init_app(app: Flask, db) -> None:
+	"""Wire tracing into the request cycle, the db engine, JWT checks, to_dict and app.json"""
+	path = app.config.get("TRACE_FILE")
+	if not path:
+		return
+	_resource["service.name"] = app.config.get("TRACE_SERVICE_NAME", "ev-backend")
+	_resource_settings["sample_rate"] = float(app.config.get("TRACE_SAMPLE_RATE", 1.0))
+	settings = {
+		"path": path,
+		"max_bytes": app.config.get("TRACE_MAX_BYTES", 10 * 1024 * 1024),
+		"backup_count": app.config.get("TRACE_BACKUP_COUNT", 5),
+	}
+	if settings != _export_settings:
+		# The file is opened by the first traced request of each process, not here in the
+		# (possibly preforking) parent
+		shutdown()
+		_export_settings.update(settings)
+
+	app.before_request(_before_request)
+	app.after_request(_after_request)
+	app.teardown_request(_teardown_request)
+
+	with app.app_context():
+		engine = db.engine
+	if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+		event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+		event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+		event.listen(engine, "handle_error", _handle_error)
+
+	from flask_jwt_extended import view_decorators
+	if not hasattr(view_decorators.verify_jwt_in_request, "__wrapped__"):
+		view_decorators.verify_jwt_in_request = _traced_jwt(view_decorators.verify_jwt_in_request)
+
+	for mapper in db.Model.registry.mappers:
+		model = mapper.class_
+		to_dict = model.__dict__.get("to_dict")
+		if to_dict is not None and not hasattr(to_dict, "__wrapped__"):
+			model.to_dict = _traced_to_dict(model.__name__, to_dict)
+
+	if not hasattr(app.json.dumps, "__wrapped__"):
+		app.json.dumps = _traced_dumps(app.json.dumps)
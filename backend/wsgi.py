@@ -0,0 +1,5 @@
+"""WSGI entry point for production servers, e.g. `gunicorn backend.wsgi:app`"""
+from .app import create_app
+
+
+app = create_app()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Requests per second of /api/ports and /api/ports/<id>/available-slots over HTTP.
+Usage: python benchmarks/bench_serving.py [--servers dev,gunicorn] [--duration 10] [--concurrency 16]
+
+Starts each server as a subprocess against the DATABASE_URL in the
+environment and drives it with keep-alive client threads. "dev" is the
+Werkzeug server as `python -m backend.app` runs it (debug mode, threaded);
+"gunicorn" is `python -m backend.serve` with its default tuning profile.
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEV_SERVER = (
+	"import sys; from backend.app import create_app; "
+	"create_app().run(host='127.0.0.1', port=int(sys.argv[1]), debug=True, use_reloader=False)"
+)
+
+
+def free_port():
+	with socket.socket() as sock:
+		sock.bind(("127.0.0.1", 0))
+		return sock.getsockname()[1]
+
+
+def start(server, port, workers):
+	if server == "dev":
+		command = [sys.executable, "-c", DEV_SERVER, str(port)]
+	else:
+		command = [sys.executable, "-m", "backend.serve", "--bind", f"127.0.0.1:{port}"]
+		if workers:
+			command += ["--workers", str(workers)]
+	process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+	deadline = time.time() + 30
+	while time.time() < deadline:
+		try:
+			socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+			return process
+		except OSError:
+			time.sleep(0.2)
+	process.kill()
+	raise RuntimeError(f"{server} did not start on port {port}")
+
+
+def hammer(port, path, duration, concurrency):
+	counts = [0] * concurrency
+	errors = [0] * concurrency
+	deadline = time.perf_counter() + duration
+
+	def client(slot):
+		connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+		while time.perf_counter() < deadline:
+			try:
+				connection.request("GET", path)
+				response = connection.getresponse()
+				response.read()
+				if response.status == 200:
+					counts[slot] += 1
+				else:
+					errors[slot] += 1
+				if response.will_close:
+					connection.close()
+			except (OSError, http.client.HTTPException):
+				errors[slot] += 1
+				connection.close()
+		connection.close()
+
+	threads = [threading.Thread(target=client, args=(slot,)) for slot in range(concurrency)]
+	started = time.perf_counter()
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	elapsed = time.perf_counter() - started
+	return sum(counts) / elapsed, sum(errors)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--servers", default="dev,gunicorn")
+	parser.add_argument("--duration", type=float, default=10)
+	parser.add_argument("--concurrency", type=int, default=16)
+	parser.add_argument("--workers", type=int, default=0, help="gunicorn workers (default: the serve.py profile)")
+	parser.add_argument("--port-id", type=int, default=1)
+	parser.add_argument("--date", default=time.strftime("%Y-%m-%d"))
+	args = parser.parse_args()
+
+	paths = ["/api/ports", f"/api/ports/{args.port_id}/available-slots?date={args.date}"]
+	print(f"{args.concurrency} keep-alive clients, {args.duration:.0f}s per endpoint")
+	print(f"{'server':<10}{'endpoint':<44}{'req/s':>10}{'errors':>8}")
+	for server in args.servers.split(","):
+		port = free_port()
+		process = start(server, port, args.workers)
+		try:
+			for path in paths:
+				hammer(port, path, 1, args.concurrency)  # warm up pools and caches
+				rps, errors = hammer(port, path, args.duration, args.concurrency)
+				print(f"{server:<10}{path.split('?')[0]:<44}{rps:>10.0f}{errors:>8}")
+		finally:
+			process.terminate()
+			process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for serialization, slot generation and the heavy list routes.
+Usage: python benchmarks/bench_suite.py [--compare] [--save-baseline] [--filter slots]
+
+Seeds a throwaway SQLite database (sizes via --ports/--users/--bookings), or
+runs against DATABASE_URL as-is with --no-seed (e.g. a MySQL copy of
+production). Every run is appended to benchmarks/results/history.jsonl with the
+git commit and machine; --save-baseline stores it as baseline.json and
+--compare exits non-zero if any benchmark's median is more than --tolerance
+slower than the baseline (or the previous run when there is no baseline), or
+if a benchmark the reference has now fails or is missing.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta, time as dtime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS = os.path.join(ROOT, "benchmarks", "results")
+sys.path.insert(0, ROOT)
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+	"""Register setup(ctx) -> callable; only the returned callable is timed"""
+	def register(setup):
+		BENCHMARKS[name] = setup
+		return setup
+	return register
+
+
+# ========== BENCHMARKS ==========
+
+@benchmark("evport_to_dict")
+def bench_evport_to_dict(ctx):
+	from backend.models import EVPort
+	ports = EVPort.query.limit(500).all()
+	for port in ports:
+		port.schedules  # load outside the timed loop
+	return lambda: [port.to_dict(include_schedule=True) for port in ports]
+
+
+@benchmark("booking_to_dict")
+def bench_booking_to_dict(ctx):
+	from backend.models import Booking
+	bookings = Booking.query.limit(1000).all()
+	return lambda: [booking.to_dict() for booking in bookings]
+
+
+@benchmark("available_slots")
+def bench_available_slots(ctx):
+	client, port_id = ctx["client"], ctx["busy_port_id"]
+	return lambda: _get(client, f"/api/ports/{port_id}/available-slots")
+
+
+@benchmark("list_my_bookings")
+def bench_list_my_bookings(ctx):
+	client, headers = ctx["client"], ctx["user_headers"]
+	return lambda: _get(client, "/api/bookings", headers)
+
+
+@benchmark("list_users")
+def bench_list_users(ctx):
+	client, headers = ctx["client"], ctx["admin_headers"]
+	return lambda: _get(client, "/api/admin/users?limit=100", headers)
+
+
+@benchmark("list_ports")
+def bench_list_ports(ctx):
+	from backend import payload_cache
+	client = ctx["client"]
+
+	def cold():
+		# Query + encode on every call; list_ports_cached measures the pre-encoded hit
+		payload_cache.invalidate("ports")
+		return _get(client, "/api/ports")
+	return cold
+
+
+@benchmark("list_ports_cached")
+def bench_list_ports_cached(ctx):
+	client = ctx["client"]
+	_get(client, "/api/ports")
+	return lambda: _get(client, "/api/ports")
+
+
+def _get(client, url, headers=None):
+	response = client.get(url, headers=headers)
+	if response.status_code != 200:
+		raise RuntimeError(f"GET {url} returned {response.status_code}")
+	return response.data
+
+
+# ========== DATASET ==========
+
+def seed(db, ports, users, bookings, rng):
+	"""Bulk Core inserts: ports with weekly schedules, users, and bookings around today"""
+	from werkzeug.security import generate_password_hash
+	from backend.models import Booking, EVPort, EVPortSchedule, User
+
+	db.create_all()
+	cities = ["Beirut", "Tripoli", "Sidon", "Tyre", "Byblos", "Zahle", "Jounieh", "Baalbek"]
+	db.session.execute(db.insert(EVPort), [
+		{
+			"name": f"Station {i}",
+			"city": rng.choice(cities),
+			"address": f"{i} Main Street",
+			"latitude": 33.2 + rng.random() * 1.4,
+			"longitude": 35.1 + rng.random() * 1.2,
+			"connector_type": rng.choice(["CCS2", "Type 2", "CHAdeMO"]),
+			"power_kw": rng.choice([22.0, 50.0, 150.0]),
+			"is_active": True,
+		}
+		for i in range(1, ports + 1)
+	])
+	db.session.execute(db.insert(EVPortSchedule), [
+		{"port_id": port_id, "weekday": weekday, "open_time": dtime(8, 0), "close_time": dtime(22, 0)}
+		for port_id in range(1, ports + 1)
+		for weekday in range(7)
+	])
+	password = generate_password_hash("bench-password")
+	db.session.execute(db.insert(User), [
+		{"full_name": f"User {i}", "email": f"user{i}@bench.local", "password_hash": password, "is_admin": i == 1}
+		for i in range(1, users + 1)
+	])
+	today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+	rows = []
+	for i in range(bookings):
+		# Port 1 and user 2 are the busy ones the route benchmarks read
+		port_id = 1 if i % 10 == 0 else rng.randint(1, ports)
+		user_id = 2 if i % 20 == 0 else rng.randint(2, users)
+		start = today + timedelta(days=rng.randint(-60, 6), hours=rng.randint(8, 21))
+		rows.append({
+			"user_id": user_id,
+			"port_id": port_id,
+			"start_time": start,
+			"end_time": start + timedelta(hours=1),
+			"amount": 5.0,
+			"payment_status": rng.choice(["paid", "paid", "pending", "refunded"]),
+			"payment_method": "credit_card",
+			"created_at": start - timedelta(days=1),
+		})
+	for offset in range(0, len(rows), 5000):
+		db.session.execute(db.insert(Booking), rows[offset:offset + 5000])
+	db.session.commit()
+
+
+# ========== RUNNER ==========
+
+def measure(fn, repeat):
+	fn()  # warm caches and compiled statements
+	timer = timeit.Timer(fn)
+	number, _ = timer.autorange()
+	timings = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+	return {"median": statistics.median(timings), "min": min(timings), "number": number, "repeat": repeat}
+
+
+def git_commit():
+	try:
+		return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def load_reference():
+	baseline = os.path.join(RESULTS, "baseline.json")
+	if os.path.exists(baseline):
+		with open(baseline) as f:
+			return "baseline", json.load(f)
+	history = os.path.join(RESULTS, "history.jsonl")
+	if os.path.exists(history):
+		with open(history) as f:
+			lines = f.read().splitlines()
+		if lines:
+			return "previous run", json.loads(lines[-1])
+	return None, None
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--ports", type=int, default=2000)
+	parser.add_argument("--users", type=int, default=5000)
+	parser.add_argument("--bookings", type=int, default=50000)
+	parser.add_argument("--no-seed", action="store_true", help="benchmark DATABASE_URL as it is")
+	parser.add_argument("--repeat", type=int, default=7)
+	parser.add_argument("--filter", default="", help="only benchmarks whose name contains this")
+	parser.add_argument("--compare", action="store_true", help="exit 1 on regressions against the reference")
+	parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown of the median (0.15 = 15%%)")
+	parser.add_argument("--save-baseline", action="store_true")
+	args = parser.parse_args()
+
+	workdir = tempfile.mkdtemp()
+	if not args.no_seed:
+		os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "bench.db")
+	os.environ.setdefault("SLOW_QUERY_MS", "1000000")
+
+	from flask_jwt_extended import create_access_token
+	from backend.app import create_app
+	from backend.extensions import db
+	from backend.models import Booking, User
+
+	try:
+		app = create_app()
+		app.instance_path = workdir
+		with app.app_context():
+			if not args.no_seed:
+				seed(db, args.ports, args.users, args.bookings, random.Random(42))
+			admin = User.query.filter_by(is_admin=True).first()
+			busy_user = db.session.query(Booking.user_id).group_by(Booking.user_id).order_by(db.func.count().desc()).first()
+			busy_port = db.session.query(Booking.port_id).group_by(Booking.port_id).order_by(db.func.count().desc()).first()
+			ctx = {
+				"client": app.test_client(),
+				"admin_headers": {"Authorization": f"Bearer {create_access_token(identity=str(admin.id))}"},
+				"user_headers": {"Authorization": f"Bearer {create_access_token(identity=str(busy_user[0]))}"},
+				"busy_port_id": busy_port[0],
+			}
+
+			results, failures = {}, {}
+			print(f"{'benchmark':<20}{'median ms':>12}{'min ms':>12}{'loops':>8}")
+			for name, setup in BENCHMARKS.items():
+				if args.filter not in name:
+					continue
+				try:
+					result = measure(setup(ctx), args.repeat)
+				except Exception as e:
+					# e.g. a route that fails against the --no-seed database
+					print(f"{name:<20}  failed: {e}")
+					failures[name] = str(e)
+					db.session.rollback()
+					continue
+				results[name] = result
+				print(f"{name:<20}{result['median'] * 1000:>12.3f}{result['min'] * 1000:>12.3f}{result['number']:>8}")
+				db.session.rollback()
+
+		run = {
+			"at": datetime.now().isoformat(timespec="seconds"),
+			"commit": git_commit(),
+			"machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+			"database": "seeded sqlite" if not args.no_seed else db.engine.url.render_as_string(hide_password=True),
+			"dataset": None if args.no_seed else {"ports": args.ports, "users": args.users, "bookings": args.bookings},
+			"results": results,
+			"failures": failures,
+		}
+		label, reference = load_reference()
+		os.makedirs(RESULTS, exist_ok=True)
+		with open(os.path.join(RESULTS, "history.jsonl"), "a") as f:
+			f.write(json.dumps(run) + "\n")
+		if args.save_baseline:
+			with open(os.path.join(RESULTS, "baseline.json"), "w") as f:
+				json.dump(run, f, indent=2)
+			print("Saved as baseline")
+
+		if reference is None:
+			return
+		if reference.get("dataset") != run["dataset"]:
+			print(f"Note: {label} used dataset {reference.get('dataset')}, this run {run['dataset']}")
+		print(f"\nAgainst {label} ({reference.get('commit')}, {reference.get('at')}):")
+		regressions = []
+		for name in reference["results"]:
+			# A route that now errors or a benchmark that disappeared must not pass the gate
+			if args.filter in name and name not in results:
+				regressions.append(name)
+				print(f"{name:<20}{'FAILED' if name in failures else 'MISSING'}  REGRESSION")
+		for name, result in results.items():
+			before = reference["results"].get(name)
+			if before is None:
+				continue
+			change = result["median"] / before["median"] - 1
+			flag = ""
+			if change > args.tolerance:
+				flag = "  REGRESSION"
+				regressions.append(name)
+			print(f"{name:<20}{before['median'] * 1000:>12.3f} -> {result['median'] * 1000:.3f} ms ({change:+.1%}){flag}")
+		if args.compare and regressions:
+			print(f"\n{len(regressions)} benchmark(s) failing, missing or slower than {label} by more than {args.tolerance:.0%}")
+			sys.exit(1)
+	finally:
+		shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Throughput of /api/uploads/<filename> on the Python worker.
+Usage: python benchmarks/bench_uploads.py [--requests 2000]
+
+Compares a full 200 download (what every map popup paid before caching
+headers), a 304 revalidation, a byte-range request and the nginx
+X-Accel-Redirect mode where the worker only writes headers. A client
+holding an immutable content-hashed URL skips the request altogether.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from backend.app import create_app
+from backend.images import store_upload
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "instance", "uploads")
+
+
+def run(client, url, headers, requests):
+	started = time.perf_counter()
+	transferred = 0
+	for _ in range(requests):
+		response = client.get(url, headers=headers)
+		transferred += len(response.data)
+		response.close()
+	elapsed = time.perf_counter() - started
+	return requests / elapsed, transferred / elapsed / 1024 / 1024, response.status_code
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--requests", type=int, default=2000)
+	args = parser.parse_args()
+
+	instance = tempfile.mkdtemp()
+	try:
+		app = create_app()
+		app.instance_path = instance
+		upload_folder = os.path.join(instance, "uploads")
+		os.makedirs(upload_folder)
+		sample = max((os.path.join(SAMPLE, name) for name in os.listdir(SAMPLE)), key=os.path.getsize)
+		with open(sample, "rb") as source:
+			filename, _ = store_upload(source, upload_folder, sample.rsplit(".", 1)[1])
+		url = f"/api/uploads/{filename}"
+		client = app.test_client()
+		etag = client.get(url).headers["ETag"]
+
+		print(f"{os.path.getsize(sample) / 1024:.0f} KiB image, {args.requests} requests per scenario")
+		print(f"{'scenario':<28}{'req/s':>10}{'MiB/s':>10}{'status':>8}")
+		scenarios = [
+			("full download", {}),
+			("revalidate (If-None-Match)", {"If-None-Match": etag}),
+			("range (first 4 KiB)", {"Range": "bytes=0-4095"}),
+		]
+		for name, headers in scenarios:
+			rps, mibps, status = run(client, url, headers, args.requests)
+			print(f"{name:<28}{rps:>10.0f}{mibps:>10.1f}{status:>8}")
+
+		app.config["UPLOADS_ACCEL_MODE"] = "nginx"
+		rps, mibps, status = run(client, url, {}, args.requests)
+		print(f"{'nginx X-Accel-Redirect':<28}{rps:>10.0f}{mibps:>10.1f}{status:>8}")
+	finally:
+		shutil.rmtree(instance, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -2,6 +2,7 @@ import { useEffect, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { getAdminStats, getAdminPorts, createAdminPort, updateAdminPort, deleteAdminPort, getAdminUsers, updateAdminUser, getAdminBookings, getMe } from '../services/api'
 import LocationPicker from '../components/LocationPicker'
+import { portImageUrl } from '../services/images'
 
 export default function AdminPage() {
 	const navigate = useNavigate()
@@ -9,7 +10,12 @@ export default function AdminPage() {
 	const [stats, setStats] = useState(null)
 	const [ports, setPorts] = useState([])
 	const [users, setUsers] = useState([])
+	const [usersCursor, setUsersCursor] = useState(null)
+	const [usersSearch, setUsersSearch] = useState('')
 	const [bookings, setBookings] = useState([])
+	const [bookingsCursor, setBookingsCursor] = useState(null)
+	const [bookingsSummary, setBookingsSummary] = useState(null)
+	const [bookingsStatus, setBookingsStatus] = useState('')
 	const [loading, setLoading] = useState(true) // Start with loading true to prevent rendering before auth check
 	const [error, setError] = useState('')
 	const [user, setUser] = useState(null)
@@ -90,12 +96,16 @@ export default function AdminPage() {
 		}
 	}
 
-	const loadUsers = async () => {
+	const loadUsers = async ({ append = false } = {}) => {
 		setLoading(true)
 		setError('')
 		try {
-			const usersData = await getAdminUsers()
-			setUsers(usersData)
+			const usersData = await getAdminUsers({
+				q: usersSearch.trim() || undefined,
+				cursor: append ? usersCursor : undefined,
+			})
+			setUsers(prev => append ? [...prev, ...usersData.users] : usersData.users)
+			setUsersCursor(usersData.nextCursor)
 		} catch (err) {
 			setError(err.response?.data?.message || 'Failed to load users')
 		} finally {
@@ -103,12 +113,17 @@ export default function AdminPage() {
 		}
 	}
 
-	const loadBookings = async () => {
+	const loadBookings = async ({ append = false, paymentStatus = bookingsStatus } = {}) => {
 		setLoading(true)
 		setError('')
 		try {
-			const bookingsData = await getAdminBookings()
-			setBookings(bookingsData)
+			const bookingsData = await getAdminBookings({
+				paymentStatus: paymentStatus || undefined,
+				cursor: append ? bookingsCursor : undefined,
+			})
+			setBookings(prev => append ? [...prev, ...bookingsData.bookings] : bookingsData.bookings)
+			setBookingsCursor(bookingsData.nextCursor)
+			setBookingsSummary(bookingsData.summary)
 		} catch (err) {
 			setError(err.response?.data?.message || 'Failed to load bookings')
 		} finally {
@@ -699,6 +714,7 @@ export default function AdminPage() {
 								<thead>
 									<tr>
 										<th>ID</th>
+										<th>Image</th>
 										<th>Name</th>
 										<th>City</th>
 										<th>Location</th>
@@ -712,6 +728,11 @@ export default function AdminPage() {
 									{ports.map(port => (
 										<tr key={port.id}>
 											<td>{port.id}</td>
+											<td>
+												{portImageUrl(port, 'thumb') ? (
+													<img src={portImageUrl(port, 'thumb')} alt={port.name} className="admin-table-thumb" loading="lazy" />
+												) : 'N/A'}
+											</td>
 											<td>{port.name}</td>
 											<td>{port.city}</td>
 											<td>{port.latitude?.toFixed(4)}, {port.longitude?.toFixed(4)}</td>
@@ -746,6 +767,15 @@ export default function AdminPage() {
 					<div className="admin-users">
 						<div className="admin-section-header">
 							<h2>Users Management</h2>
+							<form onSubmit={(e) => { e.preventDefault(); loadUsers() }}>
+								<input
+									className="input"
+									type="search"
+									placeholder="Search by email or name..."
+									value={usersSearch}
+									onChange={(e) => setUsersSearch(e.target.value)}
+								/>
+							</form>
 						</div>
 						<div className="admin-table-container">
 							<table className="admin-table">
@@ -788,6 +818,11 @@ export default function AdminPage() {
 								</tbody>
 							</table>
 						</div>
+						{usersCursor && (
+							<button className="btn" onClick={() => loadUsers({ append: true })} disabled={loading}>
+								Load more
+							</button>
+						)}
 					</div>
 				)}
 
@@ -795,6 +830,23 @@ export default function AdminPage() {
 					<div className="admin-bookings">
 						<div className="admin-section-header">
 							<h2>Bookings Monitor</h2>
+							{bookingsSummary && (
+								<span>{bookingsSummary.total} bookings · ${bookingsSummary.revenue} revenue</span>
+							)}
+							<select
+								className="input"
+								value={bookingsStatus}
+								onChange={(e) => {
+									setBookingsStatus(e.target.value)
+									loadBookings({ paymentStatus: e.target.value })
+								}}
+							>
+								<option value="">All payments</option>
+								<option value="paid">Paid</option>
+								<option value="pending">Pending</option>
+								<option value="refunded">Refunded</option>
+								<option value="failed">Failed</option>
+							</select>
 						</div>
 						<div className="admin-table-container">
 							<table className="admin-table">
@@ -834,6 +886,11 @@ export default function AdminPage() {
 								</tbody>
 							</table>
 						</div>
+						{bookingsCursor && (
+							<button className="btn" onClick={() => loadBookings({ append: true })} disabled={loading}>
+								Load more
+							</button>
+						)}
 					</div>
 				)}
 			</div>
@@ -2,8 +2,9 @@ import { MapContainer, TileLayer, Marker, Popup } from 'react-leaflet'
 import L from 'leaflet'
 import 'leaflet/dist/leaflet.css'
 import { useEffect, useMemo, useState } from 'react'
-import { fetchPorts, getPort, addFavorite, removeFavorite, getFavorites } from '../services/api'
+import { fetchPorts, getPort, addFavorite, removeFavorite, getFavoriteIds } from '../services/api'
 import BookingModal from '../components/BookingModal'
+import { portImageUrl } from '../services/images'
 
 // Fix default icon paths for Leaflet on bundlers
 delete L.Icon.Default.prototype._getIconUrl
@@ -37,9 +38,8 @@ export default function MapPage({ user }) {
 			return
 		}
 		try {
-			const favoritePorts = await getFavorites()
-			const favoriteIds = new Set(favoritePorts.map(p => p.id))
-			setFavorites(favoriteIds)
+			const favoriteIds = await getFavoriteIds()
+			setFavorites(new Set(favoriteIds))
 		} catch (err) {
 			console.error('Failed to load favorites:', err)
 			setFavorites(new Set())
@@ -159,6 +159,17 @@ export default function MapPage({ user }) {
 						<Marker key={p.id} position={[p.latitude, p.longitude]}>
 							<Popup onOpen={() => handlePopupOpen(p)}>
 								<div className="port-popup">
+									{portImageUrl(p, 'small') && (
+										<img
+											src={portImageUrl(p, 'small')}
+											alt={p.name}
+											className="port-popup-image"
+											loading="lazy"
+											onError={(e) => {
+												e.target.style.display = 'none'
+											}}
+										/>
+									)}
 									<div className="port-popup-header">
 										<div className="port-popup-icon">
 											<svg width="24" height="24" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
@@ -1,5 +1,6 @@
 import { useEffect, useState, useMemo } from 'react'
 import { fetchPorts, getPort, addFavorite, removeFavorite, getFavorites } from '../services/api'
+import { portImageUrl } from '../services/images'
 import { useNavigate } from 'react-router-dom'
 
 const WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
@@ -138,13 +139,10 @@ export default function PortsPage({ user }) {
 	}
 
 	const getPortImage = (port) => {
-		// Use actual image URL if available, otherwise use placeholder
-		if (port.imageUrl) {
-			// If it's a relative URL, make it absolute
-			if (port.imageUrl.startsWith('/')) {
-				return port.imageUrl
-			}
-			return port.imageUrl
+		// Prefer the resized variant over the full-size upload
+		const imageUrl = portImageUrl(port, 'small')
+		if (imageUrl) {
+			return imageUrl
 		}
 		// Generate a placeholder image URL based on port data
 		const colors = ['4f8cff', '10b981', 'f59e0b', 'ef4444', '8b5cf6']
@@ -86,6 +86,11 @@ export async function getFavorites() {
 	return data.ports
 }
 
+export async function getFavoriteIds() {
+	const { data } = await api.get('/favorites/ids')
+	return data.portIds
+}
+
 export async function addFavorite(portId) {
 	const { data } = await api.post(`/favorites/${portId}`)
 	return data.favorite || data
@@ -95,6 +100,11 @@ export async function removeFavorite(portId) {
 	await api.delete(`/favorites/${portId}`)
 }
 
+export async function syncFavorites({ portIds, operations }) {
+	const { data } = await api.put('/favorites', portIds ? { portIds } : { operations })
+	return data
+}
+
 export async function checkFavorite(portId) {
 	const { data } = await api.get(`/favorites/check/${portId}`)
 	return data.isFavorite
@@ -145,9 +155,9 @@ export async function deleteAdminPort(portId) {
 	await api.delete(`/admin/ports/${portId}`)
 }
 
-export async function getAdminUsers() {
-	const { data } = await api.get('/admin/users')
-	return data.users
+export async function getAdminUsers({ q, cursor, limit } = {}) {
+	const { data } = await api.get('/admin/users', { params: { q, cursor, limit } })
+	return data
 }
 
 export async function updateAdminUser(userId, userData) {
@@ -155,9 +165,9 @@ export async function updateAdminUser(userId, userData) {
 	return data.user
 }
 
-export async function getAdminBookings() {
-	const { data } = await api.get('/admin/bookings')
-	return data.bookings
+export async function getAdminBookings(params = {}) {
+	const { data } = await api.get('/admin/bookings', { params })
+	return data
 }
 
 export async function adminLogin({ email, password }) {
@@ -0,0 +1,8 @@
+// Resized WebP variant of a port image ('thumb' 160px, 'small' 480px, 'medium' 1024px
+// wide), falling back to the original upload; null when the port has no image
+export function portImageUrl(port, variant = 'small') {
+	if (port.imageVariants) {
+		return port.imageVariants[variant].webp
+	}
+	return port.imageUrl || null
+}
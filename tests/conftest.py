@@ -0,0 +1,90 @@
+import os
+import sys
+
+import pytest
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import analytics, dashboard_stats, payload_cache, popularity
+from backend.app import create_app
+from backend.config import Config
+from backend.extensions import db
+from backend.models import EVPort, User
+
+
+def _reset_caches() -> None:
+	"""Module-level caches outlive an app; start every test from an empty process state"""
+	popularity.invalidate()
+	with dashboard_stats._lock:
+		dashboard_stats._stats.clear()
+		dashboard_stats._loaded_at = None
+		dashboard_stats._next_expiry = None
+	analytics.invalidate_demand_grids()
+	with analytics._cache_lock:
+		analytics._cache.clear()
+	with payload_cache._lock:
+		payload_cache._entries.clear()
+
+
+@pytest.fixture
+def app(tmp_path):
+	class TestConfig(Config):
+		TESTING = True
+		SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+		TRACE_FILE = ""
+		JWT_SECRET_KEY = "test-jwt-secret-key-long-enough-for-hs256"
+
+	_reset_caches()
+	app = create_app(TestConfig)
+	with app.app_context():
+		db.create_all()
+		yield app
+		db.session.remove()
+		db.engine.dispose()
+	_reset_caches()
+
+
+@pytest.fixture
+def client(app):
+	return app.test_client()
+
+
+def _user(email: str, is_admin: bool = False) -> User:
+	user = User(email=email, full_name=email.split("@")[0].title(), password_hash=generate_password_hash("x"), is_admin=is_admin)
+	db.session.add(user)
+	db.session.commit()
+	return user
+
+
+@pytest.fixture
+def user(app) -> User:
+	return _user("user@example.com")
+
+
+@pytest.fixture
+def admin(app) -> User:
+	return _user("admin@example.com", is_admin=True)
+
+
+@pytest.fixture
+def user_headers(user) -> dict:
+	return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+@pytest.fixture
+def admin_headers(admin) -> dict:
+	return {"Authorization": f"Bearer {create_access_token(identity=str(admin.id))}"}
+
+
+@pytest.fixture
+def make_port(app):
+	def make(**fields) -> EVPort:
+		values = {"name": "Port", "city": "Beirut", "latitude": 33.89, "longitude": 35.50, **fields}
+		port = EVPort(**values)
+		db.session.add(port)
+		db.session.commit()
+		return port
+	return make
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from backend.extensions import db
+from backend.models import Booking
+
+
+@pytest.fixture
+def bookings(app, user, make_port):
+	"""Twelve bookings two hours apart; several share a start time to exercise the id tie-breaker"""
+	port = make_port()
+	start = datetime(2030, 3, 1, 8, 0)
+	rows = []
+	for i in range(12):
+		begin = start + timedelta(hours=2 * (i // 2))
+		rows.append({
+			"user_id": user.id,
+			"port_id": port.id,
+			"start_time": begin,
+			"end_time": begin + timedelta(hours=1),
+			"amount": float(i % 3),
+			"payment_status": ("paid", "pending", "refunded")[i % 3],
+		})
+	db.session.execute(insert(Booking), rows)
+	db.session.commit()
+	return port
+
+
+def _pages(client, headers, **params) -> list:
+	seen, cursor = [], None
+	while True:
+		query = {**params, **({"cursor": cursor} if cursor else {})}
+		body = client.get("/api/admin/bookings", query_string=query, headers=headers).get_json()
+		seen.append(body["bookings"])
+		cursor = body["nextCursor"]
+		if cursor is None:
+			return seen
+
+
+@pytest.mark.parametrize("sort", ["startTime", "-startTime", "amount", "-amount", "createdAt"])
+def test_cursor_pages_cover_every_booking_once_in_order(client, admin_headers, bookings, sort):
+	pages = _pages(client, admin_headers, sort=sort, limit=5)
+	assert [len(page) for page in pages] == [5, 5, 2]
+	ids = [b["id"] for page in pages for b in page]
+	assert sorted(ids) == sorted(b.id for b in Booking.query.all())
+
+	key = {"startTime": "startTime", "amount": "amount", "createdAt": "createdAt"}[sort.lstrip("-")]
+	values = [(b[key], b["id"]) for page in pages for b in page]
+	assert values == sorted(values, reverse=sort.startswith("-"))
+
+
+def test_invalid_cursor_and_sort_are_rejected(client, admin_headers, bookings):
+	assert client.get("/api/admin/bookings?cursor=not-a-cursor", headers=admin_headers).status_code == 400
+	assert client.get("/api/admin/bookings?sort=port", headers=admin_headers).status_code == 400
+
+
+def test_summary_counts_whole_filter(client, admin_headers, bookings):
+	body = client.get("/api/admin/bookings?limit=2", headers=admin_headers).get_json()
+	assert body["summary"]["total"] == 12
+	assert body["summary"]["byStatus"] == {
+		"paid": {"count": 4, "amount": 0.0},
+		"pending": {"count": 4, "amount": 4.0},
+		"refunded": {"count": 4, "amount": 8.0},
+	}
+	assert body["summary"]["revenue"] == 0.0
+
+
+def test_null_status_counts_as_pending(client, admin_headers, user, make_port, monkeypatch):
+	# Databases migrated with add_payment_columns.py have a nullable payment_status
+	monkeypatch.setattr(Booking.__table__.c.payment_status, "nullable", True)
+	Booking.__table__.drop(db.engine)
+	Booking.__table__.create(db.engine)
+	port = make_port()
+	start = datetime(2030, 3, 1, 8, 0)
+	# Core insert on the table: the ORM would substitute the Python default for None
+	db.session.execute(Booking.__table__.insert(), [
+		{"user_id": user.id, "port_id": port.id, "start_time": start + timedelta(hours=i), "end_time": start + timedelta(hours=i, minutes=30), "amount": 5.0, "payment_status": status}
+		for i, status in enumerate([None, None, "pending", "paid"])
+	])
+	db.session.commit()
+
+	summary = client.get("/api/admin/bookings", headers=admin_headers).get_json()["summary"]
+	assert summary["byStatus"]["pending"] == {"count": 3, "amount": 15.0}
+	assert summary["total"] == 4
+
+	pending = client.get("/api/admin/bookings?paymentStatus=pending", headers=admin_headers).get_json()
+	assert len(pending["bookings"]) == 3
+	assert pending["summary"]["byStatus"] == {"pending": {"count": 3, "amount": 15.0}}
@@ -0,0 +1,46 @@
+from sqlalchemy import insert
+
+from backend.extensions import db
+from backend.models import Favorite, User
+
+
+def _pages(client, headers, **params) -> list:
+	pages, cursor = [], None
+	while True:
+		query = {**params, **({"cursor": cursor} if cursor else {})}
+		body = client.get("/api/admin/users", query_string=query, headers=headers).get_json()
+		pages.append(body["users"])
+		cursor = body["nextCursor"]
+		if cursor is None:
+			return pages
+
+
+def test_cursor_pages_cover_every_user_once(client, admin_headers):
+	db.session.execute(insert(User), [
+		{"email": f"driver{i}@example.com", "full_name": f"Driver {i}", "password_hash": "x"}
+		for i in range(11)
+	])
+	db.session.commit()
+	pages = _pages(client, admin_headers, limit=5)
+	assert [len(page) for page in pages] == [5, 5, 2]
+	ids = [user["id"] for page in pages for user in page]
+	assert ids == sorted((user.id for user in User.query.all()), reverse=True)
+
+
+def test_search_is_a_prefix_match_on_email_or_name(client, admin_headers, user):
+	db.session.add(User(email="zed@example.com", full_name="100%_Zed", password_hash="x"))
+	db.session.commit()
+	emails = lambda q: sorted(u["email"] for page in _pages(client, admin_headers, q=q) for u in page)
+	assert emails("USER@") == ["user@example.com"]
+	assert emails("100%_") == ["zed@example.com"]
+	# LIKE wildcards in the search are literal
+	assert emails("%") == []
+	assert emails("example") == []
+
+
+def test_counts_are_per_user(client, admin_headers, user, make_port):
+	port = make_port()
+	db.session.add(Favorite(user_id=user.id, port_id=port.id))
+	db.session.commit()
+	[row] = _pages(client, admin_headers, q="user@")[0]
+	assert (row["bookingsCount"], row["favoritesCount"], row["subscriptionsCount"]) == (0, 1, 0)
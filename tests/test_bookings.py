@@ -0,0 +1,20 @@
+from datetime import datetime, timedelta
+
+from backend.extensions import db
+from backend.models import Booking
+
+
+def test_list_my_bookings_on_sqlite(client, user, user_headers, make_port):
+	# SQLite has no information_schema, so the route takes its raw-SQL path
+	port = make_port()
+	start = datetime(2030, 5, 4, 10, 0)
+	db.session.add(Booking(user_id=user.id, port_id=port.id, start_time=start, end_time=start + timedelta(minutes=90)))
+	db.session.commit()
+
+	response = client.get("/api/bookings", headers=user_headers)
+	assert response.status_code == 200
+	[booking] = response.get_json()["bookings"]
+	assert booking["startTime"] == "2030-05-04T10:00:00"
+	assert booking["endTime"] == "2030-05-04T11:30:00"
+	assert booking["amount"] == 7.5
+	assert booking["port"]["id"] == port.id
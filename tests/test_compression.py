@@ -0,0 +1,63 @@
+import gzip
+
+import pytest
+
+from backend import compression
+
+
+@pytest.fixture
+def catalog(make_port):
+	for i in range(40):
+		make_port(name=f"Port {i}", address=f"Street {i}")
+
+
+def test_gzip_body_matches_identity(client, catalog):
+	plain = client.get("/api/ports", headers={"Accept-Encoding": "identity"})
+	assert "Content-Encoding" not in plain.headers
+	assert plain.headers["Vary"] == "Accept-Encoding"
+	packed = client.get("/api/ports", headers={"Accept-Encoding": "gzip"})
+	assert packed.headers["Content-Encoding"] == "gzip"
+	assert gzip.decompress(packed.data) == plain.data
+
+
+def test_negotiation_follows_quality_values(client, catalog):
+	pytest.importorskip("brotli")
+
+	def coding(accept):
+		return client.get("/api/ports", headers={"Accept-Encoding": accept}).headers.get("Content-Encoding")
+
+	assert coding("gzip, br") == "br"
+	assert coding("gzip;q=1.0, br;q=0.5") == "gzip"
+	assert coding("br;q=0, gzip;q=0") is None
+	assert coding("deflate") is None
+
+
+def test_brotli_missing_falls_back_to_gzip(client, catalog, monkeypatch):
+	monkeypatch.setattr(compression, "brotli", None)
+	response = client.get("/api/ports", headers={"Accept-Encoding": "br, gzip"})
+	assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_compressed_etag_is_weak_and_still_revalidates(client, catalog):
+	brotli = pytest.importorskip("brotli")
+	first = client.get("/api/ports", headers={"Accept-Encoding": "br"})
+	assert brotli.decompress(first.data).startswith(b'{"ports"')
+	etag = first.headers["ETag"]
+	assert etag.startswith("W/")
+	again = client.get("/api/ports", headers={"Accept-Encoding": "br", "If-None-Match": etag})
+	assert again.status_code == 304
+
+
+def test_cached_payload_is_compressed_once(client, catalog):
+	with compression._lock:
+		before = compression._stats.get("gzip", [0, 0, 0, 0.0, 0])[4]
+	for _ in range(3):
+		client.get("/api/ports", headers={"Accept-Encoding": "gzip"})
+	with compression._lock:
+		assert compression._stats["gzip"][4] - before == 2
+
+
+def test_small_responses_are_left_alone(client, make_port):
+	make_port()
+	response = client.get("/api/ports", headers={"Accept-Encoding": "gzip"})
+	assert "Content-Encoding" not in response.headers
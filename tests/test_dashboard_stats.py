@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from backend import dashboard_stats
+from backend.extensions import db
+from backend.models import SubscriptionPlan, UserSubscription
+
+
+def _stats(client, headers) -> dict:
+	return client.get("/api/admin/stats", headers=headers).get_json()["stats"]
+
+
+def test_subscription_drops_out_when_it_expires(client, admin_headers, user, monkeypatch):
+	plan = SubscriptionPlan(name="Weekly", plan_type="weekly", booking_limit=3, price=5.0)
+	db.session.add(plan)
+	db.session.flush()
+	now = datetime.utcnow()
+	subscription = UserSubscription(user_id=user.id, plan_id=plan.id, start_date=now, end_date=now + timedelta(days=1))
+	db.session.add_all([
+		subscription,
+		UserSubscription(user_id=user.id, plan_id=plan.id, start_date=now - timedelta(days=8), end_date=now - timedelta(days=1)),
+	])
+	db.session.commit()
+	assert _stats(client, admin_headers)["activeSubscriptions"] == 1
+
+	# The end_date passes without any write, well inside DASHBOARD_STATS_CACHE_TTL
+	class Later(datetime):
+		@classmethod
+		def utcnow(cls):
+			return subscription.end_date + timedelta(seconds=1)
+
+	monkeypatch.setattr(dashboard_stats, "datetime", Later)
+	assert _stats(client, admin_headers)["activeSubscriptions"] == 0
+
+
+def test_subscribe_replacing_an_expired_subscription(client, admin_headers, user, user_headers):
+	plan = SubscriptionPlan(name="Monthly", plan_type="monthly", booking_limit=10, price=20.0)
+	db.session.add(plan)
+	db.session.flush()
+	now = datetime.utcnow()
+	db.session.add(UserSubscription(user_id=user.id, plan_id=plan.id, start_date=now - timedelta(days=40), end_date=now - timedelta(days=10)))
+	db.session.commit()
+	assert _stats(client, admin_headers)["activeSubscriptions"] == 0
+
+	assert client.post("/api/subscriptions/subscribe", json={"planId": plan.id}, headers=user_headers).status_code == 201
+	assert _stats(client, admin_headers)["activeSubscriptions"] == 1
+	assert dashboard_stats._next_expiry is not None
+
+
+def test_booking_windows_use_utc(app, user, make_port):
+	dashboard_stats.get_stats()
+	now = datetime.utcnow()
+	dashboard_stats.record_booking(now, 1)
+	dashboard_stats.record_booking(now - timedelta(days=8), 1)
+	db.session.commit()
+	stats = dict(dashboard_stats._stats)
+	assert stats["totalBookings"] == 2
+	assert stats["todayBookings"] == 1
+	assert stats["recentBookings"] == 1
+
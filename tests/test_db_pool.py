@@ -0,0 +1,41 @@
+from backend import db_pool
+from backend.app import create_app
+from backend.config import Config
+from backend.extensions import db
+
+
+def _config(uri: str) -> dict:
+	config = {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+	config["SQLALCHEMY_DATABASE_URI"] = uri
+	return config
+
+
+def test_mysql_uri_gets_sized_timed_queue_pool():
+	options = db_pool.engine_options(_config("mysql+pymysql://ev_user:pw@127.0.0.1/ev_db"))
+	assert options["poolclass"] is db_pool.TimedQueuePool
+	assert options["pool_size"] == Config.DB_POOL_SIZE
+	assert options["pool_recycle"] == Config.DB_POOL_RECYCLE
+
+
+def test_sqlite_uri_gets_pre_ping_only():
+	assert db_pool.engine_options(_config("sqlite://")) == {"pool_pre_ping": Config.DB_POOL_PRE_PING}
+
+
+def test_subclass_pointing_at_sqlite_does_not_inherit_queue_pool(tmp_path):
+	class SqliteConfig(Config):
+		SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'pool.db'}"
+
+	app = create_app(SqliteConfig)
+	assert "poolclass" not in app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+	with app.app_context():
+		assert not isinstance(db.engine.pool, db_pool.TimedQueuePool)
+		db.engine.dispose()
+
+
+def test_explicit_engine_options_are_kept(tmp_path):
+	class CustomConfig(Config):
+		SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'pool.db'}"
+		SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": False}
+
+	app = create_app(CustomConfig)
+	assert app.config["SQLALCHEMY_ENGINE_OPTIONS"] == {"pool_pre_ping": False}
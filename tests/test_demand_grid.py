@@ -0,0 +1,90 @@
+from sqlalchemy import inspect
+
+from backend import add_booking_conflicts_table, analytics
+from backend.extensions import db
+from backend.models import BookingConflict, EVPort
+
+
+def _ports(grid: dict) -> int:
+	return sum(tile["ports"] for tile in grid["tiles"])
+
+
+def _bookings(grid: dict) -> int:
+	return sum(tile["bookings"] for tile in grid["tiles"])
+
+
+def test_port_change_invalidates_only_after_commit(app, make_port):
+	make_port()
+	assert _ports(analytics.demand_grid(5.0)) == 1
+
+	db.session.add(EVPort(name="New", city="Beirut", latitude=33.9, longitude=35.5))
+	analytics.record_port_change()
+	db.session.flush()
+	assert 5.0 in analytics._grids
+	db.session.commit()
+	assert 5.0 not in analytics._grids
+	assert _ports(analytics.demand_grid(5.0)) == 2
+
+
+def test_rolled_back_port_change_keeps_grid(app, make_port):
+	make_port()
+	analytics.demand_grid(5.0)
+	analytics.record_port_change()
+	db.session.rollback()
+	db.session.commit()
+	assert 5.0 in analytics._grids
+
+
+def test_rebuild_racing_an_invalidation_is_not_cached(app, make_port, monkeypatch):
+	make_port()
+	build = analytics._build_demand_grid
+
+	def build_while_a_port_commits(cell_km):
+		grid = build(cell_km)
+		analytics.invalidate_demand_grids()
+		return grid
+
+	monkeypatch.setattr(analytics, "_build_demand_grid", build_while_a_port_commits)
+	assert _ports(analytics.demand_grid(5.0)) == 1
+	assert 5.0 not in analytics._grids
+
+
+def test_booking_deltas_apply_on_commit_only(app, make_port):
+	port = make_port()
+	analytics.demand_grid(5.0)
+	analytics.record_demand(port.id, bookings=1)
+	db.session.rollback()
+	assert _bookings(analytics.demand_grid(5.0)) == 0
+	analytics.record_demand(port.id, bookings=1, conflicts=1)
+	db.session.commit()
+	grid = analytics.demand_grid(5.0)
+	assert _bookings(grid) == 1
+	assert sum(tile["conflicts"] for tile in grid["tiles"]) == 1
+
+
+def test_admin_port_create_and_delete_rebuild_grid(client, admin_headers, make_port):
+	make_port()
+	url = "/api/admin/analytics/demand-grid?cellKm=5"
+	assert _ports(client.get(url, headers=admin_headers).get_json()) == 1
+
+	created = client.post("/api/admin/ports", json={"name": "North", "city": "Tripoli", "latitude": 34.43, "longitude": 35.84}, headers=admin_headers)
+	assert created.status_code == 201
+	assert _ports(client.get(url, headers=admin_headers).get_json()) == 2
+
+	port_id = created.get_json()["port"]["id"]
+	assert client.delete(f"/api/admin/ports/{port_id}", headers=admin_headers).status_code == 200
+	assert _ports(client.get(url, headers=admin_headers).get_json()) == 1
+
+
+def test_migration_creates_conflicts_table(app, client, admin_headers, monkeypatch):
+	BookingConflict.__table__.drop(db.engine)
+	monkeypatch.setattr(add_booking_conflicts_table, "create_app", lambda: app)
+	add_booking_conflicts_table.add_booking_conflicts_table()
+	assert {index["name"] for index in inspect(db.engine).get_indexes("booking_conflicts")} == {
+		"ix_booking_conflicts_port_id",
+		"ix_booking_conflicts_created_at",
+	}
+	assert client.get("/api/admin/analytics/demand-grid?cellKm=5", headers=admin_headers).status_code == 200
+
+	# Running it again is a no-op
+	add_booking_conflicts_table.add_booking_conflicts_table()
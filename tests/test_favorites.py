@@ -0,0 +1,37 @@
+import pytest
+
+from backend.models import Favorite
+
+
+def test_sync_replaces_favorites(client, user_headers, make_port):
+	one, two = make_port(name="One"), make_port(name="Two")
+	assert client.put("/api/favorites", json={"portIds": [one.id]}, headers=user_headers).status_code == 200
+	body = client.put("/api/favorites", json={"portIds": [two.id, 999]}, headers=user_headers).get_json()
+	assert body == {"portIds": [two.id], "added": [two.id], "removed": [one.id], "ignored": [999]}
+
+
+def test_sync_replays_operations(client, user_headers, make_port):
+	one, two = make_port(name="One"), make_port(name="Two")
+	operations = [{"op": "add", "portId": one.id}, {"op": "add", "portId": two.id}, {"op": "remove", "portId": one.id}]
+	body = client.put("/api/favorites", json={"operations": operations}, headers=user_headers).get_json()
+	assert body["portIds"] == [two.id]
+	assert Favorite.query.count() == 1
+
+
+@pytest.mark.parametrize("payload", [
+	["portIds"],
+	{"portIds": "12"},
+	{"portIds": {"1": True}},
+	{"portIds": ["one"]},
+	{"operations": "add"},
+	{"operations": [1]},
+	{"operations": [None]},
+	{"operations": [{"op": "add"}]},
+	{"operations": [{"op": "toggle", "portId": 1}]},
+	{},
+])
+def test_sync_rejects_malformed_payloads(client, user_headers, make_port, payload):
+	make_port()
+	response = client.put("/api/favorites", json=payload, headers=user_headers)
+	assert response.status_code == 400
+	assert Favorite.query.count() == 0
@@ -0,0 +1,37 @@
+import tracemalloc
+
+import pytest
+
+from backend import memory_profile
+
+
+@pytest.fixture
+def tracing(app):
+	yield
+	memory_profile.stop()
+
+
+def test_restart_with_other_frames_conflicts(client, admin_headers, tracing):
+	assert client.post("/api/admin/memory/start", json={"frames": 2}, headers=admin_headers).status_code == 200
+	assert client.post("/api/admin/memory/start", json={"frames": 2}, headers=admin_headers).status_code == 200
+	response = client.post("/api/admin/memory/start", json={"frames": 5}, headers=admin_headers)
+	assert response.status_code == 409
+	assert tracemalloc.get_traceback_limit() == 2
+
+	client.post("/api/admin/memory/stop", headers=admin_headers)
+	response = client.post("/api/admin/memory/start", json={"frames": 5}, headers=admin_headers)
+	assert response.get_json()["frames"] == 5
+
+
+def test_routes_report_retained_bytes(client, admin_headers, tracing, make_port):
+	make_port()
+	client.post("/api/admin/memory/start", headers=admin_headers)
+	first = client.post("/api/admin/memory/snapshots", headers=admin_headers).get_json()["id"]
+	client.get("/api/ports")
+	second = client.post("/api/admin/memory/snapshots", headers=admin_headers).get_json()["id"]
+
+	routes = client.get(f"/api/admin/memory/diff?from={first}&to={second}", headers=admin_headers).get_json()["routes"]
+	assert routes["GET /api/ports"]["requests"] == 1
+	assert set(routes["GET /api/ports"]) == {"requests", "retainedBytes"}
+	status = client.get("/api/admin/memory", headers=admin_headers).get_json()
+	assert set(status["routes"]["GET /api/ports"]) == {"requests", "retainedBytes", "maxRetainedBytes"}
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from backend.models import EVPort
+
+DIGEST = "a" * 64
+
+
+def test_models_and_images_import_without_pillow():
+	# Pillow is loaded only when variants are rendered
+	code = "import sys, backend.models, backend.images; sys.exit('PIL' in sys.modules)"
+	root = Path(__file__).resolve().parent.parent
+	assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 0
+
+
+def test_port_dict_lists_variants_for_content_addressed_uploads():
+	port = EVPort(id=1, name="Port", city="Beirut", latitude=33.9, longitude=35.5, image_url=f"/api/uploads/{DIGEST}.png")
+	variants = port.to_dict()["imageVariants"]
+	assert variants["thumb"]["webp"] == f"/api/uploads/{DIGEST}.thumb.webp"
+	assert EVPort(id=2, name="Port", city="Beirut", latitude=0, longitude=0, image_url="https://example.com/x.png").to_dict()["imageVariants"] is None
@@ -0,0 +1,73 @@
+import io
+
+from backend import payload_cache
+from backend.extensions import db
+from backend.models import EVPort
+
+
+def _names(response) -> list:
+	return sorted(port["name"] for port in response.get_json()["ports"])
+
+
+def test_etag_and_304(client, make_port):
+	make_port(name="A")
+	first = client.get("/api/ports")
+	assert first.headers["Cache-Control"] == "no-cache"
+	second = client.get("/api/ports", headers={"If-None-Match": first.headers["ETag"]})
+	assert second.status_code == 304
+
+
+def test_orm_port_change_drops_cache_after_commit(client, make_port):
+	port = make_port(name="A")
+	etag = client.get("/api/ports").headers["ETag"]
+
+	port.name = "B"
+	db.session.flush()
+	assert client.get("/api/ports", headers={"If-None-Match": etag}).status_code == 304
+	db.session.commit()
+	response = client.get("/api/ports", headers={"If-None-Match": etag})
+	assert response.status_code == 200
+	assert _names(response) == ["B"]
+
+
+def test_core_write_dropped_after_commit_only(client, make_port):
+	make_port(name="A")
+	client.get("/api/ports")
+	db.session.execute(EVPort.__table__.insert(), [{"name": "Core", "city": "Beirut", "latitude": 1.0, "longitude": 2.0}])
+	payload_cache.record_change("ports")
+	assert _names(client.get("/api/ports")) == ["A"]
+	db.session.commit()
+	assert _names(client.get("/api/ports")) == ["A", "Core"]
+
+
+def test_rolled_back_change_keeps_cache(client, make_port):
+	make_port(name="A")
+	client.get("/api/ports")
+	payload_cache.record_change("ports")
+	db.session.rollback()
+	assert any(key[0] == "ports" for key in payload_cache._entries)
+
+
+def test_body_built_across_an_invalidation_is_not_cached(app, make_port):
+	make_port(name="A")
+
+	def build():
+		payload_cache.invalidate("ports")
+		return {"ports": []}
+
+	entry = payload_cache.get_or_build(("ports", None), build)
+	assert entry["body"] == b'{"ports":[]}\n'
+	assert not any(key[0] == "ports" for key in payload_cache._entries)
+
+
+def test_import_refreshes_port_list(client, admin_headers, make_port):
+	make_port(name="A")
+	client.get("/api/ports")
+	csv_body = b"name,city,latitude,longitude\nImported,Beirut,33.8,35.4\n"
+	response = client.post(
+		"/api/admin/ports/import?dedupe=off",
+		data={"file": (io.BytesIO(csv_body), "ports.csv")},
+		headers=admin_headers,
+	)
+	assert response.status_code == 201
+	assert _names(client.get("/api/ports")) == ["A", "Imported"]
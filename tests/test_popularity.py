@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import mysql
+
+from backend import add_port_popularity_table, popularity
+from backend.extensions import db
+from backend.models import Booking, Favorite, PortPopularity
+from backend.routes.bookings import record_booking_change
+
+
+def _counts(port_id: int) -> tuple[int, int] | None:
+	db.session.expire_all()
+	row = db.session.get(PortPopularity, port_id)
+	return (row.favorites_count, row.bookings_count) if row else None
+
+
+def _book(user, port, payment_status: str) -> Booking:
+	start = datetime.utcnow() + timedelta(days=1)
+	booking = Booking(user_id=user.id, port_id=port.id, start_time=start, end_time=start + timedelta(hours=1), payment_status=payment_status)
+	db.session.add(booking)
+	record_booking_change(port.id, start, 1)
+	db.session.commit()
+	return booking
+
+
+def test_first_bump_creates_row_and_later_bumps_increment(app, make_port):
+	port = make_port()
+	popularity.record_favorites(port.id, 1)
+	db.session.commit()
+	popularity.record_favorites(port.id, 1)
+	popularity.record_bookings(port.id, 1)
+	db.session.commit()
+	assert _counts(port.id) == (2, 1)
+
+
+def test_two_first_bumps_in_one_transaction_do_not_collide(app, make_port):
+	port = make_port()
+	popularity.record_favorites(port.id, 1)
+	popularity.record_bookings(port.id, 1)
+	db.session.commit()
+	assert _counts(port.id) == (1, 1)
+
+
+def test_mysql_bump_is_a_single_upsert():
+	statement = mysql.insert(PortPopularity).values([{"port_id": 1}, {"port_id": 2}]).on_duplicate_key_update(
+		{"favorites_count": PortPopularity.favorites_count + 1}
+	)
+	sql = str(statement.compile(dialect=mysql.dialect()))
+	assert "VALUES (%s, %s, %s, %s), (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE" in sql
+
+
+def test_favorites_sync_upserts_each_sign_in_one_statement(client, user_headers, make_port):
+	ports = [make_port(name=f"Port {i}") for i in range(5)]
+	client.put("/api/favorites", json={"portIds": [p.id for p in ports[:2]]}, headers=user_headers)
+
+	upserts = []
+	def count(conn, cursor, statement, parameters, context, executemany):
+		if statement.startswith("INSERT INTO port_popularity"):
+			upserts.append(statement)
+	event.listen(db.engine, "before_cursor_execute", count)
+	try:
+		body = client.put("/api/favorites", json={"portIds": [p.id for p in ports[1:]]}, headers=user_headers).get_json()
+	finally:
+		event.remove(db.engine, "before_cursor_execute", count)
+	assert len(body["added"]) == 3 and len(body["removed"]) == 1
+	assert len(upserts) == 2
+	assert [_counts(p.id) for p in ports] == [(0, 0)] + [(1, 0)] * 4
+	assert sorted(popularity.top_ports(10)) == sorted((p.id, 1, 0) for p in ports[1:])
+
+
+def test_rolled_back_bump_leaves_snapshot_untouched(app, make_port):
+	port = make_port()
+	popularity.record_favorites(port.id, 1)
+	db.session.commit()
+	assert popularity.top_ports() == [(port.id, 1, 0)]
+
+	popularity.record_favorites(port.id, 1)
+	db.session.rollback()
+	assert popularity.top_ports() == [(port.id, 1, 0)]
+	assert _counts(port.id) == (1, 0)
+
+
+def test_favorite_endpoints_move_counter(client, user_headers, make_port):
+	port = make_port()
+	assert client.post(f"/api/favorites/{port.id}", headers=user_headers).status_code == 201
+	assert _counts(port.id) == (1, 0)
+	assert client.delete(f"/api/favorites/{port.id}", headers=user_headers).status_code == 200
+	assert _counts(port.id) == (0, 0)
+
+
+def test_cancel_paid_booking_decrements_once(client, user, user_headers, make_port):
+	port = make_port()
+	booking = _book(user, port, "paid")
+	assert _counts(port.id) == (0, 1)
+
+	response = client.delete(f"/api/bookings/{booking.id}", headers=user_headers)
+	assert response.get_json()["message"] == "booking cancelled and refunded"
+	assert _counts(port.id) == (0, 0)
+
+	# Deleting the refunded booking must not decrement a second time
+	response = client.delete(f"/api/bookings/{booking.id}", headers=user_headers)
+	assert response.get_json()["message"] == "deleted"
+	assert _counts(port.id) == (0, 0)
+	assert popularity.reconcile() == 0
+
+
+def test_cancel_pending_booking_decrements(client, user, user_headers, make_port):
+	port = make_port()
+	other = make_port(name="Other")
+	_book(user, other, "paid")
+	booking = _book(user, port, "pending")
+	assert client.delete(f"/api/bookings/{booking.id}", headers=user_headers).status_code == 200
+	assert _counts(port.id) == (0, 0)
+	assert _counts(other.id) == (0, 1)
+	assert popularity.reconcile() == 0
+
+
+def test_migration_creates_and_backfills_table(app, user, make_port, monkeypatch):
+	port = make_port()
+	db.session.add(Favorite(user_id=user.id, port_id=port.id))
+	db.session.commit()
+	PortPopularity.__table__.drop(db.engine)
+	assert not inspect(db.engine).has_table("port_popularity")
+
+	monkeypatch.setattr(add_port_popularity_table, "create_app", lambda: app)
+	add_port_popularity_table.add_port_popularity_table()
+	assert _counts(port.id) == (1, 0)
+
+	# Running it again is a no-op
+	add_port_popularity_table.add_port_popularity_table()
+	assert _counts(port.id) == (1, 0)
@@ -0,0 +1,64 @@
+import math
+import random
+
+import pytest
+
+from backend import port_dedup
+from backend.port_dedup import METERS_PER_DEGREE, SpatialHash, distance_m
+
+
+def _haversine(lat1, lon1, lat2, lon2) -> float:
+	radius = METERS_PER_DEGREE * 180 / math.pi
+	p1, p2 = math.radians(lat1), math.radians(lat2)
+	a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+	return 2 * radius * math.asin(math.sqrt(a))
+
+
+def _north(meters: float) -> float:
+	return meters / METERS_PER_DEGREE
+
+
+def _east(meters: float, latitude: float) -> float:
+	return meters / (METERS_PER_DEGREE * math.cos(math.radians(latitude)))
+
+
+@pytest.mark.parametrize("latitude, longitude, meters", [(33.8938, 35.5018, 50.0), (60.0, 100.0, 10.0), (-45.0, -170.0, 99.0)])
+def test_same_longitude_distance_is_the_latitude_difference(latitude, longitude, meters):
+	index = SpatialHash(radius_m=100)
+	index.add(1, "Station", latitude, longitude)
+	matches = list(index.matches("Station", latitude + _north(meters), longitude))
+	assert matches == [(1, round(meters, 1), 1.0)]
+
+
+def test_distance_agrees_with_haversine_at_match_radii():
+	rng = random.Random(7)
+	for _ in range(1000):
+		lat, lon = rng.uniform(-75, 75), rng.uniform(-179, 179)
+		bearing, meters = rng.uniform(0, 2 * math.pi), rng.uniform(0, 200)
+		other_lat = lat + _north(meters * math.cos(bearing))
+		other_lon = lon + _east(meters * math.sin(bearing), lat)
+		assert distance_m(lat, lon, other_lat, other_lon) == pytest.approx(_haversine(lat, lon, other_lat, other_lon), abs=0.01)
+
+
+@pytest.mark.parametrize("latitude", [0.0, 33.9, 60.0, 80.0])
+def test_east_west_neighbours_are_found_at_high_latitudes(latitude):
+	index = SpatialHash(radius_m=100)
+	index.add(1, "Station", latitude, 10.0)
+	assert [m[0] for m in index.matches("Station", latitude, 10.0 + _east(95, latitude))] == [1]
+	assert [m[0] for m in index.matches("Station", latitude, 10.0 - _east(95, latitude))] == [1]
+	assert list(index.matches("Station", latitude, 10.0 + _east(105, latitude))) == []
+
+
+def test_names_must_be_similar():
+	index = SpatialHash(radius_m=100, min_similarity=0.8)
+	index.add(1, "Hamra Street Charger", 33.9, 35.48)
+	assert index.best_match("hamra street charger!", 33.9, 35.48)[0] == 1
+	assert index.best_match("Airport Parking", 33.9, 35.48) is None
+
+
+def test_find_duplicate_clusters(app, make_port):
+	a = make_port(name="Downtown Charger", latitude=33.8938, longitude=35.5018)
+	b = make_port(name="Downtown Charger #2", latitude=33.8938 + _north(40), longitude=35.5018)
+	make_port(name="Downtown Charger", latitude=33.8938 + _north(400), longitude=35.5018)
+	make_port(name="Marina", latitude=33.8938, longitude=35.5018)
+	assert port_dedup.find_duplicate_clusters(100, 0.8) == [[a.id, b.id]]
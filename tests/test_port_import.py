@@ -0,0 +1,83 @@
+import io
+import json
+
+import pytest
+
+from backend.models import EVPort, EVPortSchedule
+
+URL = "/api/admin/ports/import?dedupe=off"
+
+
+def _upload(client, headers, body: bytes, filename: str):
+	return client.post(URL, data={"file": (io.BytesIO(body), filename)}, headers=headers)
+
+
+def test_csv_rows_and_schedules_are_imported(client, admin_headers):
+	body = (
+		b"name,city,latitude,longitude,open,close,weekdays\n"
+		b"One,Beirut,33.9,35.5,09:00,17:00,0-4\n"
+		b"Two,Tripoli,34.4,35.8,,,\n"
+	)
+	response = _upload(client, admin_headers, body, "ports.csv")
+	assert response.status_code == 201
+	assert response.get_json()["imported"] == 2
+	one, two = EVPort.query.order_by(EVPort.id).all()
+	assert EVPortSchedule.query.filter_by(port_id=one.id).count() == 5
+	assert EVPortSchedule.query.filter_by(port_id=two.id).count() == 7
+
+
+def test_invalid_csv_rows_are_reported(client, admin_headers):
+	body = (
+		b"name,city,latitude,longitude,weekdays\n"
+		b",Beirut,33.9,35.5,\n"
+		b"Far,Beirut,95,35.5,\n"
+		b"Days,Beirut,33.9,35.5,3-9\n"
+		b"Good,Beirut,33.9,35.5,\n"
+	)
+	result = _upload(client, admin_headers, body, "ports.csv").get_json()
+	assert result["imported"] == 1
+	assert [error["row"] for error in result["errors"]] == [2, 3, 4]
+
+
+@pytest.mark.parametrize("document", [
+	[],
+	"ports",
+	{"type": "FeatureCollection", "features": {"type": "Feature"}},
+	{"type": "FeatureCollection", "features": ["not a feature"]},
+	{"type": "FeatureCollection", "features": [{"type": "Feature", "properties": ["name"]}]},
+])
+def test_malformed_geojson_is_rejected(client, admin_headers, document):
+	response = _upload(client, admin_headers, json.dumps(document).encode(), "ports.geojson")
+	assert response.status_code == 400
+	assert response.get_json()["message"].startswith("Could not parse geojson")
+	assert EVPort.query.count() == 0
+
+
+def test_unparseable_uploads_are_rejected(client, admin_headers):
+	assert _upload(client, admin_headers, b"{not json", "ports.geojson").status_code == 400
+	assert _upload(client, admin_headers, b"name,city\n\xff\xfe,x\n", "ports.csv").status_code == 400
+
+
+def test_geojson_points_are_imported(client, admin_headers):
+	document = {"type": "FeatureCollection", "features": [
+		{"type": "Feature", "geometry": {"type": "Point", "coordinates": [35.5, 33.9]}, "properties": {"name": "Geo", "city": "Beirut"}},
+		{"type": "Feature", "geometry": {"type": "Point", "coordinates": 35.5}, "properties": {"name": "NoPoint", "city": "Beirut"}},
+	]}
+	result = _upload(client, admin_headers, json.dumps(document).encode(), "ports.geojson").get_json()
+	assert result["imported"] == 1
+	assert result["errors"] == [{"row": 2, "message": "latitude and longitude must be numbers"}]
+	port = EVPort.query.one()
+	assert (port.latitude, port.longitude) == (33.9, 35.5)
+
+
+def test_oversized_geojson_is_rejected_before_parsing(client, admin_headers, app):
+	app.config["PORT_IMPORT_GEOJSON_MAX_BYTES"] = 64
+	document = {"type": "FeatureCollection", "features": [
+		{"type": "Feature", "geometry": {"type": "Point", "coordinates": [35.5, 33.9]}, "properties": {"name": f"Geo {i}", "city": "Beirut"}}
+		for i in range(3)
+	]}
+	response = _upload(client, admin_headers, json.dumps(document).encode(), "ports.geojson")
+	assert response.status_code == 413
+	assert EVPort.query.count() == 0
+	# CSV streams row by row and is not capped
+	assert _upload(client, admin_headers, b"name,city,latitude,longitude\n" + b"Csv,Beirut,33.9,35.5\n" * 10, "ports.csv").status_code == 201
@@ -0,0 +1,24 @@
+from collections import Counter
+
+from backend import profiler
+
+
+def test_by_route_totals_stacks_per_root():
+	stacks = Counter({
+		("GET /api/ports", "a.py:f", "b.py:g"): 30,
+		("GET /api/ports", "a.py:f"): 20,
+		("POST /api/bookings", "c.py:h"): 70,
+	})
+	assert profiler.by_route(stacks, hz=100) == [
+		{"route": "POST /api/bookings", "samples": 70, "seconds": 0.7},
+		{"route": "GET /api/ports", "samples": 50, "seconds": 0.5},
+	]
+
+
+def test_profile_endpoint_returns_route_totals(client, admin_headers):
+	response = client.get("/api/admin/profile?seconds=0.05&hz=50&format=routes&idle=1", headers=admin_headers)
+	assert response.status_code == 200
+	body = response.get_json()
+	assert body["hz"] == 50 and body["ticks"] >= 1
+	assert all(set(row) == {"route", "samples", "seconds"} for row in body["routes"])
+	assert client.get("/api/admin/profile?format=svg", headers=admin_headers).status_code == 400
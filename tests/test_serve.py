@@ -0,0 +1,20 @@
+from backend import db_pool, serve
+
+
+def test_waitress_threads_match_pool_capacity():
+	options = db_pool.engine_options({
+		"DB_POOL_PRE_PING": True,
+		"SQLALCHEMY_DATABASE_URI": "mysql+pymysql://u:p@db/ev",
+		"DB_POOL_SIZE": 10,
+		"DB_MAX_OVERFLOW": 5,
+		"DB_POOL_TIMEOUT": 10,
+		"DB_POOL_RECYCLE": 1800,
+	})
+	assert serve.waitress_options("0.0.0.0:5000", None, options)["threads"] == 15
+	assert serve.waitress_options("0.0.0.0:5000", 6, options)["threads"] == 6
+
+
+def test_waitress_without_a_sized_pool(monkeypatch):
+	monkeypatch.setenv("WAITRESS_CHANNEL_TIMEOUT", "90")
+	options = serve.waitress_options("127.0.0.1:8000", None, {"pool_pre_ping": True})
+	assert options == {"listen": "127.0.0.1:8000", "threads": serve.DEFAULT_THREADS, "channel_timeout": 90}
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from backend import slow_queries
+from backend.extensions import db
+
+
+@pytest.fixture
+def slow_log(app, monkeypatch):
+	monkeypatch.setitem(slow_queries._settings, "threshold", 0.05)
+	monkeypatch.setitem(slow_queries._settings, "explain_threshold", 60.0)
+	slow_queries.reset()
+
+	@event.listens_for(db.engine, "connect")
+	def add_sleep(dbapi_connection, connection_record):
+		dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+	db.engine.dispose()
+	yield
+	event.remove(db.engine, "connect", add_sleep)
+	slow_queries.reset()
+
+
+def test_slow_statement_is_recorded_with_its_own_duration(slow_log):
+	with db.engine.connect() as conn:
+		conn.execute(text("SELECT sleep_ms(80)"))
+		conn.execute(text("SELECT 1"))
+	statements = slow_queries.report()["worst"]
+	assert [entry["statement"] for entry in statements] == ["SELECT sleep_ms(80)"]
+	assert 80 <= statements[0]["maxMs"] < 1000
+
+
+def test_failed_statements_leave_nothing_on_the_connection(slow_log):
+	with db.engine.connect() as conn:
+		for _ in range(3):
+			with pytest.raises(OperationalError):
+				conn.execute(text("SELECT * FROM information_schema.COLUMNS"))
+			conn.rollback()
+		assert not any(key.startswith("slow_query") for key in conn.info)
+		conn.execute(text("SELECT sleep_ms(60)"))
+	statements = slow_queries.report()["worst"]
+	assert [entry["count"] for entry in statements] == [1]
+	assert statements[0]["maxMs"] < 1000
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect
+
+from backend import snapshot
+from backend.extensions import db
+from backend.models import Booking, EVPort, Favorite, User
+
+
+def test_indexes_backing_foreign_keys_are_not_dropped():
+	tables = db.metadata.sorted_tables
+	deferred = {index.name for index in snapshot.deferrable_indexes(tables)}
+	assert "ix_favorites_port_id" not in deferred
+	assert "ix_booking_conflicts_port_id" not in deferred
+	assert {"ix_bookings_start_time", "ix_users_full_name"} <= deferred
+	for index in snapshot.deferrable_indexes(tables):
+		assert not next(iter(index.columns)).foreign_keys
+
+
+@pytest.mark.parametrize("output", ["binary", "csv", "sqlite"])
+def test_dump_and_restore_round_trip(app, user, make_port, tmp_path, output):
+	port = make_port(address=None)
+	start = datetime(2030, 1, 1, 9, 30)
+	db.session.add_all([
+		Favorite(user_id=user.id, port_id=port.id),
+		Booking(user_id=user.id, port_id=port.id, start_time=start, end_time=start + timedelta(hours=2), payment_status="paid", amount=10.0),
+	])
+	db.session.commit()
+	indexes_before = {table: {i["name"] for i in inspect(db.engine).get_indexes(table)} for table in ("favorites", "bookings")}
+
+	manifest = snapshot.dump(str(tmp_path / "snap"), output, workers=2)
+	assert manifest["tables"]["bookings"]["rows"] == 1
+	db.session.remove()
+	Favorite.query.delete()
+	Booking.query.delete()
+	db.session.commit()
+	db.session.remove()
+
+	snapshot.restore(str(tmp_path / "snap"), workers=2, load_data=False)
+	db.session.remove()
+	booking = Booking.query.one()
+	assert booking.start_time == start
+	assert booking.payment_status == "paid"
+	assert EVPort.query.one().address is None
+	assert Favorite.query.one().user_id == User.query.filter_by(email="user@example.com").one().id
+	for table, names in indexes_before.items():
+		assert {i["name"] for i in inspect(db.engine).get_indexes(table)} == names
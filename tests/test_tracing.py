@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+from sqlalchemy import text
+
+from backend import tracing
+from backend.app import create_app
+from backend.config import Config
+from backend.extensions import db
+
+
+@pytest.fixture
+def traced_app(tmp_path):
+	class TracedConfig(Config):
+		TESTING = True
+		SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'traced.db'}"
+		TRACE_FILE = str(tmp_path / "traces" / "spans-{pid}.jsonl")
+
+	app = create_app(TracedConfig)
+
+	@app.get("/api/test/sql")
+	def sql_route():
+		try:
+			db.session.execute(text("SELECT * FROM no_such_table"))
+		except Exception:
+			db.session.rollback()
+		db.session.execute(text("SELECT 1"))
+		return {"status": "ok"}
+
+	with app.app_context():
+		db.create_all()
+		db.session.remove()
+	yield app
+	tracing.shutdown()
+	with app.app_context():
+		db.engine.dispose()
+
+
+def _spans(path) -> list:
+	with open(path) as f:
+		return [
+			span
+			for line in f
+			for resource in json.loads(line)["resourceSpans"]
+			for scope in resource["scopeSpans"]
+			for span in scope["spans"]
+		]
+
+
+def _span_file(app, pid: int) -> str:
+	return app.config["TRACE_FILE"].replace("{pid}", str(pid))
+
+
+def test_nothing_is_opened_until_the_first_traced_request(traced_app):
+	assert not os.path.exists(_span_file(traced_app, os.getpid()))
+	traced_app.test_client().get("/api/health")
+	tracing.shutdown()
+	names = [span["name"] for span in _spans(_span_file(traced_app, os.getpid()))]
+	assert "GET /api/health" in names
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_worker_writes_its_own_file(traced_app):
+	# The parent (like a preloading gunicorn master) has already traced a request
+	traced_app.test_client().get("/api/health")
+
+	pid = os.fork()
+	if pid == 0:
+		status = 1
+		try:
+			with traced_app.app_context():
+				db.engine.dispose(close=False)
+			response = traced_app.test_client().get("/api/test/sql")
+			tracing.shutdown()
+			status = 0 if response.status_code == 200 else 1
+		finally:
+			os._exit(status)
+	_, status = os.waitpid(pid, 0)
+	assert os.WEXITSTATUS(status) == 0
+
+	spans = _spans(_span_file(traced_app, pid))
+	root = next(span for span in spans if span["name"] == "GET /api/test/sql")
+	assert {"key": "process.pid", "value": {"intValue": str(pid)}} in json.loads(
+		open(_span_file(traced_app, pid)).readline()
+	)["resourceSpans"][0]["resource"]["attributes"]
+	sql = [span for span in spans if span["kind"] == tracing.SPAN_KIND_CLIENT]
+	failed = [span for span in sql if span.get("status", {}).get("code") == tracing.STATUS_ERROR]
+	assert len(failed) == 1
+	# The failed statement's span is closed, so later statements are not nested under it
+	assert all(span["parentSpanId"] == root["spanId"] for span in sql)
+
+	tracing.shutdown()
+	parent_spans = _spans(_span_file(traced_app, os.getpid()))
+	assert [span["name"] for span in parent_spans if span["kind"] == tracing.SPAN_KIND_SERVER] == ["GET /api/health"]
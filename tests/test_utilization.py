@@ -0,0 +1,44 @@
+from datetime import date, datetime, time
+
+from sqlalchemy import insert
+
+from backend import analytics
+from backend.extensions import db
+from backend.models import Booking, EVPortSchedule
+
+MONDAY = date(2030, 3, 4)
+
+
+def _book(user, port, start: datetime, end: datetime) -> None:
+	db.session.execute(insert(Booking), [{"user_id": user.id, "port_id": port.id, "start_time": start, "end_time": end, "payment_status": "paid", "amount": 0.0}])
+	db.session.commit()
+
+
+def test_minutes_outside_opening_hours_are_reported_separately(app, user, make_port):
+	port = make_port()
+	db.session.add(EVPortSchedule(port_id=port.id, weekday=0, open_time=time(8, 0), close_time=time(12, 0)))
+	db.session.commit()
+	# 10:00-14:00 on a port that closes at 12:00, plus a booking on a closed day
+	_book(user, port, datetime(2030, 3, 4, 10, 0), datetime(2030, 3, 4, 14, 0))
+	_book(user, port, datetime(2030, 3, 5, 9, 0), datetime(2030, 3, 5, 10, 30))
+
+	[group] = analytics.utilization(MONDAY, date(2030, 3, 11))["groups"]
+	assert group["bookedHours"] == 2.0
+	assert group["openHours"] == 4.0
+	assert group["outOfHoursHours"] == 3.5
+	assert group["utilization"] == 0.5
+	assert group["heatmap"][0][10:12] == [1.0, 1.0]
+	assert group["heatmap"][0][12] is None
+
+
+def test_overlapping_bookings_never_exceed_full_utilization(app, user, make_port):
+	port = make_port()
+	db.session.add(EVPortSchedule(port_id=port.id, weekday=0, open_time=time(8, 30), close_time=time(9, 30)))
+	db.session.commit()
+	for _ in range(2):
+		_book(user, port, datetime(2030, 3, 4, 8, 0), datetime(2030, 3, 4, 10, 0))
+
+	[group] = analytics.utilization(MONDAY, date(2030, 3, 5), group_by="city")["groups"]
+	assert group["utilization"] == 1.0
+	assert group["outOfHoursHours"] == 2.0
+	assert group["heatmap"][0][8:10] == [1.0, 1.0]